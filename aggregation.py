@@ -0,0 +1,56 @@
+"""查询结果汇总模块
+
+在后端一次性计算数值列总计与收益（移动拉新数/移动转存数 × PROFIT_COEFFICIENTS），
+与前端 CalculationService.calculateTotals / calculateIncome 的口径保持一致。
+只统计日期行：页面中的“合计”等非日期行不计入总计与 row_count。
+"""
+
+from typing import Any, Dict, Iterable
+
+from models import AMOUNT_COLUMNS, DailyTable
+
+NEW_USER_COLUMN = "移动拉新数"
+DEPOSIT_COLUMN = "移动转存数"
+
+
+def compute_income(totals: Dict[str, float], coefficients: Dict[str, float]) -> Dict[str, float]:
+    """根据总计和收益系数计算收益"""
+    new_user_income = totals.get(NEW_USER_COLUMN, 0) * coefficients["new_user"]
+    deposit_income = totals.get(DEPOSIT_COLUMN, 0) * coefficients["deposit"]
+    return {
+        "new_user": round(new_user_income, 2),
+        "deposit": round(deposit_income, 2),
+        "total": round(new_user_income + deposit_income, 2),
+    }
+
+
+def compute_summary(table: DailyTable, coefficients: Dict[str, float]) -> Dict[str, Any]:
+    """计算单个查询结果的总计与收益（直接对类型化的列求和）"""
+    totals = table.totals()
+    return {
+        "totals": totals,
+        "income": compute_income(totals, coefficients),
+        "row_count": table.daily_count(),
+    }
+
+
+def merge_summaries(
+    summaries: Iterable[Dict[str, Any]], coefficients: Dict[str, float]
+) -> Dict[str, Any]:
+    """合并多个查询结果的汇总（用于多UK码汇总）"""
+    totals: Dict[str, float] = {}
+    row_count = 0
+    for summary in summaries:
+        row_count += summary["row_count"]
+        for header, value in summary["totals"].items():
+            totals[header] = totals.get(header, 0) + value
+
+    for header in AMOUNT_COLUMNS:
+        if header in totals:
+            totals[header] = round(totals[header], 2)
+
+    return {
+        "totals": totals,
+        "income": compute_income(totals, coefficients),
+        "row_count": row_count,
+    }
@@ -0,0 +1,414 @@
+"""本地列式分析存储模块
+
+把抓取到的每日数据行（不含合计等非日期行）持久化到本地 Parquet 数据集，按 app_id/月份分区：
+    <root>/app_id=<app_id>/month=<YYYY-MM>/part-*.parquet
+报表直接查询本地数据集，不必反复请求Web应用与远程站点。
+
+写入: record() 只把结果表放入内存缓冲，后台线程每隔 flush_interval（或缓冲行数达到 flush_rows 时）
+按分区写成新文件；分区内文件数达到 compact_files 时合并为一个按 UK码/日期 排序的文件。
+同一 UK码+日期 被多次抓取时以抓取时间最新的一行为准（查询时去重，合并时落盘）。
+
+查询: 按日期范围裁剪分区，用 Arrow 数据集的过滤下推只读取需要的行，去重与分组求和
+均由 Arrow 计算内核完成（向量化，不逐行循环）；尚未写盘的缓冲行同样参与查询。
+
+pyarrow 为可选依赖，未安装时 available 为 False，record() 不做任何事。
+"""
+
+import logging
+import os
+import re
+import threading
+import time
+from array import array
+from collections import defaultdict
+from datetime import date, datetime
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from aggregation import compute_income
+from models import DailyTable
+
+try:  # 可选依赖: pyarrow 列式存储与计算
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - 取决于部署环境
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+available = pa is not None
+
+# 数值列（金额以分为单位存储）与对外的列名
+VALUE_COLUMNS = {
+    "new_users": "移动拉新数",
+    "deposits": "移动转存数",
+    "orders": "会员订单数",
+    "order_amount_cents": "会员订单金额",
+    "commission_cents": "会员佣金（元）",
+}
+CENT_COLUMNS = ("order_amount_cents", "commission_cents")
+
+GROUP_KEYS = {"uk_code": "UK码", "day": "日期", "month": "月份"}
+GROUP_BY = (*GROUP_KEYS, "total")
+
+MIMETYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+if pa is not None:
+    SCHEMA = pa.schema(
+        [
+            ("uk_code", pa.string()),
+            ("day", pa.date32()),
+            ("new_users", pa.int64()),
+            ("deposits", pa.int64()),
+            ("orders", pa.int64()),
+            ("order_amount_cents", pa.int64()),
+            ("commission_cents", pa.int64()),
+            ("scraped_at", pa.timestamp("ms")),
+        ]
+    )
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# app_id 同时用作分区目录名与熔断器的键，限制字符集与长度
+_APP_ID = re.compile(r"[\w-]{1,64}")
+
+
+def _int_array(values: array, type_) -> "pa.Array":
+    """array模块的数组直接按字节转为Arrow数组（复制一次，不逐个元素转换）"""
+    return pa.Array.from_buffers(type_, len(values), [None, pa.py_buffer(values.tobytes())])
+
+
+def daily_table_to_arrow(uk_code: str, table: DailyTable, scraped_at: datetime) -> "pa.Table":
+    """DailyTable 转为 Arrow 表，去掉非日期行"""
+    n = len(table)
+    days = _int_array(table.days, pa.int32())
+    columns = [
+        pa.repeat(pa.scalar(uk_code, pa.string()), n),
+        pc.subtract(days, pa.scalar(_EPOCH_ORDINAL, pa.int32())).cast(pa.date32()),
+        _int_array(table.new_users, pa.int64()),
+        _int_array(table.deposits, pa.int64()),
+        _int_array(table.orders, pa.int64()),
+        _int_array(table.order_amount_cents, pa.int64()),
+        _int_array(table.commission_cents, pa.int64()),
+        pa.repeat(pa.scalar(scraped_at, pa.timestamp("ms")), n),
+    ]
+    return pa.Table.from_arrays(columns, schema=SCHEMA).filter(pc.not_equal(days, 0))
+
+
+def latest_rows(table: "pa.Table") -> "pa.Table":
+    """同一 UK码+日期 只保留抓取时间最新的一行，结果按 UK码/日期 排序"""
+    if table.num_rows < 2:
+        return table
+    table = table.sort_by(
+        [("uk_code", "ascending"), ("day", "ascending"), ("scraped_at", "descending")]
+    )
+    n = table.num_rows
+    uk_code = table["uk_code"].combine_chunks()
+    day = table["day"].combine_chunks()
+    changed = pc.or_(
+        pc.not_equal(uk_code.slice(1), uk_code.slice(0, n - 1)),
+        pc.not_equal(day.slice(1), day.slice(0, n - 1)),
+    )
+    return table.filter(pa.concat_arrays([pa.array([True]), changed]))
+
+
+def months_between(start: date, end: date) -> List[str]:
+    months = []
+    year, month = start.year, start.month
+    while (year, month) <= (end.year, end.month):
+        months.append(f"{year:04d}-{month:02d}")
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return months
+
+
+def _month_keys(days: Any) -> Any:
+    """日期列转为 年*100+月 的整数列（比格式化为字符串快得多）"""
+    return pc.add(pc.multiply(pc.year(days), 100), pc.month(days))
+
+
+def _month_label(key: int) -> str:
+    return f"{key // 100:04d}-{key % 100:02d}"
+
+
+class AnalyticsStore:
+    """按 app_id/月份 分区的本地 Parquet 数据集"""
+
+    def __init__(
+        self,
+        root: str,
+        flush_interval: float = 30,
+        flush_rows: int = 5000,
+        compact_files: int = 8,
+    ):
+        self.root = Path(root)
+        self.flush_interval = flush_interval
+        self.flush_rows = flush_rows
+        self.compact_files = compact_files
+        self._pending: List[Tuple[str, str, DailyTable, datetime]] = []
+        self._pending_rows = 0
+        self._lock = threading.Lock()
+        # 合并分区时删除旧文件与查询读取文件互斥，避免读到一半的文件被删除
+        self._files_lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self.recorded_rows = 0
+        self.files_written = 0
+        self.compactions = 0
+        self.errors = 0
+
+    @staticmethod
+    def valid_app_id(app_id: str) -> bool:
+        return bool(_APP_ID.fullmatch(app_id or ""))
+
+    def record(self, app_id: str, uk_code: str, table: Any) -> None:
+        """登记一次抓取结果（只放入缓冲，由后台线程写盘）"""
+        if not available or not isinstance(table, DailyTable) or not len(table):
+            return
+        if not self.valid_app_id(app_id):
+            return
+        rows = table.daily_count()
+        with self._lock:
+            self._pending.append((app_id, uk_code, table, datetime.now()))
+            self._pending_rows += rows
+            self.recorded_rows += rows
+            full = self._pending_rows >= self.flush_rows
+        if full:
+            self._wakeup.set()
+
+    def run(self) -> None:
+        """后台写盘线程主循环"""
+        while True:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.warning(f"写入分析存储失败: {e}")
+
+    def _snapshot(self, app_id: Optional[str] = None) -> List[Tuple[str, str, DailyTable, datetime]]:
+        with self._lock:
+            return [item for item in self._pending if app_id is None or item[0] == app_id]
+
+    @staticmethod
+    def _to_arrow(pending: Iterable[Tuple[str, str, DailyTable, datetime]]) -> "pa.Table":
+        tables = [
+            daily_table_to_arrow(uk_code, table, scraped_at)
+            for _, uk_code, table, scraped_at in pending
+        ]
+        return pa.concat_tables(tables) if tables else SCHEMA.empty_table()
+
+    def _partition(self, app_id: str, month: str) -> Path:
+        return self.root / f"app_id={app_id}" / f"month={month}"
+
+    def flush(self) -> int:
+        """把缓冲的行按分区写成新文件，返回实际写入的行数
+
+        某个 app_id 有分区写入失败时，该 app_id 的缓冲全部保留到下次重试
+        （已写入其他分区的行会再写一次，查询与合并时按抓取时间去重）。
+        """
+        if not available:
+            return 0
+        with self._flush_lock:
+            # 写盘完成后才从缓冲中移除，期间的查询仍能读到这些行
+            pending = self._snapshot()
+            by_app: Dict[str, list] = defaultdict(list)
+            for item in pending:
+                by_app[item[0]].append(item)
+
+            written = 0
+            done = []
+            for app_id, items in by_app.items():
+                data = self._to_arrow(items)
+                months = _month_keys(data["day"])
+                failed = False
+                for month in pc.unique(months).to_pylist():
+                    directory = self._partition(app_id, _month_label(month))
+                    part = data.filter(pc.equal(months, month))
+                    try:
+                        self._write_file(directory, part)
+                    except Exception as e:
+                        failed = True
+                        self.errors += 1
+                        logger.warning(f"写入分析存储分区失败 {directory}: {e}")
+                        continue
+                    written += part.num_rows
+                    try:
+                        self._compact(directory)
+                    except Exception as e:
+                        self.errors += 1
+                        logger.warning(f"合并分析存储分区失败 {directory}: {e}")
+                if not failed:
+                    done.extend(items)
+
+            if done:
+                finished = {id(item) for item in done}
+                with self._lock:
+                    self._pending = [item for item in self._pending if id(item) not in finished]
+                    self._pending_rows -= sum(len(t) - len(t.labels) for _, _, t, _ in done)
+            return written
+
+    def _write_file(self, directory: Path, table: "pa.Table") -> None:
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"part-{time.time_ns()}-{os.getpid()}.parquet"
+        tmp = directory / f".{name}.tmp"
+        table = table.sort_by([("uk_code", "ascending"), ("day", "ascending")])
+        pq.write_table(table, tmp)
+        os.replace(tmp, directory / name)
+        self.files_written += 1
+
+    def _compact(self, directory: Path) -> None:
+        """分区内文件过多时合并为一个已去重的文件"""
+        files = sorted(directory.glob("part-*.parquet"))
+        if len(files) < self.compact_files:
+            return
+        table = ds.dataset([str(f) for f in files], format="parquet", schema=SCHEMA).to_table()
+        # 新文件写入后、旧文件删除前，查询会同时读到两者，去重后结果不变
+        self._write_file(directory, latest_rows(table))
+        with self._files_lock:
+            for f in files:
+                f.unlink(missing_ok=True)
+        self.compactions += 1
+
+    def read(
+        self,
+        app_id: str,
+        start: date,
+        end: date,
+        uk_codes: Optional[Sequence[str]] = None,
+    ) -> "pa.Table":
+        """读取日期范围内（可限定UK码）去重后的每日数据，包括尚未写盘的缓冲行"""
+        if not self.valid_app_id(app_id):
+            raise ValueError("app_id 格式错误")
+        condition = (ds.field("day") >= start) & (ds.field("day") <= end)
+        if uk_codes:
+            condition &= ds.field("uk_code").isin(list(uk_codes))
+
+        tables = [self._to_arrow(self._snapshot(app_id)).filter(condition)]
+        # 列出文件与读取在同一把锁内，合并分区不会在两者之间删除文件
+        with self._files_lock:
+            files = [
+                str(f)
+                for month in months_between(start, end)
+                for f in sorted(self._partition(app_id, month).glob("part-*.parquet"))
+            ]
+            if files:
+                dataset = ds.dataset(files, format="parquet", schema=SCHEMA)
+                tables.append(dataset.to_table(filter=condition))
+        return latest_rows(pa.concat_tables(tables))
+
+    def aggregate(
+        self,
+        app_id: str,
+        start: date,
+        end: date,
+        uk_codes: Optional[Sequence[str]] = None,
+        group_by: Optional[str] = None,
+        coefficients: Optional[Dict[str, float]] = None,
+    ) -> Tuple["pa.Table", Dict[str, Any]]:
+        """查询并聚合，返回 (结果表, 汇总)
+
+        group_by 为 uk_code/day/month 时按该列分组求和（附带行数与收益列），total 时只返回汇总，
+        不指定时返回去重后的每日明细。结果表的列名与前端表头一致，金额以元为单位。
+        """
+        if group_by is not None and group_by not in GROUP_BY:
+            raise ValueError(f"group_by 必须为 {'/'.join(GROUP_BY)}")
+        table = self.read(app_id, start, end, uk_codes)
+        summary = self._summary(table, coefficients)
+
+        if group_by is None:
+            result = table.select(["uk_code", "day", *VALUE_COLUMNS])
+        elif group_by == "total":
+            result = table.select(list(VALUE_COLUMNS)).slice(0, 0)
+        else:
+            if group_by == "month":
+                table = table.append_column("month", _month_keys(table["day"]))
+            grouped = table.group_by(group_by).aggregate(
+                [(column, "sum") for column in VALUE_COLUMNS] + [("new_users", "count")]
+            )
+            result = pa.table(
+                {
+                    group_by: grouped[group_by],
+                    **{column: grouped[f"{column}_sum"] for column in VALUE_COLUMNS},
+                    "rows": grouped["new_users_count"],
+                }
+            ).sort_by(group_by)
+            if group_by == "month":
+                labels = pa.array([_month_label(key) for key in result["month"].to_pylist()])
+                result = result.set_column(0, "month", labels)
+        return self._present(result, coefficients if group_by else None), summary
+
+    @staticmethod
+    def _present(table: "pa.Table", coefficients: Optional[Dict[str, float]]) -> "pa.Table":
+        """换算金额为元，分组结果附带收益列，列名换成中文表头"""
+        names = {**GROUP_KEYS, **VALUE_COLUMNS, "rows": "行数"}
+        columns = {}
+        for name in table.column_names:
+            column = table[name]
+            if name in CENT_COLUMNS:
+                column = pc.round(pc.divide(pc.cast(column, pa.float64()), 100), 2)
+            columns[names[name]] = column
+        if coefficients and "rows" in table.column_names:
+            income = pc.add(
+                pc.multiply(pc.cast(table["new_users"], pa.float64()), coefficients["new_user"]),
+                pc.multiply(pc.cast(table["deposits"], pa.float64()), coefficients["deposit"]),
+            )
+            columns["收益（元）"] = pc.round(income, 2)
+        return pa.table(columns)
+
+    @staticmethod
+    def _summary(table: "pa.Table", coefficients: Optional[Dict[str, float]]) -> Dict[str, Any]:
+        """总计与收益，与 aggregation.compute_summary 的口径一致"""
+        totals = {}
+        for column, header in VALUE_COLUMNS.items():
+            total = pc.sum(table[column]).as_py() or 0
+            totals[header] = round(total / 100, 2) if column in CENT_COLUMNS else total
+        summary = {
+            "totals": totals,
+            "row_count": table.num_rows,
+            "uk_code_count": pc.count_distinct(table["uk_code"]).as_py(),
+        }
+        if coefficients:
+            summary["income"] = compute_income(totals, coefficients)
+        return summary
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            pending_rows = self._pending_rows
+        return {
+            "available": available,
+            "pending_rows": pending_rows,
+            "recorded_rows": self.recorded_rows,
+            "files_written": self.files_written,
+            "compactions": self.compactions,
+            "errors": self.errors,
+        }
+
+
+def to_columnar(table: "pa.Table") -> Dict[str, Any]:
+    """结果表转为列式JSON（与 /api/query 的 columnar 格式一致），日期转为字符串"""
+    columns = []
+    for column in table.columns:
+        if pa.types.is_date(column.type):
+            column = pc.cast(column, pa.string())
+        columns.append(column.to_pylist())
+    return {
+        "format": "columnar",
+        "headers": table.column_names,
+        "columns": columns,
+        "row_count": table.num_rows,
+    }
+
+
+def to_bytes(table: "pa.Table", fmt: str) -> bytes:
+    """结果表序列化为 Parquet 文件或 Arrow IPC 流"""
+    sink = pa.BufferOutputStream()
+    if fmt == "parquet":
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
@@ -1,28 +1,102 @@
 import asyncio
 import atexit
+import functools
+import hmac
 import json
 import logging
 import os
+import re
 import signal
 import sys
 import threading
 import time
 import weakref
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import FIRST_COMPLETED, wait
 from contextlib import asynccontextmanager
-from datetime import datetime
+from datetime import date, datetime, timedelta
 from logging.handlers import RotatingFileHandler
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
-
-from bs4 import BeautifulSoup
-from flask import Flask, jsonify, render_template, request
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from urllib.parse import urlparse
+
+from flask import (
+    Flask,
+    Response,
+    jsonify,
+    render_template,
+    request,
+    stream_with_context,
+)
 from playwright.async_api import (
     TimeoutError as PlaywrightTimeoutError,
     async_playwright,
 )
 
+from aggregation import compute_summary, merge_summaries
+from analytics_store import GROUP_BY, AnalyticsStore, to_bytes, to_columnar
+from analytics_store import MIMETYPES as ANALYTICS_MIMETYPES
+from analytics_store import available as analytics_available
+from browser_pool import BrowserPool
+from circuit_breaker import CircuitBreaker
+from client_deadline import ClientDisconnected, client_disconnected, client_timeout
 from config import config
+from hedging import HedgePolicy
+from loop_monitor import LoopMonitor
+from memory_governor import MemoryGovernor
+from models import STANDARD_HEADERS, DailyTable
+from outcomes import (
+    CACHEABLE_OUTCOMES,
+    OUTCOME_BLOCKED,
+    OUTCOME_EMPTY,
+    OUTCOME_ERROR,
+    OUTCOME_OK,
+    OUTCOME_PARSE_FAILED,
+    OUTCOME_STATUS,
+    OUTCOME_TIMEOUT,
+    OutcomeCounter,
+    classify_extraction,
+)
+from page_cache import PageCache
+from priority_executor import (
+    BACKGROUND,
+    BATCH,
+    INTERACTIVE,
+    Preempted,
+    PriorityExecutor,
+)
+from profiler import Profiler
+from query_cache import QueryCache
+from request_trace import Trace, TraceRecorder, propagate
+from request_trace import record as trace_record
+from request_trace import span as trace_span
+from retry_policy import (
+    AUTH,
+    EmptyData,
+    Retrier,
+    RetryBudget,
+    RetryPolicy,
+    SessionExpired,
+)
+from session_state import StorageStateCache
+from static_assets import StaticAssets
+from table_export import (
+    FORMAT_CSV,
+    FORMATS,
+    MIMETYPES,
+    ExportItem,
+    csv_chunks,
+    xlsx_chunks,
+)
+from table_export import available as export_available
+from table_parser import EMPTY_MARKERS, EXTRACT_TABLE_JS, RESULT_CONTAINER
+from timeout_budget import Deadline, DeadlineExceeded, TimeoutPolicy
+from response_format import (
+    choose_encoding,
+    compress_response,
+    encode_payload,
+    negotiate_format,
+    shape_payload,
+)
 
 # 设置Playwright浏览器路径环境变量
 
@@ -248,18 +322,221 @@ if not app.debug:
     app.logger.setLevel(logging.INFO)
     app.logger.info("Flask V1 DataQuery startup")
 
+# 静态资源: 内容哈希URL、长期缓存与预压缩变体
+static_assets = StaticAssets(app.static_folder, app.static_url_path)
+if app.config["STATIC_PRECOMPRESS"]:
+    try:
+        static_assets.precompress()
+    except OSError as e:
+        app.logger.warning(f"生成静态资源预压缩文件失败: {e}")
+
+
+@app.url_defaults
+def add_static_version(endpoint, values):
+    """静态资源URL附带内容哈希"""
+    if endpoint == "static" and "filename" in values and "v" not in values:
+        digest = static_assets.file_hash(values["filename"])
+        if digest:
+            values["v"] = digest
+
+
+def serve_static(filename):
+    """静态资源：哈希匹配时长期缓存，优先返回预压缩变体"""
+    return static_assets.send(filename)
+
+
+app.view_functions["static"] = serve_static
+
+
+@app.context_processor
+def inject_static_assets():
+    return {
+        "asset_import_map": static_assets.import_map(),
+        "service_worker_enabled": app.config["SERVICE_WORKER_ENABLED"],
+    }
+
+
 # 优化线程池配置 - 根据CPU核心数动态调整
 import multiprocessing
 
 max_workers = min(4, max(2, multiprocessing.cpu_count()))
-executor = ThreadPoolExecutor(
+# 按优先级通道调度：交互查询优先，并为其预留工作线程
+executor = PriorityExecutor(
     max_workers=max_workers,
+    weights=app.config["PRIORITY_WEIGHTS"],
+    reserved=app.config["INTERACTIVE_RESERVED_WORKERS"],
     thread_name_prefix="flask_async_",
 )
 
 # 线程本地存储用于事件循环管理
 thread_local = threading.local()
 
+# 浏览器会话状态缓存（按app_id共享）
+session_states = StorageStateCache(ttl=app.config["SESSION_STATE_TTL"])
+
+# 查询结果缓存（结果与汇总一同缓存）
+query_cache = QueryCache(
+    max_entries=app.config["QUERY_CACHE_MAX_ENTRIES"],
+    ttl=app.config["QUERY_CACHE_TTL"],
+    today_ttl=app.config["QUERY_CACHE_TODAY_TTL"],
+)
+
+# 抓取阶段超时策略（根据观测耗时自适应），每个查询从中创建Deadline
+timeout_policy = TimeoutPolicy(
+    app.config["PHASE_TIMEOUTS"],
+    order=["goto", "networkidle", "search_input", "results"],
+    window=app.config["PHASE_TIMEOUT_WINDOW"],
+    multiplier=app.config["PHASE_TIMEOUT_MULTIPLIER"],
+    min_samples=app.config["PHASE_TIMEOUT_MIN_SAMPLES"],
+)
+
+
+def new_deadline(client_timeout: Optional[float] = None) -> Deadline:
+    """查询截止时间；客户端声明了超时时取两者的较小值（扣除响应传输的余量）"""
+    total = app.config["QUERY_DEADLINE"]
+    if client_timeout is not None:
+        total = min(total, max(0.0, client_timeout - app.config["CLIENT_DEADLINE_MARGIN"]))
+    return Deadline(timeout_policy, total)
+
+
+# 远程站点重试策略（进程级重试预算在所有查询之间共享）
+retry_policy = RetryPolicy(
+    app.config["RETRY_MAX_ATTEMPTS"],
+    RetryBudget(
+        ratio=app.config["RETRY_BUDGET_RATIO"],
+        max_tokens=app.config["RETRY_BUDGET_MAX_TOKENS"],
+    ),
+    per_request=app.config["RETRY_PER_REQUEST"],
+    base_delay=app.config["RETRY_BASE_DELAY"],
+    max_delay=app.config["RETRY_MAX_DELAY"],
+)
+
+# 远程站点熔断器（按 站点/app_id）
+circuit_breaker = CircuitBreaker(
+    failure_rate=app.config["CIRCUIT_FAILURE_RATE"],
+    window=app.config["CIRCUIT_WINDOW"],
+    window_seconds=app.config["CIRCUIT_WINDOW_SECONDS"],
+    min_calls=app.config["CIRCUIT_MIN_CALLS"],
+    open_seconds=app.config["CIRCUIT_OPEN_SECONDS"],
+    probe_interval=app.config["CIRCUIT_PROBE_INTERVAL"],
+    half_open_successes=app.config["CIRCUIT_HALF_OPEN_SUCCESSES"],
+    max_circuits=app.config["CIRCUIT_MAX_KEYS"],
+)
+
+
+def circuit_key(app_id=None) -> str:
+    """熔断器的键: 远程站点主机/app_id"""
+    host = urlparse(app.config["BASE_URL"]).netloc
+    return f"{host}/{app_id or app.config['DEFAULT_APP_ID']}"
+
+
+# 请求时间线追踪（Chrome trace-event格式，按采样率记录并异步写入）
+trace_recorder = TraceRecorder(
+    app.config["TRACE_DIR"],
+    sample_rate=app.config["TRACE_SAMPLE_RATE"],
+    max_files=app.config["TRACE_MAX_FILES"],
+)
+
+# 本地列式分析存储（抓取到的每日数据按 app_id/月份 写入Parquet）
+analytics_store = AnalyticsStore(
+    app.config["ANALYTICS_DIR"],
+    flush_interval=app.config["ANALYTICS_FLUSH_INTERVAL"],
+    flush_rows=app.config["ANALYTICS_FLUSH_ROWS"],
+    compact_files=app.config["ANALYTICS_COMPACT_FILES"],
+)
+
+if app.config["ANALYTICS_STORE_ENABLED"] and analytics_available:
+    threading.Thread(target=analytics_store.run, name="analytics_writer", daemon=True).start()
+
+# 按需性能剖析（由 /api/admin/profile 启动）
+profiler = Profiler(
+    app.config["PROFILE_DIR"], max_seconds=app.config["PROFILE_MAX_SECONDS"]
+)
+
+# 抓取结果类型计数
+scrape_outcomes = OutcomeCounter()
+# 被取消的抓取计数（按原因: client_disconnect / deadline / hedge）
+cancelled_scrapes = OutcomeCounter()
+
+# 内存管理: 按进程树RSS对新的浏览器上下文做准入控制，超过硬限制时回收浏览器
+memory_governor = MemoryGovernor(
+    soft_limit_mb=app.config["MEMORY_SOFT_LIMIT_MB"],
+    hard_limit_mb=app.config["MEMORY_HARD_LIMIT_MB"],
+)
+
+# 按工作线程复用的浏览器池
+browser_pool = BrowserPool(
+    lambda playwright: launch_browser(playwright, headless=True),
+    max_uses=app.config["BROWSER_MAX_USES"],
+    idle_ttl=app.config["BROWSER_IDLE_TTL"],
+    night_idle_ttl=app.config["BROWSER_NIGHT_IDLE_TTL"],
+    night_hours=app.config["BROWSER_NIGHT_HOURS"],
+)
+
+
+def browser_janitor():
+    """后台定期关闭空闲浏览器；内存超过硬限制时关闭全部空闲浏览器"""
+    while True:
+        time.sleep(app.config["BROWSER_JANITOR_INTERVAL"])
+        try:
+            force = memory_governor.over_hard()
+            if force:
+                browser_pool.recycle_all()
+            closed = browser_pool.shrink(force=force)
+            if closed:
+                app.logger.info(
+                    f"已关闭{closed}个空闲浏览器，内存: {memory_governor.stats()}"
+                )
+        except Exception as e:
+            app.logger.warning(f"回收空闲浏览器时出错: {e}")
+
+
+if app.config["BROWSER_POOL_ENABLED"]:
+    threading.Thread(target=browser_janitor, name="browser_janitor", daemon=True).start()
+
+# 事件循环延迟与线程池饱和监控
+loop_monitor = LoopMonitor(
+    interval=app.config["LOOP_MONITOR_INTERVAL"],
+    block_threshold=app.config["LOOP_BLOCK_THRESHOLD"],
+    queue_wait_threshold=app.config["EXECUTOR_WAIT_WARN"],
+    queue_waits=executor.queue_waits,
+    log=app.logger,
+)
+
+if app.config["LOOP_MONITOR_ENABLED"]:
+    threading.Thread(target=loop_monitor.run, name="loop_monitor", daemon=True).start()
+
+# 对冲请求（全局对冲预算在所有查询之间共享）
+hedge_policy = HedgePolicy(
+    quantile=app.config["HEDGE_PERCENTILE"],
+    min_delay=app.config["HEDGE_MIN_DELAY"],
+    window=app.config["HEDGE_WINDOW"],
+    min_samples=app.config["HEDGE_MIN_SAMPLES"],
+    budget=RetryBudget(
+        ratio=app.config["HEDGE_BUDGET_RATIO"],
+        max_tokens=app.config["HEDGE_BUDGET_MAX_TOKENS"],
+    ),
+)
+
+
+def finish_scrape(outcome: str, result: Dict[str, Any]) -> Dict[str, Any]:
+    """写入抓取结果类型；计数与熔断器由调用方在选定采用的结果后通过 record_scrape 记录一次"""
+    result["outcome"] = outcome
+    result["scraped_outcome"] = outcome
+    return result
+
+
+def record_scrape(app_id, result: Dict[str, Any]) -> None:
+    """记录一次抓取的结果类型（计数与熔断器）
+
+    对冲时只记录被采用的那次抓取；没有访问远程站点的结果（内存准入被拒、范围内数据均已定稿）不记录。
+    """
+    outcome = result.pop("scraped_outcome", None)
+    if outcome is None:
+        return
+    scrape_outcomes.record(outcome)
+    circuit_breaker.record(circuit_key(app_id), outcome in CACHEABLE_OUTCOMES)
+
 
 # 注册清理函数
 def cleanup():
@@ -277,6 +554,20 @@ def cleanup():
     except Exception as e:
         app.logger.error(f"关闭线程池时出错: {e}")
 
+    try:
+        written = analytics_store.flush()
+        if written:
+            app.logger.info(f"已写入{written}行分析数据")
+    except Exception as e:
+        app.logger.error(f"写入分析存储时出错: {e}")
+
+    try:
+        closed = browser_pool.shrink(force=True)
+        if closed:
+            app.logger.info(f"已关闭{closed}个浏览器")
+    except Exception as e:
+        app.logger.error(f"关闭浏览器池时出错: {e}")
+
     try:
         # 清理线程本地存储的事件循环
         if hasattr(thread_local, "loop") and not thread_local.loop.is_closed():
@@ -315,125 +606,6 @@ def build_target_url(app_id=None):
     )
 
 
-def html_table_to_data(html: str) -> Tuple[List[str], List[List[str]]]:
-    """将HTML表格转换为结构化数据"""
-    soup = BeautifulSoup(html, "html.parser")
-
-    # 尝试多种表格结构解析方式
-    headers = []
-    rows = []
-
-    # 方式1: 查找传统table标签
-    table = soup.find("table")
-    if table:
-        # 提取表头
-        header_row = table.find("thead")
-        if header_row:
-            headers = [
-                header.get_text().strip()
-                for header in header_row.find_all(["th", "td"])
-            ]
-        else:
-            # 如果没有thead，尝试第一行作为表头
-            first_row = table.find("tr")
-            if first_row:
-                headers = [
-                    cell.get_text().strip() for cell in first_row.find_all(["th", "td"])
-                ]
-
-        # 提取数据行
-        body = table.find("tbody")
-        if body:
-            for row in body.find_all("tr"):
-                cells = [cell.get_text().strip() for cell in row.find_all(["td", "th"])]
-                if cells:  # 只添加非空行
-                    rows.append(cells)
-        else:
-            # 如果没有tbody，直接从table中提取所有tr（跳过表头行）
-            all_rows = table.find_all("tr")
-            for i, row in enumerate(all_rows):
-                if i == 0 and headers:  # 跳过表头行
-                    continue
-                cells = [cell.get_text().strip() for cell in row.find_all(["td", "th"])]
-                if cells:
-                    rows.append(cells)
-
-        if headers or rows:
-            return headers, rows
-
-    # 方式2: 查找div结构的表格（针对目标页面）
-    table_container = soup.find("div", class_="table")
-    if table_container:
-        # 提取表头
-        header_row = table_container.find("div", class_="table_header")
-        if header_row:
-            headers = [
-                header.get_text().strip()
-                for header in header_row.find_all("div")
-                if header.get_text().strip()
-            ]
-
-        # 提取数据行
-        body = table_container.find("div", class_="table_body")
-        if body:
-            for row in body.find_all("div", class_="table_body_item"):
-                cells = [
-                    cell.get_text().strip()
-                    for cell in row.find_all("div")
-                    if cell.get_text().strip()
-                ]
-                if cells:
-                    rows.append(cells)
-
-        if headers or rows:
-            return headers, rows
-
-    # 方式3: 通用div结构解析
-    # 查找可能的表格容器
-    possible_containers = soup.find_all(
-        "div",
-        class_=lambda x: x
-        and ("table" in x.lower() or "list" in x.lower() or "data" in x.lower()),
-    )
-
-    for container in possible_containers:
-        # 尝试提取结构化数据
-        container_rows = container.find_all("div", recursive=False)
-        if len(container_rows) >= 2:  # 至少有表头和一行数据
-            # 第一行作为表头
-            first_row = container_rows[0]
-            potential_headers = [
-                cell.get_text().strip()
-                for cell in first_row.find_all("div")
-                if cell.get_text().strip()
-            ]
-
-            # 其余行作为数据
-            potential_rows = []
-            for row_div in container_rows[1:]:
-                cells = [
-                    cell.get_text().strip()
-                    for cell in row_div.find_all("div")
-                    if cell.get_text().strip()
-                ]
-                if cells:
-                    potential_rows.append(cells)
-
-            if potential_headers and potential_rows:
-                return potential_headers, potential_rows
-
-    # 方式4: 最后尝试提取所有文本内容并按行分割
-    text_content = soup.get_text()
-    if text_content.strip():
-        lines = [line.strip() for line in text_content.split("\n") if line.strip()]
-        if len(lines) >= 2:
-            # 简单的文本解析，假设第一行是表头
-            headers = [lines[0]] if lines else []
-            rows = [[line] for line in lines[1:]] if len(lines) > 1 else []
-            return headers, rows
-
-    return [], []
-
 
 async def scrape_data(
     uk_code: str,
@@ -441,261 +613,355 @@ async def scrape_data(
     end_date: str,
     headless: bool = True,
     app_id: Optional[str] = None,
+    deadline: Optional[Deadline] = None,
+    debug: bool = False,
 ) -> Dict[str, Any]:
-    """抓取数据"""
-    # 优化浏览器启动参数，提高老站点兼容性
-    browser_args = [
-        "--no-sandbox",
-        "--disable-setuid-sandbox",
-        "--disable-dev-shm-usage",
-        "--disable-accelerated-2d-canvas",
-        "--no-first-run",
-        "--no-zygote",
-        "--disable-gpu",
-        "--disable-web-security",  # 提高老站点兼容性
-        "--disable-features=VizDisplayCompositor",  # 兼容老版本渲染
-        "--disable-background-timer-throttling",  # 防止后台定时器被限制
-        "--disable-backgrounding-occluded-windows",
-        "--disable-renderer-backgrounding",
-        "--disable-field-trial-config",
-        "--disable-ipc-flooding-protection",
-        "--force-color-profile=srgb",  # 确保颜色一致性
-        "--disable-blink-features=AutomationControlled",  # 避免被检测
-    ]
+    """抓取数据，各阶段超时从deadline的剩余预算中分配；debug时附带原始HTML
+
+    内存超过软限制时排队等待，等待超时则拒绝（blocked）。
+    后台任务在创建上下文前与各步骤之间可被交互查询抢占（抛出 Preempted）。
+    """
+    deadline = deadline or new_deadline()
+    executor.checkpoint()
+    admit_timeout = min(app.config["MEMORY_ADMIT_TIMEOUT"], deadline.remaining())
+    admit_started = time.perf_counter()
+    async with memory_governor.admission(admit_timeout) as admitted:
+        trace_record("memory_admit", admit_started)
+        if not admitted:
+            # 本地内存压力与远程站点无关：不计入熔断器与抓取结果统计（见 memory_governor.rejected）
+            app.logger.warning(f"内存超过软限制，拒绝新的抓取: {memory_governor.stats()}")
+            return {"error": "服务器繁忙，请稍后重试。", "outcome": OUTCOME_BLOCKED}
+        return await scrape_page(
+            uk_code, start_date, end_date, headless, app_id, deadline, debug
+        )
 
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
+
+def browser_profile() -> Dict[str, Any]:
+    """当前的Chromium启动配置档，名称无效时使用compat"""
+    profiles = app.config["BROWSER_PROFILES"]
+    return profiles.get(app.config["BROWSER_PROFILE"]) or profiles["compat"]
+
+
+if app.config["BROWSER_PROFILE"] not in app.config["BROWSER_PROFILES"]:
+    app.logger.warning(
+        f"未知的浏览器配置档 {app.config['BROWSER_PROFILE']}，使用compat"
+    )
+
+
+async def launch_browser(playwright, headless: bool = True):
+    """按配置档启动Chromium"""
+    with trace_span("launch", "playwright", profile=app.config["BROWSER_PROFILE"]):
+        return await playwright.chromium.launch(
             headless=headless,
-            args=browser_args,
+            args=browser_profile()["args"],
             slow_mo=50 if not headless else 0,  # 非headless模式下稍微减慢操作
         )
 
-        # 创建页面上下文，设置更好的兼容性
-        context = await browser.new_context(
-            viewport={"width": 1920, "height": 1080},
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            ),
-            java_script_enabled=True,
-            accept_downloads=False,
-            ignore_https_errors=True,  # 忽略HTTPS错误，提高老站点兼容性
-            bypass_csp=True,  # 绕过内容安全策略
-        )
 
-        page = await context.new_page()
+@asynccontextmanager
+async def browser_session(headless: bool = True):
+    """获取浏览器: headless时复用当前线程的浏览器池，否则单独启动并在结束时关闭"""
+    if headless and app.config["BROWSER_POOL_ENABLED"]:
+        browser = await browser_pool.acquire()
+        try:
+            yield browser
+        finally:
+            over_hard = memory_governor.over_hard()
+            if over_hard:
+                app.logger.warning(f"内存超过硬限制，回收浏览器: {memory_governor.stats()}")
+                browser_pool.recycle_all()
+            await browser_pool.release(recycle=over_hard)
+        return
+
+    async with async_playwright() as p:
+        browser = await launch_browser(p, headless)
+        try:
+            yield browser
+        finally:
+            try:
+                await browser.close()
+            except Exception as close_error:
+                app.logger.warning(f"关闭浏览器时出错: {close_error}")
+
+
+async def scrape_page(
+    uk_code: str,
+    start_date: str,
+    end_date: str,
+    headless: bool,
+    app_id: Optional[str],
+    deadline: Deadline,
+    debug: bool,
+) -> Dict[str, Any]:
+    """在浏览器上下文中完成一次查询"""
+    async with browser_session(headless) as browser:
+        # 复用同一app_id已建立的会话（cookies/localStorage），避免重复的会话初始化
+        session_key = app_id or app.config["DEFAULT_APP_ID"]
+        storage_state = session_states.get(session_key)
+
+        # 创建页面上下文，设置更好的兼容性
+        with trace_span("new_context", "playwright"):
+            context = await browser.new_context(
+                storage_state=storage_state,
+                viewport=browser_profile()["viewport"],
+                user_agent=(
+                    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                    "AppleWebKit/537.36 (KHTML, like Gecko) "
+                    "Chrome/120.0.0.0 Safari/537.36"
+                ),
+                java_script_enabled=True,
+                accept_downloads=False,
+                ignore_https_errors=True,  # 忽略HTTPS错误，提高老站点兼容性
+                bypass_csp=True,  # 绕过内容安全策略
+            )
+            page = await context.new_page()
+        retrier = Retrier(retry_policy, deadline, app.logger)
         try:
             target_url = build_target_url(app_id)
             app.logger.info(f"正在访问: {target_url}")
 
-            # 优化页面加载，增加重试机制
-            max_retries = 3
-            for attempt in range(max_retries):
-                try:
-                    await page.goto(
+            async def open_search():
+                """打开页面并等待UK码输入框出现"""
+                with deadline.track("goto"), trace_span("goto", "playwright"):
+                    response = await page.goto(
                         target_url,
-                        timeout=45000,  # 增加超时时间
+                        timeout=deadline.timeout_ms("goto"),
                         wait_until="domcontentloaded",  # 等待DOM加载完成
                     )
+                if (
+                    storage_state is not None
+                    and response is not None
+                    and response.status in (401, 403)
+                ):
+                    raise SessionExpired(f"会话已失效: HTTP {response.status}")
+
+                # 等待页面完全加载
+                with deadline.track("networkidle"), trace_span("networkidle", "playwright"):
+                    await page.wait_for_load_state(
+                        "networkidle", timeout=deadline.timeout_ms("networkidle")
+                    )
 
-                    # 等待页面完全加载
-                    await page.wait_for_load_state("networkidle", timeout=10000)
-                    break
-                except Exception as e:
-                    if attempt == max_retries - 1:
-                        raise
-                    app.logger.warning(f"页面加载失败，第{attempt + 1}次重试: {e}")
-                    await asyncio.sleep(2)  # 等待2秒后重试
-
-            # 等待输入框出现并填入UK码
-            await page.wait_for_selector(
-                "#app > div.search > div:nth-child(2) > input[type=text]", timeout=15000
-            )
-            await page.fill(
-                "#app > div.search > div:nth-child(2) > input[type=text]", uk_code
-            )
+                try:
+                    with deadline.track("search_input"), trace_span("search_input", "playwright"):
+                        await page.wait_for_selector(
+                            "#app > div.search > div:nth-child(2) > input[type=text]",
+                            timeout=deadline.timeout_ms("search_input"),
+                        )
+                except PlaywrightTimeoutError as e:
+                    if storage_state is not None:
+                        # 使用缓存的会话时输入框未出现，视为会话失效
+                        raise SessionExpired(f"缓存的会话可能已失效: {e}") from e
+                    raise
+
+            async def reset_session(category, error):
+                """鉴权失败时丢弃缓存的会话，以新会话重试"""
+                nonlocal storage_state
+                if category == AUTH:
+                    session_states.invalidate(session_key)
+                    storage_state = None
+                    await context.clear_cookies()
+
+            executor.checkpoint()
+            await retrier.call("打开查询页面", open_search, on_retry=reset_session)
+
+            # 输入框出现说明会话已建立，保存会话状态供后续上下文复用
+            if storage_state is None:
+                session_states.set(session_key, await context.storage_state())
+
+            async def submit_and_extract():
+                """填写查询条件、提交并解析结果表格"""
+                await page.fill(
+                    "#app > div.search > div:nth-child(2) > input[type=text]", uk_code
+                )
 
-            # 优化日期设置，增加兼容性检查
-            date_set_success = await page.evaluate(
-                f"""() => {{
-                const start = "{start_date}";
-                const end = "{end_date}";
+                # 优化日期设置，增加兼容性检查
+                date_set_success = await page.evaluate(
+                    f"""() => {{
+                    const start = "{start_date}";
+                    const end = "{end_date}";
                 
-                // 多种方式尝试设置日期，提高兼容性
-                try {{
-                    if (window.vm && window.vm.$data) {{
-                        window.vm.$data.showType = 1;
-                        const [startYear, startMonth, startDay] = start.split('-');
-                        window.vm.$data.submitTime(new Date(startYear, startMonth-1, startDay));
+                    // 多种方式尝试设置日期，提高兼容性
+                    try {{
+                        if (window.vm && window.vm.$data) {{
+                            window.vm.$data.showType = 1;
+                            const [startYear, startMonth, startDay] = start.split('-');
+                            window.vm.$data.submitTime(new Date(startYear, startMonth-1, startDay));
                         
-                        window.vm.$data.showType = 2;
-                        const [endYear, endMonth, endDay] = end.split('-');
-                        window.vm.$data.submitTime(new Date(endYear, endMonth-1, endDay));
+                            window.vm.$data.showType = 2;
+                            const [endYear, endMonth, endDay] = end.split('-');
+                            window.vm.$data.submitTime(new Date(endYear, endMonth-1, endDay));
                         
-                        return true;
-                    }}
+                            return true;
+                        }}
                     
-                    // 备用方案：直接操作DOM元素
-                    const startInput = document.querySelector(
-                        'input[type="date"], input[placeholder*="开始"], input[placeholder*="起始"]'
-                    );
-                    const endInput = document.querySelector(
-                        'input[type="date"], input[placeholder*="结束"], input[placeholder*="截止"]'
-                    );
-                    
-                    if (startInput && endInput) {{
-                        startInput.value = start;
-                        endInput.value = end;
-                        
-                        // 触发change事件
-                        startInput.dispatchEvent(
-                            new Event('change', {{ bubbles: true }})
+                        // 备用方案：直接操作DOM元素
+                        const startInput = document.querySelector(
+                            'input[type="date"], input[placeholder*="开始"], input[placeholder*="起始"]'
                         );
-                        endInput.dispatchEvent(
-                            new Event('change', {{ bubbles: true }})
+                        const endInput = document.querySelector(
+                            'input[type="date"], input[placeholder*="结束"], input[placeholder*="截止"]'
                         );
+                    
+                        if (startInput && endInput) {{
+                            startInput.value = start;
+                            endInput.value = end;
                         
-                        return true;
-                    }}
+                            // 触发change事件
+                            startInput.dispatchEvent(
+                                new Event('change', {{ bubbles: true }})
+                            );
+                            endInput.dispatchEvent(
+                                new Event('change', {{ bubbles: true }})
+                            );
+                        
+                            return true;
+                        }}
                     
-                    return false;
-                }} catch (error) {{
-                    console.error('日期设置失败:', error);
-                    return false;
-                }}
-            }}"""
-            )
-
-            if not date_set_success:
-                app.logger.warning("日期设置可能失败，尝试备用方案")
-                # 可以在这里添加更多备用方案
-
-            # 点击提交按钮
-            await page.click("#app > div.search > div.submit")
-
-            # 优化等待策略，增加多种等待条件
-            try:
-                await page.wait_for_selector(
-                    "#app > div.list > div.tab_warp", timeout=30000
-                )
-            except PlaywrightTimeoutError:
-                # 备用等待策略
-                await page.wait_for_selector(
-                    'table, .table, [class*="table"]', timeout=15000
+                        return false;
+                    }} catch (error) {{
+                        console.error('日期设置失败:', error);
+                        return false;
+                    }}
+                }}"""
                 )
 
-            # 等待一下确保数据加载完成
-            await asyncio.sleep(2)
+                if not date_set_success:
+                    app.logger.warning("日期设置可能失败，尝试备用方案")
+                    # 可以在这里添加更多备用方案
 
-            # 尝试获取表格内容
-            table_html = await page.inner_html("#app > div.list > div.tab_warp")
+                # 点击提交按钮
+                await page.click("#app > div.search > div.submit")
 
-            app.logger.info(f"抓取到的表格HTML长度: {len(table_html)}")
-            app.logger.info(f"表格HTML前500字符: {table_html[:500]}")
+                # 优化等待策略，增加多种等待条件
+                try:
+                    with deadline.track("results"), trace_span("results", "playwright"):
+                        await page.wait_for_selector(
+                            RESULT_CONTAINER, timeout=deadline.timeout_ms("results")
+                        )
+                except PlaywrightTimeoutError:
+                    # 备用等待策略
+                    with deadline.track("results_fallback"), trace_span("results_fallback", "playwright"):
+                        await page.wait_for_selector(
+                            'table, .table, [class*="table"]',
+                            timeout=deadline.timeout_ms("results_fallback"),
+                        )
+
+                # 等待一下确保数据加载完成
+                with trace_span("settle"):
+                    await asyncio.sleep(deadline.sleep_time(2))
+
+                # 在页面内一次性提取表格（单次往返，只返回表头与数据行）
+                with trace_span("evaluate", "playwright"):
+                    extracted = await page.evaluate(
+                        EXTRACT_TABLE_JS,
+                        {"selector": RESULT_CONTAINER, "markers": list(EMPTY_MARKERS)},
+                    )
+                headers, rows = extracted["headers"], extracted["rows"]
 
-            headers, rows = html_table_to_data(table_html)
+                app.logger.info(
+                    f"页面内提取: 方式={extracted['strategy']}, "
+                    f"表头={headers}, 数据行数={len(rows)}"
+                )
+                if rows:
+                    app.logger.info(f"第一行数据: {rows[0]}")
 
-            app.logger.info(f"解析得到的表头: {headers}")
-            app.logger.info(f"解析得到的数据行数: {len(rows)}")
-            if rows:
-                app.logger.info(f"第一行数据: {rows[0] if rows else 'None'}")
+                # 页面确认为空（空数据标记，或只有表头没有数据行）时直接返回，不重试；
+                # 只有什么都没解析到时才按 EmptyData 重试
+                if headers or extracted["empty"]:
+                    return extracted
+                raise EmptyData("未解析到表格数据", extracted)
 
-            # 如果第一次解析失败，尝试获取整个页面内容进行解析
-            if not headers or not rows:
-                app.logger.info("第一次解析失败，尝试获取完整页面内容")
+            executor.checkpoint()
+            try:
+                extracted = await retrier.call("提交查询", submit_and_extract)
+            except EmptyData as e:
+                extracted = e.payload
+            headers, rows = extracted["headers"], extracted["rows"]
+
+            # 原始HTML仅在debug模式下获取
+            html = full_html = ""
+            if debug:
+                if await page.query_selector(RESULT_CONTAINER) is not None:
+                    html = await page.inner_html(RESULT_CONTAINER)
                 full_html = await page.content()
-                soup = BeautifulSoup(full_html, "html.parser")
-
-                # 查找所有可能的表格元素
-                tables = soup.find_all("table")
-                app.logger.info(f"找到 {len(tables)} 个table标签")
-
-                # 查找所有可能包含数据的div
-                data_divs = soup.find_all(
-                    "div",
-                    class_=lambda x: x
-                    and (
-                        "list" in x.lower()
-                        or "table" in x.lower()
-                        or "data" in x.lower()
-                    ),
+
+            # 标准化表头，确保与前端 DISPLAY_COLUMNS 一致；
+            # 数据行在此一次性解析为类型化的列，同时完成补齐/截断
+            with trace_span("parse", rows=len(rows)):
+                table = DailyTable.from_rows(rows)
+
+            # 区分确认为空的结果与解析失败，不再用全0数据代替；
+            # 没有任何日期行的“数据”（错误页、加载提示等被解析成的行）按解析失败处理，不写入缓存
+            outcome = classify_extraction(headers, table, extracted["empty"])
+            if outcome == OUTCOME_PARSE_FAILED:
+                app.logger.warning(
+                    f"未能解析查询结果，页面结构可能已变化: 方式={extracted['strategy']}, "
+                    f"表头={headers[:6]}, 行数={len(rows)}"
                 )
-                app.logger.info(f"找到 {len(data_divs)} 个可能的数据容器div")
-
-                if tables:
-                    table = tables[0]
-                    headers = []
-                    header_row = table.find("thead")
-                    if header_row:
-                        headers = [
-                            header.get_text().strip()
-                            for header in header_row.find_all("th")
-                        ]
-
-                    rows = []
-                    body = table.find("tbody")
-                    if body:
-                        for row in body.find_all("tr"):
-                            cells = [
-                                cell.get_text().strip() for cell in row.find_all("td")
-                            ]
-                            rows.append(cells)
-
-                    app.logger.info(f"从完整页面解析得到表头: {headers}")
-                    app.logger.info(f"从完整页面解析得到数据行数: {len(rows)}")
-
-            # 标准化表头，确保与前端 DISPLAY_COLUMNS 一致
-            standard_headers = [
-                "日期",
-                "移动拉新数",
-                "移动转存数",
-                "会员订单数",
-                "会员订单金额",
-                "会员佣金（元）",
-            ]
-
-            # 如果没有抓取到数据，使用默认数据
-            if not headers or not rows:
-                headers = standard_headers
-                rows = [
-                    [start_date, "0", "0", "0", "0.00", "0.00"],
-                    [end_date, "0", "0", "0", "0.00", "0.00"],
-                ]
-            else:
-                # 如果抓取到了数据但表头不一致，只标准化表头，保留实际数据
-                if headers != standard_headers:
-                    headers = standard_headers
-                # 确保每行数据长度与表头一致
-                rows = [
-                    (
-                        row[: len(standard_headers)]
-                        if len(row) >= len(standard_headers)
-                        else row + ["0"] * (len(standard_headers) - len(row))
-                    )
-                    for row in rows
-                ]
-
-            return {
-                "headers": headers,
-                "rows": rows,
-                "html": table_html if "table_html" in locals() else "",
-                "full_html": (full_html[:5000] if "full_html" in locals() else "")[
-                    :5000
-                ],
-            }
+                return finish_scrape(
+                    OUTCOME_PARSE_FAILED,
+                    {
+                        "error": "未能解析查询结果，请稍后重试",
+                        "html": html,
+                        "full_html": full_html[:5000],
+                    },
+                )
+            if outcome == OUTCOME_EMPTY:
+                table = DailyTable()
+            return finish_scrape(
+                outcome,
+                {
+                    "headers": list(STANDARD_HEADERS),
+                    "rows": table,
+                    "html": html,
+                    "full_html": full_html[:5000],
+                },
+            )
 
-        except PlaywrightTimeoutError:
-            app.logger.error("Playwright操作超时")
-            return {"error": "页面加载超时，请稍后重试或检查网络连接。"}
+        except Preempted:
+            raise
+        except SessionExpired as e:
+            app.logger.error(f"会话建立失败: {e}")
+            return finish_scrape(
+                OUTCOME_BLOCKED, {"error": "会话已失效，请稍后重试。"}
+            )
+        except (PlaywrightTimeoutError, DeadlineExceeded) as e:
+            app.logger.error(f"Playwright操作超时: {e}")
+            return finish_scrape(
+                OUTCOME_TIMEOUT,
+                {"error": "页面加载超时，请稍后重试或检查网络连接。"},
+            )
         except Exception as e:
             app.logger.error(f"抓取数据时发生未知错误: {e}", exc_info=True)
-            return {"error": f"发生未知错误: {e}"}
+            return finish_scrape(
+                OUTCOME_ERROR, {"error": f"发生未知错误: {e}"}
+            )
         finally:
             try:
-                await browser.close()
+                with trace_span("close_context", "playwright"):
+                    await context.close()
             except Exception as close_error:
-                app.logger.warning(f"关闭浏览器时出错: {close_error}")
+                app.logger.warning(f"关闭浏览器上下文时出错: {close_error}")
+
+
+def make_query_response(
+    result: Dict[str, Any], fmt: str, debug: bool = False, status: int = 200
+) -> Response:
+    """按协商格式生成查询响应"""
+    with trace_span("serialize", format=fmt):
+        body, mimetype = encode_payload(shape_payload(result, fmt, debug), fmt)
+    return Response(body, status=status, mimetype=mimetype)
+
+
+@app.after_request
+def compress_after_request(response):
+    """压缩API响应（gzip/brotli）"""
+    return compress_response(
+        response,
+        request.accept_encodings,
+        level=app.config["COMPRESSION_LEVEL"],
+        min_size=app.config["COMPRESSION_MIN_SIZE"],
+    )
 
 
 def check_date(date_str: str) -> bool:
@@ -706,15 +972,180 @@ def check_date(date_str: str) -> bool:
         return False
 
 
+def split_uk_codes(values: Any) -> List[str]:
+    """规范化UK码参数: 接受字符串或列表，每项按空白/逗号（含全角）分隔，去重并保持顺序"""
+    if values is None:
+        return []
+    if isinstance(values, str) or not isinstance(values, (list, tuple)):
+        values = [values]
+    codes = (code for value in values for code in re.split(r"[\s,，]+", str(value)))
+    return list(dict.fromkeys(code for code in codes if code))
+
+
+def date_range_errors(start_date: str, end_date: str) -> List[str]:
+    """校验已通过格式检查的日期范围"""
+    start_dt = datetime.strptime(start_date, "%Y-%m-%d")
+    end_dt = datetime.strptime(end_date, "%Y-%m-%d")
+    today = datetime.now().date()
+
+    if start_dt.date() > today or end_dt.date() > today:
+        return ["日期不能超过今天"]
+    if start_dt > end_dt:
+        return ["开始日期不能晚于结束日期"]
+    if (end_dt - start_dt).days > 365:  # 限制查询范围
+        return ["查询时间范围不能超过365天"]
+    return []
+
+
+def index_page_signature():
+    """首页缓存签名：模板修改时间、静态资源哈希及影响渲染的配置"""
+    template_path = os.path.join(app.root_path, app.template_folder, "index.html")
+    return (
+        os.stat(template_path).st_mtime_ns,
+        static_assets.version(),
+        app.config["SERVICE_WORKER_ENABLED"],
+    )
+
+
+# 首页渲染结果与请求无关，缓存渲染结果，模板或静态资源变化时重新渲染
+index_page_cache = PageCache(
+    lambda: render_template("index.html"),
+    index_page_signature,
+    check_interval=app.config["INDEX_CACHE_CHECK_INTERVAL"],
+)
+
+
 @app.route("/")
 def index():
-    return render_template("index.html")
+    page = index_page_cache.get()
+    if page.etag in request.if_none_match:
+        response = app.response_class(status=304)
+    else:
+        encoding = choose_encoding(request.accept_encodings)
+        if encoding == "br" and page.br_body is not None:
+            response = app.response_class(page.br_body, mimetype="text/html")
+            response.headers["Content-Encoding"] = "br"
+        elif encoding in ("br", "gzip"):
+            response = app.response_class(page.gzip_body, mimetype="text/html")
+            response.headers["Content-Encoding"] = "gzip"
+        else:
+            response = app.response_class(page.body, mimetype="text/html")
+    response.set_etag(page.etag)
+    response.headers["Cache-Control"] = "no-cache"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+@app.route("/sw.js")
+def service_worker():
+    """Service Worker脚本（需从根路径提供以控制整个站点）"""
+    response = app.response_class(
+        render_template(
+            "sw.js",
+            asset_version=static_assets.version(),
+            precache_urls=["/"] + static_assets.precache_urls(),
+        ),
+        mimetype="application/javascript",
+    )
+    response.headers["Cache-Control"] = "no-cache"
+    return response
 
 
 @app.route("/api/health")
 def health_check():
-    """健康检查接口"""
-    return jsonify({"status": "ok"}), 200
+    """健康检查接口，远程站点熔断时状态为degraded"""
+    return (
+        jsonify(
+            {
+                "status": "degraded" if circuit_breaker.any_open() else "ok",
+                "circuit_breaker": circuit_breaker.snapshot(),
+            }
+        ),
+        200,
+    )
+
+
+@app.route("/api/metrics")
+def metrics():
+    """运行指标接口"""
+    return jsonify(
+        {
+            "query_cache": query_cache.stats(),
+            "session_states": session_states.stats(),
+            "circuit_breaker": circuit_breaker.snapshot(),
+            "phase_timeouts": timeout_policy.snapshot(),
+            "retries": retry_policy.stats(),
+            "outcomes": scrape_outcomes.stats(),
+            "memory": memory_governor.stats(),
+            "browser_pool": dict(
+                browser_pool.stats(), profile=app.config["BROWSER_PROFILE"]
+            ),
+            "hedging": dict(hedge_policy.stats(), enabled=app.config["HEDGE_ENABLED"]),
+            "executor": executor.stats(),
+            "cancelled": cancelled_scrapes.stats(),
+            "event_loops": loop_monitor.stats(),
+            "traces": trace_recorder.stats(),
+            "analytics": dict(
+                analytics_store.stats(), enabled=app.config["ANALYTICS_STORE_ENABLED"]
+            ),
+        }
+    )
+
+
+def admin_token_valid() -> bool:
+    """请求头 X-Admin-Token 是否与 ADMIN_TOKEN 一致（未配置 ADMIN_TOKEN 时总是False）"""
+    token = app.config["ADMIN_TOKEN"]
+    supplied = request.headers.get("X-Admin-Token", "")
+    return bool(token) and hmac.compare_digest(supplied.encode(), token.encode())
+
+
+def admin_required(view):
+    """管理接口: 未配置 ADMIN_TOKEN 时不存在(404)，令牌不符时拒绝(403)"""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not app.config["ADMIN_TOKEN"]:
+            return jsonify({"error": "Not Found"}), 404
+        if not admin_token_valid():
+            return jsonify({"error": "Forbidden"}), 403
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+@app.route("/api/admin/profile", methods=["GET", "POST", "DELETE"])
+@admin_required
+def admin_profile():
+    """性能剖析接口
+
+    GET 查看会话状态；DELETE 立即结束会话并写出结果；
+    POST 启动会话: {"mode": "sampling"|"cprofile", "requests": N, "seconds": T,
+    "tracemalloc": bool, "interval": 采样间隔秒}；T 须为 (0, PROFILE_MAX_SECONDS] 内的有限值，否则400
+    """
+    if request.method == "GET":
+        return jsonify(profiler.status())
+    if request.method == "DELETE":
+        result = profiler.stop()
+        if result is None:
+            return jsonify({"error": "没有进行中的剖析会话"}), 404
+        return jsonify(result)
+
+    data = request.get_json(silent=True) or {}
+    try:
+        requests_count = data.get("requests")
+        status = profiler.start(
+            mode=data.get("mode", "sampling"),
+            requests=int(requests_count) if requests_count is not None else None,
+            seconds=float(data["seconds"]) if data.get("seconds") is not None else None,
+            trace_memory=bool(data.get("tracemalloc")),
+            interval=float(data.get("interval") or 0.005),
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    except RuntimeError as e:
+        return jsonify({"error": str(e)}), 409
+    app.logger.info(f"开始性能剖析: {status}")
+    return jsonify(status), 201
 
 
 @app.route("/api/coefficients", methods=["GET"])
@@ -723,37 +1154,170 @@ def get_coefficients():
     return jsonify({"success": True, "data": app.config["PROFIT_COEFFICIENTS"]})
 
 
+@app.route("/api/summary", methods=["POST"])
+def get_summary():
+    """多UK码汇总接口，仅使用已缓存的查询结果，不触发抓取"""
+    data = request.get_json(silent=True) or {}
+    uk_codes = split_uk_codes(data.get("uk_codes") or data.get("uk_code"))
+    start_date = data.get("start_date", "").strip()
+    end_date = data.get("end_date", "").strip()
+    app_id = data.get("app_id", "").strip() or app.config["DEFAULT_APP_ID"]
+
+    if not uk_codes:
+        return jsonify({"error": "请输入UK码"}), 400
+    if not check_date(start_date) or not check_date(end_date):
+        return jsonify({"error": "日期格式错误，请使用YYYY-MM-DD格式"}), 400
+    if not AnalyticsStore.valid_app_id(app_id):
+        return jsonify({"error": "app_id 格式错误"}), 400
+
+    items = {}
+    missing = []
+    for uk_code in uk_codes:
+        entry, _ = query_cache.lookup(
+            QueryCache.make_key(app_id, uk_code, start_date, end_date),
+            app.config["QUERY_CACHE_MAX_STALE"],
+        )
+        if entry is None:
+            missing.append(uk_code)
+        else:
+            items[uk_code] = entry.summary
+
+    return jsonify(
+        {
+            "success": True,
+            "data": {
+                "items": items,
+                "total": merge_summaries(
+                    items.values(), app.config["PROFIT_COEFFICIENTS"]
+                ),
+                "missing": missing,
+            },
+        }
+    )
+
+
+@app.route("/api/analytics", methods=["POST"])
+def analytics():
+    """本地分析存储查询接口：按UK码/日期/月份聚合已抓取的数据，不触发抓取
+
+    format 为 json（列式，默认）、parquet 或 arrow（Arrow IPC流）。
+    """
+    if not analytics_available:
+        return jsonify({"error": "分析存储需要安装 pyarrow"}), 501
+
+    data = request.get_json(silent=True) or {}
+    uk_codes = split_uk_codes(data.get("uk_codes"))
+    start_date = str(data.get("start_date", "")).strip()
+    end_date = str(data.get("end_date", "")).strip()
+    app_id = str(data.get("app_id", "")).strip() or app.config["DEFAULT_APP_ID"]
+    group_by = data.get("group_by") or None
+    fmt = str(data.get("format") or "json").strip().lower()
+
+    if not check_date(start_date) or not check_date(end_date):
+        return jsonify({"error": "日期格式错误，请使用YYYY-MM-DD格式"}), 400
+    start, end = date.fromisoformat(start_date), date.fromisoformat(end_date)
+    if start > end:
+        return jsonify({"error": "开始日期不能晚于结束日期"}), 400
+    if not analytics_store.valid_app_id(app_id):
+        return jsonify({"error": "app_id 格式错误"}), 400
+    if group_by is not None and group_by not in GROUP_BY:
+        return jsonify({"error": f"group_by 必须为 {'/'.join(GROUP_BY)}"}), 400
+    if fmt != "json" and fmt not in ANALYTICS_MIMETYPES:
+        return jsonify({"error": "format 必须为 json/parquet/arrow"}), 400
+
+    started = time.perf_counter()
+    table, summary = analytics_store.aggregate(
+        app_id,
+        start,
+        end,
+        uk_codes,
+        group_by,
+        app.config["PROFIT_COEFFICIENTS"],
+    )
+    query_time = round(time.perf_counter() - started, 4)
+
+    if fmt != "json":
+        response = Response(to_bytes(table, fmt), mimetype=ANALYTICS_MIMETYPES[fmt])
+        response.headers["Content-Disposition"] = (
+            f'attachment; filename="analytics-{app_id}-{start_date}-{end_date}.{fmt}"'
+        )
+        response.headers["X-Query-Time"] = str(query_time)
+        return response
+
+    payload = to_columnar(table)
+    payload.update(
+        {"group_by": group_by, "summary": summary, "query_time": query_time}
+    )
+    return jsonify({"success": True, "data": payload})
+
+
 def get_or_create_event_loop():
     """获取或创建事件循环，优化线程本地存储"""
     if not hasattr(thread_local, "loop") or thread_local.loop.is_closed():
         thread_local.loop = asyncio.new_event_loop()
         asyncio.set_event_loop(thread_local.loop)
+        loop_monitor.register(thread_local.loop)
     return thread_local.loop
 
 
-def run_async_task(coroutine):
-    """在线程池中运行异步任务 - 优化版本"""
+# 外层等待在截止时间后额外等待的秒数，让内层阶段超时先触发并返回明确的错误
+DEADLINE_GRACE = 5
+
+
+class TaskHandle:
+    """可从其他线程取消 run_async_task 中运行的任务"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self.cancelled = False
+
+    def bind(self, loop: asyncio.AbstractEventLoop, task: asyncio.Task) -> None:
+        with self._lock:
+            self._loop, self._task = loop, task
+            if self.cancelled:
+                task.cancel()
+
+    def cancel(self) -> None:
+        """取消任务；任务尚未开始时，开始后立即取消"""
+        with self._lock:
+            self.cancelled = True
+            if self._task is not None and not self._loop.is_closed():
+                self._loop.call_soon_threadsafe(self._task.cancel)
+
+
+def run_async_task(coroutine, timeout: float = 120, handle: Optional[TaskHandle] = None):
+    """在线程池中运行异步任务 - 优化版本
+
+    被 handle 取消时抛出 asyncio.CancelledError。
+    """
     try:
         # 使用线程本地存储的事件循环
         loop = get_or_create_event_loop()
 
         # 设置任务超时和取消机制
         async def wrapped_coroutine():
+            if handle is not None:
+                handle.bind(loop, asyncio.current_task())
             try:
-                # 2分钟超时
-                return await asyncio.wait_for(coroutine, timeout=120)
+                return await asyncio.wait_for(coroutine, timeout=timeout)
             except asyncio.TimeoutError:
                 app.logger.error("异步任务执行超时")
                 raise TimeoutError("任务执行超时")
 
-        return loop.run_until_complete(wrapped_coroutine())
+        # 运行期间持有该线程的循环锁，后台回收空闲浏览器时不会同时驱动该循环
+        with browser_pool.running(loop), profiler.profile_task():
+            return loop.run_until_complete(wrapped_coroutine())
+    except Preempted:
+        raise
     except Exception as e:
         app.logger.error(f"异步任务执行失败: {e}", exc_info=True)
         raise
     finally:
-        # 清理未完成的任务
+        # 清理未完成的任务（保留浏览器池中Playwright驱动的常驻任务）
         try:
-            pending = asyncio.all_tasks(loop)
+            pending = asyncio.all_tasks(loop) - browser_pool.protected_tasks()
             for task in pending:
                 if not task.done():
                     task.cancel()
@@ -761,17 +1325,291 @@ def run_async_task(coroutine):
             app.logger.warning(f"清理异步任务时出错: {cleanup_error}")
 
 
+def cache_scrape_result(cache_key, result: Dict[str, Any]):
+    """计算汇总（只计算一次）并与抓取结果一同写入查询缓存，每日数据同时记入分析存储
+
+    调用方只应缓存 CACHEABLE_OUTCOMES 的结果；空结果使用较短的TTL。
+    """
+    summary = compute_summary(result["rows"], app.config["PROFIT_COEFFICIENTS"])
+    if app.config["ANALYTICS_STORE_ENABLED"]:
+        analytics_store.record(cache_key[0], cache_key[1], result["rows"])
+    ttl = None
+    if result.get("outcome") == OUTCOME_EMPTY:
+        ttl = app.config["QUERY_CACHE_TODAY_TTL"]
+    return query_cache.set(cache_key, dict(result), summary, ttl=ttl)
+
+
+def incremental_start(entry, start_date: str, end_date: str) -> Optional[str]:
+    """计算增量刷新需要重新抓取的起始日期，不适合增量刷新时返回None
+
+    抓取当天往前 INCREMENTAL_REFRESH_DAYS 天之前的数据视为已定稿；
+    返回值晚于结束日期表示整个范围都已定稿，无需重新抓取。
+    """
+    window = app.config["INCREMENTAL_REFRESH_DAYS"]
+    if window <= 0 or entry is None:
+        return None
+    table = entry.result.get("rows")
+    # 含合计等非日期行时无法按日期合并
+    if not isinstance(table, DailyTable) or table.labels:
+        return None
+
+    patch_start = entry.created_day - timedelta(days=window - 1)
+    if patch_start <= date.fromisoformat(start_date):
+        return None
+    return patch_start.isoformat()
+
+
+async def scrape_incremental(
+    cache_key,
+    uk_code,
+    start_date,
+    end_date,
+    headless=True,
+    app_id=None,
+    deadline=None,
+    debug=False,
+) -> Dict[str, Any]:
+    """抓取查询结果；缓存中有旧结果时只重新抓取尾部窗口并合并到旧结果中"""
+    entry = query_cache.peek(cache_key)
+    patch_start = incremental_start(entry, start_date, end_date)
+    if patch_start is None:
+        return await scrape_data(
+            uk_code, start_date, end_date, headless, app_id, deadline, debug
+        )
+
+    if patch_start > end_date:
+        app.logger.info(f"查询范围数据均已定稿，沿用缓存结果: {cache_key}")
+        return dict(entry.result)
+
+    app.logger.info(f"增量刷新: 仅重新抓取 {patch_start} ~ {end_date}: {cache_key}")
+    result = await scrape_data(
+        uk_code, patch_start, end_date, headless, app_id, deadline, debug
+    )
+    if result.get("outcome") not in CACHEABLE_OUTCOMES:
+        return result
+
+    # 刷新窗口内没有数据时保留缓存中的行
+    merged = dict(entry.result)
+    merged["outcome"] = OUTCOME_OK if len(merged["rows"]) else result["outcome"]
+    merged["rows"] = entry.result["rows"].patch(result["rows"])
+    merged["html"] = result.get("html", "")
+    merged["full_html"] = result.get("full_html", "")
+    merged["incremental_from"] = patch_start
+    merged["scraped_outcome"] = result["scraped_outcome"]
+    return merged
+
+
+def refresh_cache_entry(cache_key, uk_code, start_date, end_date, app_id):
+    """后台重新抓取并更新缓存条目，被交互查询抢占时重新排队"""
+    requeued = False
+    try:
+        deadline = new_deadline()
+        result = run_async_task(
+            scrape_incremental(
+                cache_key, uk_code, start_date, end_date, True, app_id, deadline
+            ),
+            timeout=deadline.remaining() + DEADLINE_GRACE,
+        )
+        if isinstance(result, dict):
+            record_scrape(app_id, result)
+        if isinstance(result, dict) and result.get("outcome") in CACHEABLE_OUTCOMES:
+            cache_scrape_result(cache_key, result)
+            app.logger.info(f"后台刷新缓存完成: {cache_key}")
+        else:
+            app.logger.warning(f"后台刷新缓存失败: {cache_key}")
+    except Preempted:
+        app.logger.info(f"后台刷新被交互查询抢占，重新排队: {cache_key}")
+        executor.submit(
+            refresh_cache_entry,
+            cache_key,
+            uk_code,
+            start_date,
+            end_date,
+            app_id,
+            lane=BACKGROUND,
+        )
+        requeued = True
+    except Exception as e:
+        app.logger.warning(f"后台刷新缓存异常: {cache_key}: {e}")
+    finally:
+        if not requeued:
+            query_cache.end_refresh(cache_key)
+
+
+def schedule_refresh(cache_key, uk_code, start_date, end_date, app_id) -> bool:
+    """提交后台刷新任务，同一条目已在刷新中或远程站点已熔断时不提交"""
+    if not circuit_breaker.allow(circuit_key(app_id)):
+        return False
+    if not query_cache.begin_refresh(cache_key):
+        return False
+    executor.submit(
+        refresh_cache_entry,
+        cache_key,
+        uk_code,
+        start_date,
+        end_date,
+        app_id,
+        lane=BACKGROUND,
+    )
+    return True
+
+
+def scrape_for_query(
+    cache_key,
+    uk_code,
+    start_date,
+    end_date,
+    headless,
+    app_id,
+    deadline,
+    debug,
+    request_id,
+    lane=INTERACTIVE,
+    disconnected: Optional[Callable[[], bool]] = None,
+) -> Dict[str, Any]:
+    """为查询提交抓取（按lane对应的优先级通道）并等待结果
+
+    交互查询启用对冲时，抓取超过对冲延迟（最近成功抓取耗时的高分位数）仍未完成、对冲预算充足且有空闲线程时，
+    在另一个工作线程上发起相同的抓取，取先成功的结果并取消另一个；都失败时返回最后完成的结果。
+    抓取结果类型（计数与熔断器）只按返回的那次抓取记录一次，被取消或未被采用的抓取不记录。
+    超时抛出 TimeoutError，disconnected() 为真时抛出 ClientDisconnected，两者都会取消进行中的抓取。
+    """
+
+    def submit():
+        handle = TaskHandle()
+        future = executor.submit(
+            propagate(run_async_task),
+            scrape_incremental(
+                cache_key, uk_code, start_date, end_date, headless, app_id, deadline, debug
+            ),
+            timeout=deadline.remaining() + DEADLINE_GRACE,
+            handle=handle,
+            lane=lane,
+        )
+        return future, handle, time.monotonic()
+
+    def wait_first(futures, until: float):
+        """等待任一抓取完成，期间定期检查客户端是否已断开"""
+        poll = app.config["CLIENT_DISCONNECT_POLL"] if disconnected else None
+        while True:
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                return set(), set(futures)
+            done, not_done = wait(
+                futures,
+                timeout=min(remaining, poll) if poll else remaining,
+                return_when=FIRST_COMPLETED,
+            )
+            if done:
+                return done, not_done
+            if disconnected and disconnected():
+                raise ClientDisconnected()
+
+    wait_until = time.monotonic() + deadline.remaining() + 2 * DEADLINE_GRACE
+    primary = submit()
+    attempts = {primary[0]: primary}
+    pending = {primary[0]}
+    hedge_policy.on_query()
+
+    result = None
+    error: Optional[BaseException] = None
+    reason = "hedge"  # 进行中的抓取被取消的原因
+    try:
+        hedging = app.config["HEDGE_ENABLED"] and headless and lane == INTERACTIVE
+        delay = hedge_policy.delay() if hedging else None
+        if delay is not None and delay < deadline.remaining():
+            done, _ = wait_first(pending, time.monotonic() + delay)
+            # 没有空闲线程时对冲只会继续排队，徒增负载
+            if not done and executor.free_workers() > 0 and hedge_policy.try_hedge():
+                app.logger.info(f"[{request_id}] 抓取超过{delay:.1f}秒未完成，发起对冲请求")
+                hedge = submit()
+                attempts[hedge[0]] = hedge
+                pending.add(hedge[0])
+
+        while pending:
+            done, pending = wait_first(pending, wait_until)
+            if not done:
+                reason = "deadline"
+                raise TimeoutError("查询超时")
+            for future in done:
+                try:
+                    result = future.result()
+                except (Exception, asyncio.CancelledError) as e:
+                    error = e
+                    continue
+                if result.get("outcome") in CACHEABLE_OUTCOMES:
+                    _, _, submitted = attempts[future]
+                    hedge_policy.observe(time.monotonic() - submitted)
+                    if future is not primary[0]:
+                        hedge_policy.record_win()
+                        app.logger.info(f"[{request_id}] 对冲请求先完成")
+                    record_scrape(app_id, result)
+                    return result
+    except ClientDisconnected:
+        reason = "client_disconnect"
+        raise
+    finally:
+        for future in pending:
+            attempts[future][1].cancel()
+            cancelled_scrapes.record(reason)
+
+    if result is None and error is not None:
+        raise error
+    record_scrape(app_id, result)
+    return result
+
+
+def profiled(view):
+    """剖析会话进行中时对请求做剖析（没有会话时直接调用）"""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        with profiler.profile_request():
+            return view(*args, **kwargs)
+
+    return wrapper
+
+
+def traced(view):
+    """按采样率记录请求时间线，响应头 X-Trace-Id 为追踪文件名
+
+    请求体 trace=true 强制记录只对携带有效管理令牌（X-Admin-Token）的请求生效，
+    否则任何客户端都可以绕过采样率、让每个请求都写追踪文件。
+    """
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        data = request.get_json(silent=True)
+        forced = isinstance(data, dict) and bool(data.get("trace")) and admin_token_valid()
+        if not trace_recorder.should_trace(forced):
+            return view(*args, **kwargs)
+        trace = Trace(f"{int(time.time() * 1000)}_{threading.current_thread().ident}")
+        with trace_recorder.activate(trace):
+            with trace_span("request", "flask", path=request.path):
+                response = app.make_response(view(*args, **kwargs))
+        response.headers["X-Trace-Id"] = trace.trace_id
+        return response
+
+    return wrapper
+
+
 @app.route("/api/query", methods=["POST"])
+@profiled
+@traced
 def query():
     """优化的查询接口"""
     start_time = time.time()
     request_id = f"{int(start_time * 1000)}_{threading.current_thread().ident}"
+    received = time.perf_counter()
 
     try:
         data = request.get_json()
         if not data:
             return jsonify({"error": "请求数据不能为空"}), 400
 
+        # 客户端声明了超时时，查询截止时间不超过客户端的等待时间
+        deadline = new_deadline(client_timeout(request.headers, data))
+
         app.logger.info(f"[{request_id}] 收到查询请求: {data}")
 
         # 参数提取和验证
@@ -781,6 +1619,15 @@ def query():
         headless = data.get("headless", True)
         app_id = data.get("app_id", "").strip()
 
+        # 响应格式协商: format参数优先，其次Accept头；原始HTML仅在debug时返回
+        output_format = negotiate_format(
+            data.get("format") or request.args.get("format"),
+            request.accept_mimetypes,
+        )
+        debug = bool(data.get("debug")) or request.args.get("debug") == "true"
+        # 批量调用方可指定 priority=batch，让出线程给交互查询
+        lane = BATCH if data.get("priority") == BATCH else INTERACTIVE
+
         # 输入验证优化
         validation_errors = []
 
@@ -801,16 +1648,11 @@ def query():
 
         # 日期范围验证
         if start_date and end_date and check_date(start_date) and check_date(end_date):
-            start_dt = datetime.strptime(start_date, "%Y-%m-%d")
-            end_dt = datetime.strptime(end_date, "%Y-%m-%d")
-            today = datetime.now().date()
+            validation_errors.extend(date_range_errors(start_date, end_date))
 
-            if start_dt.date() > today or end_dt.date() > today:
-                validation_errors.append("日期不能超过今天")
-            elif start_dt > end_dt:
-                validation_errors.append("开始日期不能晚于结束日期")
-            elif (end_dt - start_dt).days > 365:  # 限制查询范围
-                validation_errors.append("查询时间范围不能超过365天")
+        # app_id 会进入熔断器的键和缓存键，只接受字母、数字、下划线和连字符
+        if app_id and not AnalyticsStore.valid_app_id(app_id):
+            validation_errors.append("app_id 格式错误")
 
         if validation_errors:
             return jsonify({"error": "; ".join(validation_errors)}), 400
@@ -822,22 +1664,92 @@ def query():
         else:
             app.logger.info(f"[{request_id}] 使用自定义app_id: {app_id}")
 
+        trace_record("receive", received, "flask")
+
+        cache_key = QueryCache.make_key(
+            app_id or app.config["DEFAULT_APP_ID"], uk_code, start_date, end_date
+        )
+        with trace_span("cache_lookup"):
+            cached, fresh = query_cache.lookup(
+                cache_key, app.config["QUERY_CACHE_MAX_STALE"]
+            )
+        if cached is not None:
+            if fresh:
+                app.logger.info(f"[{request_id}] 命中查询缓存: {cache_key}")
+            else:
+                # stale-while-revalidate: 立即返回旧数据，后台刷新
+                refreshing = schedule_refresh(
+                    cache_key, uk_code, start_date, end_date, app_id
+                )
+                app.logger.info(
+                    f"[{request_id}] 命中过期缓存(抓取于{cached.as_of})，"
+                    f"{'已触发' if refreshing else '正在进行'}后台刷新: {cache_key}"
+                )
+            result = dict(cached.result)
+            result["summary"] = cached.summary
+            result["cached"] = True
+            result["stale"] = not fresh
+            result["as_of"] = cached.as_of
+            result["execution_time"] = time.time() - start_time
+            result["request_id"] = request_id
+            return make_query_response(result, output_format, debug)
+
+        # 远程站点熔断时立即失败，有缓存的旧数据（不论多旧）时返回旧数据
+        breaker_key = circuit_key(app_id)
+        if not circuit_breaker.allow(breaker_key):
+            fallback = query_cache.peek(cache_key)
+            if fallback is not None:
+                app.logger.warning(
+                    f"[{request_id}] 远程站点已熔断，返回缓存的旧数据"
+                    f"(抓取于{fallback.as_of}): {breaker_key}"
+                )
+                result = dict(fallback.result)
+                result["summary"] = fallback.summary
+                result["cached"] = True
+                result["stale"] = True
+                result["degraded"] = True
+                result["as_of"] = fallback.as_of
+                result["execution_time"] = time.time() - start_time
+                result["request_id"] = request_id
+                return make_query_response(result, output_format, debug)
+
+            app.logger.warning(f"[{request_id}] 远程站点已熔断，快速失败: {breaker_key}")
+            scrape_outcomes.record(OUTCOME_BLOCKED)
+            response = jsonify(
+                {
+                    "error": "数据源暂时不可用，请稍后重试",
+                    "outcome": OUTCOME_BLOCKED,
+                    "request_id": request_id,
+                }
+            )
+            response.status_code = 503
+            response.headers["Retry-After"] = str(
+                circuit_breaker.retry_after(breaker_key)
+            )
+            return response
+
         app.logger.info(
             f"[{request_id}] 开始查询: UK码={uk_code}, "
             f"开始日期={start_date}, 结束日期={end_date}, headless={headless}"
         )
 
-        # 优化的异步任务执行
+        # 优化的异步任务执行：内层各阶段与外层等待共用同一超时预算
+        timeout_seconds = int(deadline.total)
         try:
-            # 创建带超时的任务
-            future = executor.submit(
-                run_async_task,
-                scrape_data(uk_code, start_date, end_date, headless, app_id),
-            )
-
-            # 动态超时设置
-            timeout_seconds = 90  # 增加到90秒
-            result = future.result(timeout=timeout_seconds)
+            with trace_span("scrape_wait", "executor"):
+                result = scrape_for_query(
+                    cache_key,
+                    uk_code,
+                    start_date,
+                    end_date,
+                    headless,
+                    app_id,
+                    deadline,
+                    debug,
+                    request_id,
+                    lane,
+                    disconnected=lambda: client_disconnected(request.environ),
+                )
 
             execution_time = time.time() - start_time
             app.logger.info(f"[{request_id}] 查询执行时间: {execution_time:.2f}秒")
@@ -847,9 +1759,20 @@ def query():
                 app.logger.error(f"[{request_id}] 查询结果类型错误: {type(result)}")
                 return jsonify({"error": "查询结果格式不正确"}), 500
 
-            if "error" in result:
-                app.logger.warning(f"[{request_id}] 查询返回错误: {result['error']}")
-                return jsonify({"error": result["error"]}), 500
+            outcome = result.get("outcome", OUTCOME_ERROR)
+            if "error" in result or outcome not in CACHEABLE_OUTCOMES:
+                app.logger.warning(
+                    f"[{request_id}] 查询返回错误({outcome}): {result.get('error')}"
+                )
+                body = {
+                    "error": result.get("error", "查询失败"),
+                    "outcome": outcome,
+                    "request_id": request_id,
+                }
+                if debug:
+                    body["html"] = result.get("html", "")
+                    body["full_html"] = result.get("full_html", "")
+                return jsonify(body), OUTCOME_STATUS.get(outcome, 500)
 
             # 确保结果包含必要的字段
             required_fields = ["headers", "rows"]
@@ -870,32 +1793,34 @@ def query():
                     500,
                 )
 
-            # 数据完整性检查
-            headers = result.get("headers", [])
-            rows = result.get("rows", [])
-
-            if not headers and not rows:
+            rows = result["rows"]
+            if outcome == OUTCOME_EMPTY:
                 app.logger.info(f"[{request_id}] 查询结果为空")
-                return jsonify(
-                    {
-                        "headers": [],
-                        "rows": [],
-                        "html": result.get("html", ""),
-                        "message": "查询结果为空，请检查查询条件",
-                        "execution_time": execution_time,
-                    }
-                )
+                result["message"] = "查询结果为空，请检查查询条件"
+            else:
+                app.logger.info(f"[{request_id}] 查询成功: 找到{len(rows)}行数据")
 
-            app.logger.info(f"[{request_id}] 查询成功: 找到{len(rows)}行数据")
+            # 汇总只计算一次，与结果一同缓存
+            entry = cache_scrape_result(cache_key, result)
+            result["summary"] = entry.summary
+            result["as_of"] = entry.as_of
 
             # 添加执行时间到响应
             result["execution_time"] = execution_time
             result["request_id"] = request_id
 
-            return jsonify(result)
+            return make_query_response(result, output_format, debug)
 
+        except ClientDisconnected:
+            # 客户端已放弃（超时、取消或关闭页面），抓取已取消，响应不会被读取
+            app.logger.info(f"[{request_id}] 客户端已断开，取消抓取")
+            return (
+                jsonify({"error": "客户端已断开", "request_id": request_id}),
+                499,
+            )
         except TimeoutError:
             app.logger.error(f"[{request_id}] 查询超时({timeout_seconds}秒)")
+            scrape_outcomes.record(OUTCOME_TIMEOUT)
             return (
                 jsonify(
                     {
@@ -903,6 +1828,7 @@ def query():
                             f"查询超时({timeout_seconds}秒)，"
                             "请稍后重试或缩小查询范围"
                         ),
+                        "outcome": OUTCOME_TIMEOUT,
                         "request_id": request_id,
                     }
                 ),
@@ -929,6 +1855,133 @@ def query():
         )
 
 
+def export_items(
+    uk_codes, start_date, end_date, app_id, scrape, request_id, disconnected
+) -> Iterator[ExportItem]:
+    """依次取得各UK码的数据行，供流式导出逐个写出
+
+    优先使用查询缓存（过期不超过 QUERY_CACHE_MAX_STALE 的旧数据同时触发后台刷新）；
+    scrape 为真时在 batch 通道逐个抓取缺失的UK码并写入缓存，失败的UK码输出说明后继续。
+    客户端断开时取消进行中的抓取并结束导出。
+    """
+    default_app_id = app_id or app.config["DEFAULT_APP_ID"]
+    for uk_code in uk_codes:
+        cache_key = QueryCache.make_key(default_app_id, uk_code, start_date, end_date)
+        cached, fresh = query_cache.lookup(cache_key, app.config["QUERY_CACHE_MAX_STALE"])
+        if cached is not None:
+            if not fresh:
+                schedule_refresh(cache_key, uk_code, start_date, end_date, app_id)
+            note = "" if fresh else f"缓存数据(抓取于{cached.as_of})"
+            yield uk_code, cached.result["rows"], note
+            continue
+        if not scrape:
+            yield uk_code, None, "未缓存"
+            continue
+
+        if not circuit_breaker.allow(circuit_key(app_id)):
+            fallback = query_cache.peek(cache_key)
+            if fallback is not None:
+                note = f"数据源暂时不可用，缓存数据(抓取于{fallback.as_of})"
+                yield uk_code, fallback.result["rows"], note
+            else:
+                scrape_outcomes.record(OUTCOME_BLOCKED)
+                yield uk_code, None, "数据源暂时不可用"
+            continue
+
+        try:
+            result = scrape_for_query(
+                cache_key,
+                uk_code,
+                start_date,
+                end_date,
+                True,
+                app_id,
+                new_deadline(),
+                False,
+                request_id,
+                BATCH,
+                disconnected=disconnected,
+            )
+        except ClientDisconnected:
+            app.logger.info(f"[{request_id}] 客户端已断开，结束导出")
+            return
+        except TimeoutError:
+            scrape_outcomes.record(OUTCOME_TIMEOUT)
+            yield uk_code, None, "查询超时"
+            continue
+        except Exception as e:
+            app.logger.error(f"[{request_id}] 导出时查询 {uk_code} 出错: {e}", exc_info=True)
+            yield uk_code, None, f"查询过程中发生错误: {e}"
+            continue
+
+        if "error" in result or result.get("outcome") not in CACHEABLE_OUTCOMES:
+            yield uk_code, None, result.get("error", "查询失败")
+            continue
+        cache_scrape_result(cache_key, result)
+        yield uk_code, result["rows"], ""
+
+
+@app.route("/api/export", methods=["GET", "POST"])
+def export():
+    """流式导出多个UK码的查询结果（CSV / XLSX），分块传输，内存占用与行数无关"""
+    request_id = f"{int(time.time() * 1000)}_{threading.current_thread().ident}"
+    if request.method == "POST":
+        data = request.get_json(silent=True) or {}
+        uk_codes = split_uk_codes(data.get("uk_codes") or data.get("uk_code"))
+    else:
+        data = request.args
+        uk_codes = split_uk_codes(data.getlist("uk_codes") or data.get("uk_code"))
+    start_date = str(data.get("start_date", "")).strip()
+    end_date = str(data.get("end_date", "")).strip()
+    app_id = str(data.get("app_id", "")).strip() or None
+    fmt = str(data.get("format") or FORMAT_CSV).strip().lower()
+    scrape = str(data.get("scrape", "true")).lower() not in ("false", "0")
+
+    if not uk_codes:
+        return jsonify({"error": "请输入UK码"}), 400
+    if len(uk_codes) > app.config["EXPORT_MAX_UK_CODES"]:
+        return (
+            jsonify({"error": f"单次最多导出{app.config['EXPORT_MAX_UK_CODES']}个UK码"}),
+            400,
+        )
+    if any(len(code) > 50 for code in uk_codes):
+        return jsonify({"error": "UK码长度不能超过50个字符"}), 400
+    if app_id and not AnalyticsStore.valid_app_id(app_id):
+        return jsonify({"error": "app_id 格式错误"}), 400
+    if not check_date(start_date) or not check_date(end_date):
+        return jsonify({"error": "日期格式错误，请使用YYYY-MM-DD格式"}), 400
+    errors = date_range_errors(start_date, end_date)
+    if errors:
+        return jsonify({"error": "; ".join(errors)}), 400
+    if fmt not in FORMATS:
+        return jsonify({"error": f"format 必须为 {'/'.join(FORMATS)}"}), 400
+    if not export_available(fmt):
+        return jsonify({"error": "导出XLSX需要安装 xlsxwriter"}), 501
+
+    app.logger.info(
+        f"[{request_id}] 导出{fmt}: {len(uk_codes)}个UK码, "
+        f"{start_date} ~ {end_date}, scrape={scrape}"
+    )
+    environ = request.environ
+    items = export_items(
+        uk_codes,
+        start_date,
+        end_date,
+        app_id,
+        scrape,
+        request_id,
+        lambda: client_disconnected(environ),
+    )
+    chunks = csv_chunks(items) if fmt == FORMAT_CSV else xlsx_chunks(items)
+    response = Response(stream_with_context(chunks), mimetype=MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = (
+        f'attachment; filename="export-{start_date}-{end_date}.{fmt}"'
+    )
+    # 反向代理（如Nginx）不缓冲，逐块转发给客户端
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
 if __name__ == "__main__":
     try:
         app.run(debug=True, host="127.0.0.1", port=5001, threaded=True)
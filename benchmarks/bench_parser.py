@@ -0,0 +1,72 @@
+"""html_table_to_data 解析器基准与回归测试（pytest-benchmark）
+
+对 fixtures/parser/ 中的每个样本同时校验输出与期望一致、计时整体解析，
+并分别计时四种解析方式。样本由 parser_corpus.py 生成。
+不计时的回归测试（含页面内脚本 EXTRACT_TABLE_JS 与同一期望的比较）见 tests/test_parser_corpus.py。
+
+用法:
+    pytest benchmarks/bench_parser.py --benchmark-autosave
+    # 修改解析器后，与上次保存的结果比较，平均耗时退化超过10%则失败
+    pytest benchmarks/bench_parser.py --benchmark-compare --benchmark-compare-fail=mean:10%
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from bs4 import BeautifulSoup  # noqa: E402
+
+from table_parser import PARSE_STRATEGIES, html_table_to_data, parse_with_strategy  # noqa: E402
+
+pytest.importorskip("pytest_benchmark")
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "parser"
+FIXTURES = sorted(FIXTURE_DIR.glob("*.html"))
+STRATEGIES = dict(PARSE_STRATEGIES)
+
+
+def load_fixture(path: Path):
+    expected = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+    return path.read_text(encoding="utf-8"), expected
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.stem)
+def test_parse_fixture(benchmark, path):
+    """完整解析：输出必须与记录的期望一致"""
+    benchmark.group = "html_table_to_data"
+    html, expected = load_fixture(path)
+
+    headers, rows = benchmark(html_table_to_data, html)
+
+    assert headers == expected["headers"]
+    assert rows == expected["rows"]
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.stem)
+def test_fixture_strategy(path):
+    """每个样本命中的解析方式不应发生变化"""
+    html, expected = load_fixture(path)
+    strategy, _, _ = parse_with_strategy(html)
+    assert strategy == expected["strategy"]
+
+
+@pytest.mark.parametrize(
+    "path",
+    [p for p in FIXTURES if load_fixture(p)[1]["strategy"]],
+    ids=lambda p: p.stem,
+)
+def test_strategy_only(benchmark, path):
+    """单独计时命中的解析方式（不含前面失败的方式，但包含HTML解析）"""
+    html, expected = load_fixture(path)
+    strategy = STRATEGIES[expected["strategy"]]
+    benchmark.group = f"strategy:{expected['strategy']}"
+
+    result = benchmark(lambda: strategy(BeautifulSoup(html, "html.parser")))
+
+    assert result is not None
+    assert list(result) == [expected["headers"], expected["rows"]]
+
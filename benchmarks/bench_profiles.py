@@ -0,0 +1,119 @@
+"""Chromium启动配置档对比基准测试
+
+对 config.BROWSER_PROFILES 中的每个配置档，以替身站点为后端启动被测应用(BROWSER_PROFILE=<名称>)，
+按相同的并发与请求数压测 /api/query，对比 p50/p95/p99 延迟、吞吐量与进程树RSS峰值。
+
+用法:
+    python benchmarks/bench_profiles.py --concurrency 1 4 --requests 20 --output bench_profiles.json
+    python benchmarks/bench_profiles.py --profiles balanced low-memory --env MEMORY_SOFT_LIMIT_MB=0
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.bench_query import (  # noqa: E402
+    RssSampler,
+    fetch_metrics,
+    run_level,
+    start_app,
+    wait_for_app,
+)
+from benchmarks.stub_site import (  # noqa: E402
+    add_stub_arguments,
+    settings_from_args,
+    start_stub_server,
+)
+from config import Config  # noqa: E402
+
+
+def run_profile(profile: str, base_url: str, args) -> Dict:
+    """以指定配置档启动应用并压测"""
+    extra_env = dict(item.split("=", 1) for item in args.env)
+    extra_env["BROWSER_PROFILE"] = profile
+    proc = start_app(base_url, args.app_port, args.app_threads, extra_env)
+    app_url = f"http://127.0.0.1:{args.app_port}"
+    levels: List[Dict] = []
+    app_metrics: Dict = {}
+    sampler = RssSampler(proc.pid)
+    try:
+        wait_for_app(app_url, proc)
+        sampler.start()
+        for concurrency in args.concurrency:
+            levels.append(
+                run_level(app_url, concurrency, args.requests, args.days, args.timeout)
+            )
+        app_metrics = fetch_metrics(app_url)
+    finally:
+        rss_peak = sampler.stop() if sampler.is_alive() else sampler.peak
+        proc.terminate()
+        try:
+            proc.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+    return {"levels": levels, "rss_peak": rss_peak, "app_metrics": app_metrics}
+
+
+def print_table(results: Dict[str, Dict]):
+    print(
+        f"\n{'配置档':<12} {'并发':>4} {'成功':>6} {'p50':>8} {'p95':>8} {'p99':>8} "
+        f"{'吞吐':>8} {'RSS峰值MB':>10} {'Chromium MB':>12}"
+    )
+    for profile, result in results.items():
+        rss = result["rss_peak"]
+        for level in result["levels"]:
+            print(
+                f"{profile:<12} {level['concurrency']:>4} "
+                f"{level['ok']:>3}/{level['requests']:<2} "
+                f"{level['p50']:>8.2f} {level['p95']:>8.2f} {level['p99']:>8.2f} "
+                f"{level['throughput_rps']:>8.2f} {rss['total'] / 2**20:>10.1f} "
+                f"{rss['chromium'] / 2**20:>12.1f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chromium启动配置档对比基准测试")
+    parser.add_argument(
+        "--profiles", nargs="+", default=list(Config.BROWSER_PROFILES), help="要对比的配置档"
+    )
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--requests", type=int, default=20, help="每个并发级别的请求数")
+    parser.add_argument("--days", type=int, default=31, help="查询日期范围天数")
+    parser.add_argument("--timeout", type=float, default=150.0, help="单次请求客户端超时")
+    parser.add_argument("--app-port", type=int, default=5055)
+    parser.add_argument("--app-threads", type=int, default=16)
+    parser.add_argument("--env", action="append", default=[], help="传递给应用的环境变量 KEY=VALUE")
+    parser.add_argument("--output", default="bench_profiles.json")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    stub = start_stub_server(settings_from_args(args))
+    print(f"替身站点: {stub.base_url}")
+
+    results = {}
+    try:
+        for profile in args.profiles:
+            print(f"配置档 {profile} ...")
+            results[profile] = run_profile(profile, stub.base_url, args)
+    finally:
+        stub.shutdown()
+
+    print_table(results)
+    output = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {key: value for key, value in vars(args).items() if key != "output"},
+        "profiles": results,
+    }
+    Path(args.output).write_text(json.dumps(output, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"结果已写入 {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""/api/query 离线吞吐与延迟基准测试
+
+启动本地替身站点(stub_site)和被测应用(waitress子进程，BASE_URL指向替身站点)，
+按给定并发级别压测 /api/query，统计 p50/p95/p99 延迟、吞吐量以及
+Python进程、Playwright驱动和Chromium进程的RSS峰值，结果写入JSON文件便于多次运行对比。
+
+用法:
+    python benchmarks/bench_query.py --concurrency 1 2 4 --requests 20 --output bench.json
+    python benchmarks/bench_query.py --compare bench_before.json --output bench_after.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.stub_site import (  # noqa: E402
+    add_stub_arguments,
+    settings_from_args,
+    start_stub_server,
+)
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def _read_proc_tree() -> Dict[int, List[int]]:
+    """读取 /proc 构建 ppid -> [pid] 映射（仅Linux）"""
+    children: Dict[int, List[int]] = {}
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+    return children
+
+
+def _rss(pid: int) -> int:
+    try:
+        return int(Path(f"/proc/{pid}/statm").read_text().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def _cmdline(pid: int) -> str:
+    try:
+        return Path(f"/proc/{pid}/cmdline").read_bytes().replace(b"\0", b" ").decode(errors="ignore")
+    except OSError:
+        return ""
+
+
+def process_tree_rss(root_pid: int) -> Dict[str, int]:
+    """统计应用进程树的RSS，按 python / driver / chromium 分类"""
+    result = {"python": _rss(root_pid), "driver": 0, "chromium": 0}
+    if not Path("/proc").exists():
+        return result
+
+    children = _read_proc_tree()
+    stack = list(children.get(root_pid, []))
+    while stack:
+        pid = stack.pop()
+        stack.extend(children.get(pid, []))
+        cmdline = _cmdline(pid)
+        if "chrom" in cmdline or "headless_shell" in cmdline:
+            result["chromium"] += _rss(pid)
+        elif "playwright" in cmdline or "node" in cmdline:
+            result["driver"] += _rss(pid)
+    return result
+
+
+class RssSampler(threading.Thread):
+    """后台定期采样进程树RSS，记录峰值"""
+
+    def __init__(self, pid: int, interval: float = 0.5):
+        super().__init__(name="rss_sampler", daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peak = {"python": 0, "driver": 0, "chromium": 0, "total": 0}
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            sample = process_tree_rss(self.pid)
+            sample["total"] = sum(sample.values())
+            for key, value in sample.items():
+                self.peak[key] = max(self.peak[key], value)
+
+    def stop(self) -> Dict[str, int]:
+        self._stop_event.set()
+        self.join()
+        return self.peak
+
+
+def post_query(app_url: str, payload: dict, timeout: float) -> Dict:
+    """发送一次查询，返回 {ok, status, latency}"""
+    body = json.dumps(payload).encode("utf-8")
+    req = urllib.request.Request(
+        f"{app_url}/api/query",
+        data=body,
+        headers={"Content-Type": "application/json"},
+        method="POST",
+    )
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            resp.read()
+            status = resp.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return {"ok": status == 200, "status": status, "latency": time.perf_counter() - started}
+
+
+def run_level(app_url: str, concurrency: int, requests: int, days: int, timeout: float) -> Dict:
+    """以固定并发执行一组查询（每次使用不同UK码，避免命中查询缓存）"""
+    end = date.today() - timedelta(days=1)
+    start = end - timedelta(days=days - 1)
+    payloads = [
+        {
+            "uk_code": f"bench{uuid.uuid4().hex[:12]}",
+            "start_date": start.isoformat(),
+            "end_date": end.isoformat(),
+        }
+        for _ in range(requests)
+    ]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda p: post_query(app_url, p, timeout), payloads))
+    wall = time.perf_counter() - started
+
+    latencies = [r["latency"] for r in results if r["ok"]]
+    statuses: Dict[str, int] = {}
+    for r in results:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+
+    return {
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": requests - len(latencies),
+        "statuses": statuses,
+        "throughput_rps": round(len(latencies) / wall, 3) if wall else 0.0,
+        "p50": round(percentile(latencies, 50), 3),
+        "p95": round(percentile(latencies, 95), 3),
+        "p99": round(percentile(latencies, 99), 3),
+        "wall_seconds": round(wall, 3),
+    }
+
+
+def fetch_metrics(app_url: str) -> Dict:
+    """读取被测应用的 /api/metrics（内存、浏览器池、抓取结果类型等），失败时返回空字典"""
+    try:
+        with urllib.request.urlopen(f"{app_url}/api/metrics", timeout=5) as resp:
+            return json.loads(resp.read())
+    except Exception:
+        return {}
+
+
+def wait_for_app(app_url: str, proc: subprocess.Popen, timeout: float = 60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"应用进程已退出，退出码 {proc.returncode}")
+        try:
+            with urllib.request.urlopen(f"{app_url}/api/health", timeout=2):
+                return
+        except Exception:
+            time.sleep(0.5)
+    raise RuntimeError("等待应用启动超时")
+
+
+def start_app(base_url: str, port: int, threads: int, extra_env: Dict[str, str]) -> subprocess.Popen:
+    """以waitress启动被测应用，BASE_URL指向替身站点"""
+    env = os.environ.copy()
+    env.update(extra_env)
+    env["BASE_URL"] = base_url
+    env.setdefault("FLASK_CONFIG", "production")
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "waitress",
+            f"--port={port}",
+            f"--threads={threads}",
+            "app:app",
+        ],
+        cwd=str(ROOT),
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def compare(previous: Dict, current: Dict):
+    """打印与上一次结果的对比"""
+    before = {level["concurrency"]: level for level in previous.get("levels", [])}
+    print("\n与上次结果对比:")
+    for level in current["levels"]:
+        old = before.get(level["concurrency"])
+        if not old:
+            continue
+        for key in ("p50", "p95", "p99", "throughput_rps"):
+            delta = level[key] - old[key]
+            pct = (delta / old[key] * 100) if old[key] else 0.0
+            print(
+                f"  并发{level['concurrency']:>3} {key:<15} "
+                f"{old[key]:>9.3f} -> {level[key]:>9.3f} ({pct:+.1f}%)"
+            )
+    for key, value in current["rss_peak"].items():
+        old = previous.get("rss_peak", {}).get(key, 0)
+        print(f"  RSS峰值 {key:<9} {old / 2**20:>8.1f}MB -> {value / 2**20:>8.1f}MB")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="/api/query 离线基准测试")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=20, help="每个并发级别的请求数")
+    parser.add_argument("--days", type=int, default=31, help="查询日期范围天数")
+    parser.add_argument("--timeout", type=float, default=150.0, help="单次请求客户端超时")
+    parser.add_argument("--app-url", default=None, help="使用已运行的应用，不启动子进程")
+    parser.add_argument("--app-port", type=int, default=5055)
+    parser.add_argument("--app-threads", type=int, default=16)
+    parser.add_argument("--env", action="append", default=[], help="传递给应用的环境变量 KEY=VALUE")
+    parser.add_argument("--output", default="bench_query.json")
+    parser.add_argument("--compare", default=None, help="上一次结果的JSON文件")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    stub = start_stub_server(settings_from_args(args))
+    print(f"替身站点: {stub.base_url}")
+
+    proc = None
+    app_url = args.app_url
+    if app_url is None:
+        extra_env = dict(item.split("=", 1) for item in args.env)
+        proc = start_app(stub.base_url, args.app_port, args.app_threads, extra_env)
+        app_url = f"http://127.0.0.1:{args.app_port}"
+        wait_for_app(app_url, proc)
+    sampler = RssSampler(proc.pid if proc else os.getpid())
+    sampler.start()
+
+    levels = []
+    app_metrics = {}
+    try:
+        for concurrency in args.concurrency:
+            level = run_level(app_url, concurrency, args.requests, args.days, args.timeout)
+            levels.append(level)
+            print(
+                f"并发{concurrency:>3}: 成功 {level['ok']}/{level['requests']} "
+                f"p50={level['p50']:.2f}s p95={level['p95']:.2f}s p99={level['p99']:.2f}s "
+                f"吞吐={level['throughput_rps']:.2f} req/s"
+            )
+        app_metrics = fetch_metrics(app_url)
+    finally:
+        rss_peak = sampler.stop()
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=30)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        stub.shutdown()
+
+    result = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "settings": {
+            key: value
+            for key, value in vars(args).items()
+            if key not in ("output", "compare")
+        },
+        "stub_requests": stub.stats(),
+        "levels": levels,
+        "rss_peak": rss_peak,
+        "app_metrics": app_metrics,
+    }
+    Path(args.output).write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+    memory = app_metrics.get("memory")
+    if memory:
+        print(
+            f"应用内存: 峰值 {memory['peak_mb']}MB，排队 {memory['queued']} 次，"
+            f"拒绝 {memory['rejected']} 次；浏览器池: {app_metrics.get('browser_pool')}"
+        )
+    print(f"结果已写入 {args.output}")
+
+    if args.compare:
+        compare(json.loads(Path(args.compare).read_text(encoding="utf-8")), result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""响应格式基准测试
+
+对比行式JSON、列式JSON与msgpack在不同数据量下的负载大小和序列化耗时，
+以及gzip/brotli压缩后的大小。
+
+用法:
+    python benchmarks/bench_response_format.py --rows 31 365 3650
+"""
+
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models import DailyTable  # noqa: E402
+from response_format import (  # noqa: E402
+    FORMAT_COLUMNAR,
+    FORMAT_MSGPACK,
+    FORMAT_ROWS,
+    brotli,
+    compress_body,
+    encode_payload,
+    msgpack,
+    shape_payload,
+)
+
+HEADERS = ["日期", "移动拉新数", "移动转存数", "会员订单数", "会员订单金额", "会员佣金（元）"]
+
+
+def make_result(row_count: int) -> dict:
+    """生成与scrape_data返回结构一致的模拟结果（rows为DailyTable）"""
+    start = date(2024, 1, 1)
+    rows = []
+    for i in range(row_count):
+        rows.append(
+            [
+                (start + timedelta(days=i)).isoformat(),
+                str(random.randint(0, 500)),
+                str(random.randint(0, 5000)),
+                str(random.randint(0, 50)),
+                f"{random.uniform(0, 5000):.2f}",
+                f"{random.uniform(0, 500):.2f}",
+            ]
+        )
+    return {
+        "headers": HEADERS,
+        "rows": DailyTable.from_rows(rows),
+        "html": "<div class=\"tab_warp\">" + "x" * (row_count * 180) + "</div>",
+        "full_html": "",
+        "execution_time": 12.3,
+        "request_id": "bench",
+    }
+
+
+def measure(result: dict, fmt: str, debug: bool, repeat: int):
+    """返回 (原始大小, 平均序列化耗时ms, 序列化后的字节)"""
+    body = b""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        body, _ = encode_payload(shape_payload(result, fmt, debug), fmt)
+    elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+    return len(body), elapsed_ms, body
+
+
+def main():
+    parser = argparse.ArgumentParser(description="响应格式基准测试")
+    parser.add_argument("--rows", type=int, nargs="+", default=[31, 365, 3650])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--level", type=int, default=6, help="压缩级别")
+    args = parser.parse_args()
+
+    variants = [("rows+html", FORMAT_ROWS, True), ("rows", FORMAT_ROWS, False)]
+    variants.append(("columnar", FORMAT_COLUMNAR, False))
+    if msgpack is not None:
+        variants.append(("msgpack", FORMAT_MSGPACK, False))
+
+    print(
+        f"{'行数':>6} {'格式':<10} {'原始字节':>10} {'序列化ms':>10} "
+        f"{'gzip字节':>10} {'br字节':>10}"
+    )
+    for row_count in args.rows:
+        result = make_result(row_count)
+        for name, fmt, debug in variants:
+            size, elapsed_ms, body = measure(result, fmt, debug, args.repeat)
+            gz_size = len(compress_body(body, "gzip", args.level))
+            br_size = (
+                len(compress_body(body, "br", args.level)) if brotli is not None else "-"
+            )
+            print(
+                f"{row_count:>6} {name:<10} {size:>10} {elapsed_ms:>10.3f} "
+                f"{gz_size:>10} {br_size:>10}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""行数据模型基准测试
+
+对比字符串二维数组与 DailyTable 列数组在缓存大量每日数据时的内存占用，
+以及汇总与序列化耗时。
+
+用法:
+    python benchmarks/bench_row_model.py --rows 100000
+"""
+
+import argparse
+import gc
+import random
+import sys
+import time
+import tracemalloc
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from aggregation import compute_summary  # noqa: E402
+from models import DailyTable  # noqa: E402
+from response_format import parse_number  # noqa: E402
+
+COEFFICIENTS = {"new_user": 3.0, "deposit": 0.1}
+
+
+def make_rows(row_count: int):
+    start = date(2000, 1, 1)
+    return [
+        [
+            (start + timedelta(days=i)).isoformat(),
+            str(random.randint(0, 500)),
+            str(random.randint(0, 5000)),
+            str(random.randint(0, 50)),
+            f"{random.uniform(0, 5000):.2f}",
+            f"{random.uniform(0, 500):.2f}",
+        ]
+        for i in range(row_count)
+    ]
+
+
+def measure_memory(factory):
+    """返回 (对象, 分配字节数)"""
+    gc.collect()
+    tracemalloc.start()
+    obj = factory()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return obj, size
+
+
+def timed(func, repeat=5):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def list_totals(rows):
+    """旧方式：每次汇总都重新解析字符串"""
+    totals = [0] * 5
+    for row in rows:
+        for i in range(5):
+            value = parse_number(row[i + 1])
+            if value is not None:
+                totals[i] += value
+    return totals
+
+
+def main():
+    parser = argparse.ArgumentParser(description="行数据模型基准测试")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    # 字符串行的内存包含每个单元格字符串本身（与解析HTML得到的结果一致）
+    rows, list_bytes = measure_memory(lambda: make_rows(args.rows))
+    table, table_bytes = measure_memory(lambda: DailyTable.from_rows(rows))
+
+    print(f"行数: {args.rows}")
+    print(f"字符串二维数组: {list_bytes / args.rows:8.1f} 字节/行")
+    print(f"DailyTable列数组: {table_bytes / args.rows:8.1f} 字节/行")
+    print(f"解析耗时: {timed(lambda: DailyTable.from_rows(rows), 1):.1f} ms")
+    print(f"汇总(字符串逐行解析): {timed(lambda: list_totals(rows)):.1f} ms")
+    print(f"汇总(DailyTable): {timed(lambda: compute_summary(table, COEFFICIENTS)):.1f} ms")
+    print(f"序列化为行: {timed(table.to_rows):.1f} ms")
+    print(f"序列化为列: {timed(table.to_columns):.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""html_table_to_data 回归语料生成器
+
+生成 benchmarks/fixtures/parser/ 下的HTML样本及对应的期望输出(JSON)：
+    - 目标页面 div.tab_warp 结构（1/31/365行，带Vue的 data-v-* 属性与换行缩进）
+    - 其余三种解析方式各自命中的样本
+    - 常见的畸形变体（缺表头、空单元格、多余列、未闭合标签、截断、空表格）
+
+期望输出记录当前解析器的结果，用于在修改解析器时校验输出是否一致。
+只有在确认解析行为的变化符合预期时才使用 --update 重新生成期望输出。
+
+用法:
+    python benchmarks/parser_corpus.py           # 仅生成缺失的文件
+    python benchmarks/parser_corpus.py --update  # 重新生成全部HTML与期望输出
+"""
+
+import argparse
+import json
+import random
+import sys
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from table_parser import parse_with_strategy  # noqa: E402
+
+FIXTURE_DIR = Path(__file__).resolve().parent / "fixtures" / "parser"
+
+HEADERS = ["日期", "移动拉新数", "移动转存数", "会员订单数", "会员订单金额", "会员佣金（元）"]
+SCOPE = 'data-v-5f2b8c1e=""'
+
+
+def make_rows(count: int, seed: int = 0) -> List[List[str]]:
+    rng = random.Random(seed)
+    start = date(2024, 1, 1)
+    return [
+        [
+            (start + timedelta(days=i)).isoformat(),
+            str(rng.randint(0, 300)),
+            str(rng.randint(0, 3000)),
+            str(rng.randint(0, 30)),
+            f"{rng.uniform(0, 3000):.2f}",
+            f"{rng.uniform(0, 300):.2f}",
+        ]
+        for i in range(count)
+    ]
+
+
+def vue_tab_warp(rows: List[List[str]], headers: List[str] = HEADERS, with_header: bool = True) -> str:
+    """按Vue渲染后的形式输出 div.tab_warp（带作用域属性与缩进）"""
+    lines = [f'<div {SCOPE} class="tab_warp">', f'  <div {SCOPE} class="table">']
+    if with_header:
+        lines.append(f'    <div {SCOPE} class="table_header">')
+        lines.extend(f"      <div {SCOPE}>{h}</div>" for h in headers)
+        lines.append("    </div>")
+    lines.append(f'    <div {SCOPE} class="table_body">')
+    for row in rows:
+        lines.append(f'      <div {SCOPE} class="table_body_item">')
+        lines.extend(f"        <div {SCOPE}>{cell}</div>" for cell in row)
+        lines.append("      </div>")
+    lines.extend(["    </div>", "  </div>", "</div>"])
+    return "\n".join(lines) + "\n"
+
+
+def table_tag(rows: List[List[str]], thead: bool = True, tbody: bool = False) -> str:
+    """thead 为假时表头是第一行 tr；tbody 为真时表头行与数据行一起放在显式的 tbody 中"""
+    head = "".join(f"<th>{h}</th>" for h in HEADERS)
+    body = "".join("<tr>" + "".join(f"<td>{c}</td>" for c in row) + "</tr>" for row in rows)
+    if thead:
+        return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>\n"
+    if tbody:
+        return f"<table><tbody><tr>{head}</tr>{body}</tbody></table>\n"
+    return f"<table><tr>{head}</tr>{body}</table>\n"
+
+
+def heuristic_divs(rows: List[List[str]]) -> str:
+    head = "<div>" + "".join(f"<div>{h}</div>" for h in HEADERS) + "</div>"
+    body = "".join("<div>" + "".join(f"<div>{c}</div>" for c in row) + "</div>" for row in rows)
+    return f'<div class="tab_warp"><div class="data-list">{head}{body}</div></div>\n'
+
+
+def text_lines(rows: List[List[str]]) -> str:
+    lines = [" ".join(HEADERS)] + [" ".join(row) for row in rows]
+    return '<div class="tab_warp">\n' + "\n".join(f"<span>{line}</span>" for line in lines) + "\n</div>\n"
+
+
+def build_corpus() -> Dict[str, str]:
+    """返回 {样本名: HTML}"""
+    rows31 = make_rows(31, seed=31)
+
+    empty_cells = [list(row) for row in rows31[:10]]
+    for row in empty_cells[::3]:
+        row[3] = ""
+
+    extra_cells = [row + ["备注"] for row in rows31[:10]]
+    with_total = rows31[:10] + [["合计", "1,234", "5,678", "90", "12,345.60", "1,234.56"]]
+
+    unclosed = vue_tab_warp(rows31[:5]).replace("</div>\n        <div", "\n        <div", 7)
+    truncated = vue_tab_warp(rows31)
+    truncated = truncated[: len(truncated) // 2]
+
+    return {
+        "tab_warp_1": vue_tab_warp(make_rows(1, seed=1)),
+        "tab_warp_31": vue_tab_warp(rows31),
+        "tab_warp_365": vue_tab_warp(make_rows(365, seed=365)),
+        "table_tag_31": table_tag(rows31),
+        "table_tag_no_thead": table_tag(rows31[:10], thead=False),
+        "table_tag_tbody_no_thead": table_tag(rows31[:10], thead=False, tbody=True),
+        "heuristic_divs_31": heuristic_divs(rows31),
+        "text_lines_10": text_lines(rows31[:10]),
+        "malformed_no_header": vue_tab_warp(rows31[:10], with_header=False),
+        "malformed_empty_cells": vue_tab_warp(empty_cells),
+        "malformed_extra_cells": vue_tab_warp(extra_cells),
+        "malformed_total_row": vue_tab_warp(with_total),
+        "malformed_unclosed": unclosed,
+        "malformed_truncated": truncated,
+        "malformed_empty_table": f'<div {SCOPE} class="tab_warp"><div {SCOPE} class="table"></div></div>\n',
+        "malformed_blank": "   \n",
+    }
+
+
+def write_corpus(update: bool = False):
+    FIXTURE_DIR.mkdir(parents=True, exist_ok=True)
+    for name, html in build_corpus().items():
+        html_path = FIXTURE_DIR / f"{name}.html"
+        json_path = FIXTURE_DIR / f"{name}.json"
+        if update or not html_path.exists():
+            html_path.write_text(html, encoding="utf-8")
+        if update or not json_path.exists():
+            strategy, headers, rows = parse_with_strategy(html_path.read_text(encoding="utf-8"))
+            json_path.write_text(
+                json.dumps(
+                    {"strategy": strategy, "headers": headers, "rows": rows},
+                    ensure_ascii=False,
+                    indent=1,
+                )
+                + "\n",
+                encoding="utf-8",
+            )
+            print(f"{name}: {strategy}, {len(rows)} 行")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成解析器回归语料")
+    parser.add_argument("--update", action="store_true", help="重新生成全部HTML与期望输出")
+    args = parser.parse_args()
+    write_corpus(update=args.update)
+
+
+if __name__ == "__main__":
+    main()
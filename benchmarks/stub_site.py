@@ -0,0 +1,261 @@
+"""目标站点(sfsjcx)的本地替身
+
+复现查询页的Vue表单结构（#app > div.search、div.submit、window.vm.$data.submitTime），
+点击查询后按配置的延迟、行数和失败率渲染 #app > div.list > div.tab_warp，
+用于离线基准测试，不访问真实的 csj.sgj.cn。
+
+用法:
+    python benchmarks/stub_site.py --port 8765 --latency-ms 800 --failure-rate 0.05
+    然后以 BASE_URL=http://127.0.0.1:8765/main/sfsjcx 启动应用
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+from urllib.parse import parse_qs, urlparse
+
+PAGE_PATH = "/main/sfsjcx"
+DATA_PATH = "/main/sfsjcx/data"
+
+HEADERS = ["日期", "移动拉新数", "移动转存数", "会员订单数", "会员订单金额", "会员佣金（元）"]
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html lang="zh-CN">
+<head><meta charset="utf-8"><title>数据查询</title></head>
+<body>
+<div id="app">
+  <div class="search">
+    <div class="title">UK码查询</div>
+    <div><input type="text" placeholder="请输入UK码"></div>
+    <div class="date"><span class="start"></span> - <span class="end"></span></div>
+    <div class="submit">查询</div>
+  </div>
+  <div class="list"></div>
+</div>
+<script>
+  function pad(n) { return String(n).padStart(2, '0'); }
+  function fmt(d) { return d.getFullYear() + '-' + pad(d.getMonth() + 1) + '-' + pad(d.getDate()); }
+  window.vm = {
+    $data: {
+      showType: 1,
+      startTime: '',
+      endTime: '',
+      submitTime: function (d) {
+        if (window.vm.$data.showType === 1) {
+          window.vm.$data.startTime = fmt(d);
+          document.querySelector('.date .start').textContent = fmt(d);
+        } else {
+          window.vm.$data.endTime = fmt(d);
+          document.querySelector('.date .end').textContent = fmt(d);
+        }
+      }
+    }
+  };
+  document.querySelector('#app > div.search > div.submit').addEventListener('click', function () {
+    var data = window.vm.$data;
+    var uk = document.querySelector('#app > div.search > div:nth-child(2) > input').value;
+    var url = '__DATA_PATH__?uk=' + encodeURIComponent(uk) +
+      '&start=' + data.startTime + '&end=' + data.endTime;
+    fetch(url).then(function (resp) {
+      if (!resp.ok) { throw new Error('HTTP ' + resp.status); }
+      return resp.text();
+    }).then(function (html) {
+      document.querySelector('#app > div.list').innerHTML = html;
+    }).catch(function (err) {
+      document.querySelector('#app > div.list').innerHTML = '<div class="error">' + err + '</div>';
+    });
+  });
+</script>
+</body>
+</html>
+""".replace("__DATA_PATH__", DATA_PATH)
+
+
+@dataclass
+class StubSettings:
+    """替身站点行为配置"""
+
+    latency_ms: float = 500.0  # 数据请求的基础延迟
+    jitter_ms: float = 200.0  # 延迟抖动（均匀分布）
+    tail_rate: float = 0.0  # 长尾请求比例
+    tail_ms: float = 30000.0  # 长尾请求的额外延迟
+    failure_rate: float = 0.0  # 数据请求返回500的比例
+    page_latency_ms: float = 0.0  # 页面本身的加载延迟
+    rows: Optional[int] = None  # 固定行数，None时按日期范围逐日生成
+
+
+def render_tab_warp(rows: List[List[str]], headers: List[str] = HEADERS) -> str:
+    """渲染与目标站点一致的 div.tab_warp 表格结构"""
+    header_html = "".join(f"<div>{h}</div>" for h in headers)
+    body_html = "".join(
+        '<div class="table_body_item">'
+        + "".join(f"<div>{cell}</div>" for cell in row)
+        + "</div>"
+        for row in rows
+    )
+    return (
+        '<div class="tab_warp"><div class="table">'
+        f'<div class="table_header">{header_html}</div>'
+        f'<div class="table_body">{body_html}</div>'
+        "</div></div>"
+    )
+
+
+def generate_rows(uk_code: str, start: str, end: str, count: Optional[int] = None) -> List[List[str]]:
+    """生成确定性的每日数据（同一UK码与日期的数据保持不变）"""
+    try:
+        start_day = date.fromisoformat(start)
+        end_day = date.fromisoformat(end)
+    except ValueError:
+        start_day = end_day = date.today()
+    if count is None:
+        count = max(1, (end_day - start_day).days + 1)
+
+    rows = []
+    for i in range(count):
+        day = start_day + timedelta(days=i)
+        rng = random.Random(f"{uk_code}:{day.isoformat()}")
+        rows.append(
+            [
+                day.isoformat(),
+                str(rng.randint(0, 300)),
+                str(rng.randint(0, 3000)),
+                str(rng.randint(0, 30)),
+                f"{rng.uniform(0, 3000):.2f}",
+                f"{rng.uniform(0, 300):.2f}",
+            ]
+        )
+    return rows
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = "StubSfsjcx/1.0"
+
+    @property
+    def settings(self) -> StubSettings:
+        return self.server.settings
+
+    def log_message(self, format, *args):  # noqa: A002 - 覆盖基类签名
+        pass
+
+    def _send(self, status: int, body: str, content_type: str = "text/html; charset=utf-8"):
+        data = body.encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):  # noqa: N802 - http.server约定
+        url = urlparse(self.path)
+        self.server.count_request(url.path)
+
+        if url.path == PAGE_PATH:
+            time.sleep(self.settings.page_latency_ms / 1000)
+            self._send(200, PAGE_TEMPLATE)
+        elif url.path == DATA_PATH:
+            self._serve_data(parse_qs(url.query))
+        elif url.path == "/stats":
+            self._send(200, json.dumps(self.server.stats()), "application/json")
+        else:
+            self._send(404, "not found")
+
+    def _serve_data(self, query):
+        settings = self.settings
+        delay = settings.latency_ms + random.uniform(0, settings.jitter_ms)
+        if random.random() < settings.tail_rate:
+            delay += settings.tail_ms
+        time.sleep(delay / 1000)
+
+        if random.random() < settings.failure_rate:
+            self.server.count_request("failure")
+            self._send(500, "internal error")
+            return
+
+        rows = generate_rows(
+            query.get("uk", [""])[0],
+            query.get("start", [""])[0],
+            query.get("end", [""])[0],
+            settings.rows,
+        )
+        self._send(200, render_tab_warp(rows))
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, settings: StubSettings):
+        super().__init__(address, StubHandler)
+        self.settings = settings
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def count_request(self, key: str):
+        with self._lock:
+            self._counts[key] = self._counts.get(key, 0) + 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts)
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}{PAGE_PATH}"
+
+
+def start_stub_server(settings: StubSettings, host: str = "127.0.0.1", port: int = 0) -> StubServer:
+    """在后台线程中启动替身站点，port为0时自动分配端口"""
+    server = StubServer((host, port), settings)
+    threading.Thread(target=server.serve_forever, name="stub_site", daemon=True).start()
+    return server
+
+
+def add_stub_arguments(parser: argparse.ArgumentParser):
+    """替身站点的命令行参数（供其他基准脚本复用）"""
+    parser.add_argument("--latency-ms", type=float, default=500.0)
+    parser.add_argument("--jitter-ms", type=float, default=200.0)
+    parser.add_argument("--tail-rate", type=float, default=0.0)
+    parser.add_argument("--tail-ms", type=float, default=30000.0)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--page-latency-ms", type=float, default=0.0)
+    parser.add_argument("--rows", type=int, default=None)
+
+
+def settings_from_args(args) -> StubSettings:
+    return StubSettings(
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        tail_rate=args.tail_rate,
+        tail_ms=args.tail_ms,
+        failure_rate=args.failure_rate,
+        page_latency_ms=args.page_latency_ms,
+        rows=args.rows,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="sfsjcx站点本地替身")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    server = StubServer((args.host, args.port), settings_from_args(args))
+    print(f"替身站点已启动: {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
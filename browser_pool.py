@@ -0,0 +1,195 @@
+"""浏览器池模块
+
+每个工作线程拥有自己的事件循环（见 app.run_async_task），Playwright对象只能在创建它的事件循环中使用，
+因此按线程保留一个已启动的Playwright驱动与Chromium浏览器，查询之间只新建/关闭浏览器上下文。
+
+浏览器在以下情况下被回收（关闭后下次使用时重新启动）：
+- 使用次数达到 max_uses
+- 内存超过硬限制（由调用方标记，见 memory_governor）
+- 空闲时间超过 idle_ttl（夜间使用更短的 night_idle_ttl），由后台线程调用 shrink 关闭
+
+线程空闲时其事件循环没有运行，shrink 在持有该线程的循环锁时由后台线程驱动该循环完成关闭。
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional, Set, Tuple
+
+from playwright.async_api import Browser, Playwright, async_playwright
+
+from request_trace import span
+
+
+class BrowserSlot:
+    """单个工作线程的浏览器"""
+
+    __slots__ = (
+        "loop",
+        "lock",
+        "playwright",
+        "browser",
+        "tasks",
+        "launched_at",
+        "last_used",
+        "uses",
+        "recycle",
+    )
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.lock = threading.Lock()  # 持有时才能驱动该线程的事件循环
+        self.playwright: Optional[Playwright] = None
+        self.browser: Optional[Browser] = None
+        self.tasks: Set[asyncio.Task] = set()  # Playwright驱动的常驻任务
+        self.launched_at = 0.0
+        self.last_used = 0.0
+        self.uses = 0
+        self.recycle = False
+
+
+class BrowserPool:
+    """按线程复用的浏览器池"""
+
+    def __init__(
+        self,
+        launch: Callable[[Playwright], Awaitable[Browser]],
+        max_uses: int = 50,
+        idle_ttl: float = 600,
+        night_idle_ttl: float = 60,
+        night_hours: Tuple[int, int] = (0, 6),
+    ):
+        self.launch = launch
+        self.max_uses = max_uses
+        self.idle_ttl = idle_ttl
+        self.night_idle_ttl = night_idle_ttl
+        self.night_hours = night_hours
+        self._slots: Dict[int, BrowserSlot] = {}
+        self._lock = threading.Lock()
+        self.launches = 0
+        self.recycles: Dict[str, int] = {}
+
+    @contextmanager
+    def running(self, loop: asyncio.AbstractEventLoop) -> Iterator[BrowserSlot]:
+        """在当前线程上运行事件循环期间持有该线程的循环锁"""
+        ident = threading.get_ident()
+        with self._lock:
+            slot = self._slots.get(ident)
+            if slot is None or slot.loop is not loop:
+                # 事件循环被重建时，旧循环上的浏览器已不可用
+                slot = self._slots[ident] = BrowserSlot(loop)
+        with slot.lock:
+            yield slot
+
+    def protected_tasks(self) -> Set[asyncio.Task]:
+        """当前线程上不能被取消的常驻任务"""
+        slot = self._slots.get(threading.get_ident())
+        return set(slot.tasks) if slot is not None else set()
+
+    def _current_slot(self) -> BrowserSlot:
+        slot = self._slots.get(threading.get_ident())
+        if slot is None or slot.loop is not asyncio.get_running_loop():
+            raise RuntimeError("BrowserPool.acquire 必须在 run_async_task 中调用")
+        return slot
+
+    async def acquire(self) -> Browser:
+        """获取当前线程的浏览器，没有或已断开时启动新的浏览器"""
+        slot = self._current_slot()
+        if slot.browser is not None and not slot.browser.is_connected():
+            await self._close(slot, "disconnected")
+        if slot.browser is None:
+            if slot.playwright is None:
+                before = asyncio.all_tasks()
+                with span("driver_start", "playwright"):
+                    slot.playwright = await async_playwright().start()
+                slot.tasks = asyncio.all_tasks() - before
+            slot.browser = await self.launch(slot.playwright)
+            slot.launched_at = time.time()
+            slot.uses = 0
+            with self._lock:
+                self.launches += 1
+        slot.uses += 1
+        slot.last_used = time.time()
+        return slot.browser
+
+    async def release(self, recycle: bool = False) -> None:
+        """归还浏览器，需要回收时立即关闭"""
+        slot = self._current_slot()
+        slot.last_used = time.time()
+        if recycle:
+            await self._close(slot, "memory")
+        elif slot.recycle:
+            await self._close(slot, "flagged")
+        elif slot.uses >= self.max_uses:
+            await self._close(slot, "max_uses")
+
+    async def _close(self, slot: BrowserSlot, reason: str) -> None:
+        browser, playwright = slot.browser, slot.playwright
+        slot.browser = None
+        slot.playwright = None
+        slot.tasks = set()
+        slot.recycle = False
+        with self._lock:
+            self.recycles[reason] = self.recycles.get(reason, 0) + 1
+        for closer in (browser.close if browser else None, playwright.stop if playwright else None):
+            if closer is None:
+                continue
+            try:
+                await closer()
+            except Exception:
+                pass
+
+    def recycle_all(self) -> None:
+        """标记全部浏览器待回收：使用中的在归还时关闭，空闲的由 shrink 关闭"""
+        with self._lock:
+            for slot in self._slots.values():
+                if slot.browser is not None:
+                    slot.recycle = True
+
+    def current_idle_ttl(self, now: Optional[datetime] = None) -> float:
+        """当前的空闲回收时间，夜间更短"""
+        hour = (now or datetime.now()).hour
+        start, end = self.night_hours
+        at_night = start <= hour < end if start <= end else (hour >= start or hour < end)
+        return self.night_idle_ttl if at_night else self.idle_ttl
+
+    def shrink(self, force: bool = False) -> int:
+        """关闭空闲超时、被标记回收（force时为全部）的空闲浏览器，返回关闭数量"""
+        ttl = self.current_idle_ttl()
+        now = time.time()
+        with self._lock:
+            slots = list(self._slots.values())
+
+        closed = 0
+        for slot in slots:
+            if slot.browser is None and slot.playwright is None:
+                continue
+            idle = now - slot.last_used
+            if not (force or slot.recycle or idle >= ttl):
+                continue
+            # 线程正在使用该循环时跳过，由其在归还时处理
+            if not slot.lock.acquire(blocking=False):
+                continue
+            try:
+                if slot.loop.is_closed() or slot.loop.is_running():
+                    continue
+                reason = "forced" if force else ("flagged" if slot.recycle else "idle")
+                slot.loop.run_until_complete(self._close(slot, reason))
+                closed += 1
+            finally:
+                slot.lock.release()
+        return closed
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            slots = [slot for slot in self._slots.values() if slot.browser is not None]
+            return {
+                "browsers": len(slots),
+                "launches": self.launches,
+                "recycles": dict(self.recycles),
+                "idle_ttl": self.current_idle_ttl(),
+                "max_idle": round(max((now - s.last_used for s in slots), default=0), 1),
+            }
@@ -0,0 +1,163 @@
+"""熔断器模块
+
+按远程站点/app_id 统计最近的抓取结果，失败（含超时）比例超过阈值时熔断(open)：
+熔断期间查询立即失败（或返回缓存的旧数据），不再占用工作线程等待超时。
+熔断时间过后进入半开(half_open)状态，按间隔放行探测请求，
+连续成功达到次数后恢复(closed)，探测失败则重新熔断。
+
+熔断器最多保留 max_circuits 个键：超出时淘汰最久未使用的 closed 状态熔断器
+（其中只有已过期的统计），open/half_open 的熔断器不会被淘汰。
+"""
+
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class _Circuit:
+    __slots__ = (
+        "state",
+        "outcomes",
+        "opened_at",
+        "last_probe_at",
+        "probe_successes",
+        "opens",
+        "last_used",
+    )
+
+    def __init__(self, window: int):
+        self.state = CLOSED
+        self.outcomes: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self.opened_at = 0.0
+        self.last_probe_at = 0.0
+        self.probe_successes = 0
+        self.opens = 0
+        self.last_used = 0.0
+
+
+class CircuitBreaker:
+    """线程安全的按键熔断器"""
+
+    def __init__(
+        self,
+        failure_rate: float = 0.5,
+        window: int = 20,
+        window_seconds: float = 120,
+        min_calls: int = 5,
+        open_seconds: float = 30,
+        probe_interval: float = 10,
+        half_open_successes: int = 2,
+        max_circuits: int = 256,
+    ):
+        self.failure_rate = failure_rate
+        self.window = window
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.probe_interval = probe_interval
+        self.half_open_successes = half_open_successes
+        self.max_circuits = max_circuits
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.evicted = 0
+
+    def _circuit(self, key: str, now: float) -> _Circuit:
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            if len(self._circuits) >= self.max_circuits:
+                self._evict()
+            circuit = self._circuits[key] = _Circuit(self.window)
+        circuit.last_used = now
+        return circuit
+
+    def _evict(self) -> None:
+        """淘汰最久未使用的 closed 熔断器，为新键腾出位置"""
+        idle = [(c.last_used, k) for k, c in self._circuits.items() if c.state == CLOSED]
+        idle.sort()
+        for _, key in idle[: len(self._circuits) - self.max_circuits + 1]:
+            del self._circuits[key]
+            self.evicted += 1
+
+    def _open(self, circuit: _Circuit, now: float) -> None:
+        circuit.state = OPEN
+        circuit.opened_at = now
+        circuit.probe_successes = 0
+        circuit.opens += 1
+
+    def allow(self, key: str) -> bool:
+        """是否允许向远程站点发起请求；半开状态下按间隔放行探测请求"""
+        now = time.time()
+        with self._lock:
+            circuit = self._circuit(key, now)
+            if circuit.state == OPEN and now - circuit.opened_at >= self.open_seconds:
+                circuit.state = HALF_OPEN
+                circuit.probe_successes = 0
+                circuit.last_probe_at = 0.0
+            if circuit.state == CLOSED:
+                return True
+            if circuit.state == HALF_OPEN and now - circuit.last_probe_at >= self.probe_interval:
+                circuit.last_probe_at = now
+                return True
+            self.rejected += 1
+            return False
+
+    def record(self, key: str, success: bool) -> None:
+        """记录一次远程请求的结果"""
+        now = time.time()
+        with self._lock:
+            circuit = self._circuit(key, now)
+            if circuit.state == HALF_OPEN:
+                if not success:
+                    self._open(circuit, now)
+                    return
+                circuit.probe_successes += 1
+                if circuit.probe_successes >= self.half_open_successes:
+                    circuit.state = CLOSED
+                    circuit.outcomes.clear()
+                return
+            if circuit.state == OPEN:
+                return
+
+            circuit.outcomes.append((now, success))
+            while circuit.outcomes and now - circuit.outcomes[0][0] > self.window_seconds:
+                circuit.outcomes.popleft()
+            calls = len(circuit.outcomes)
+            failures = sum(1 for _, ok in circuit.outcomes if not ok)
+            if calls >= self.min_calls and failures / calls >= self.failure_rate:
+                self._open(circuit, now)
+
+    def retry_after(self, key: str) -> int:
+        """距离下一次允许探测的秒数（用于 Retry-After 响应头）"""
+        now = time.time()
+        with self._lock:
+            circuit = self._circuits.get(key)
+            if circuit is None or circuit.state == CLOSED:
+                return 0
+            if circuit.state == OPEN:
+                wait = circuit.opened_at + self.open_seconds - now
+            else:
+                wait = circuit.last_probe_at + self.probe_interval - now
+            return max(1, int(wait + 0.999))
+
+    def any_open(self) -> bool:
+        with self._lock:
+            return any(c.state != CLOSED for c in self._circuits.values())
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            circuits = {}
+            for key, circuit in self._circuits.items():
+                failures = sum(1 for _, ok in circuit.outcomes if not ok)
+                circuits[key] = {
+                    "state": circuit.state,
+                    "calls": len(circuit.outcomes),
+                    "failures": failures,
+                    "opens": circuit.opens,
+                }
+            return {"circuits": circuits, "rejected": self.rejected, "evicted": self.evicted}
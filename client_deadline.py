@@ -0,0 +1,64 @@
+"""客户端截止时间与断开检测模块
+
+前端在请求头 X-Request-Timeout（或请求体 timeout_ms）中携带自己的超时（毫秒），
+后端的查询截止时间取其与 QUERY_DEADLINE 的较小值，客户端放弃时后端也已停止。
+
+客户端断开（超时中止、取消查询、关闭页面）时尽快停止抓取：
+- waitress 提供 waitress.client_disconnected，但只有 channel_request_lookahead > 0 时
+  才会在请求处理期间继续读取连接、发现断开；默认为0时改为探测该连接的socket
+- werkzeug 开发服务器与 gunicorn 在environ中提供连接socket，以 MSG_PEEK 探测对端是否已关闭
+都不可用时视为未断开。
+"""
+
+import socket
+from typing import Any, Dict, Mapping, Optional
+
+TIMEOUT_HEADER = "X-Request-Timeout"
+
+# Windows 没有 MSG_DONTWAIT，无法非阻塞地探测
+_CAN_PEEK = hasattr(socket, "MSG_DONTWAIT")
+
+
+class ClientDisconnected(Exception):
+    """客户端在查询完成前断开了连接"""
+
+
+def client_timeout(headers: Mapping[str, str], data: Optional[Dict[str, Any]]) -> Optional[float]:
+    """客户端声明的超时（秒），没有或无效时返回None"""
+    raw = headers.get(TIMEOUT_HEADER)
+    if raw is None and data:
+        raw = data.get("timeout_ms")
+    try:
+        value = float(raw) / 1000
+    except (TypeError, ValueError):
+        return None
+    return value if value > 0 else None
+
+
+def _peer_closed(sock: Any) -> bool:
+    """以 MSG_PEEK 非阻塞地探测对端是否已关闭连接（不消耗数据）"""
+    if sock is None or not _CAN_PEEK:
+        return False
+    try:
+        # 对端关闭时可读且读到0字节；连接正常时没有数据可读
+        return sock.recv(1, socket.MSG_PEEK | socket.MSG_DONTWAIT) == b""
+    except (BlockingIOError, InterruptedError):
+        return False
+    except ValueError:  # TLS socket 不支持 recv flags
+        return False
+    except OSError:
+        return True
+
+
+def client_disconnected(environ: Dict[str, Any]) -> bool:
+    """客户端是否已断开连接"""
+    check = environ.get("waitress.client_disconnected")
+    if check is None:
+        return _peer_closed(environ.get("werkzeug.socket") or environ.get("gunicorn.socket"))
+    if check():
+        return True
+    # lookahead 为0时 waitress 在请求处理期间不读取连接，check() 永远为假
+    channel = getattr(check, "__self__", None)
+    if channel is None or channel.adj.channel_request_lookahead > 0:
+        return False
+    return _peer_closed(getattr(channel, "socket", None))
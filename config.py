@@ -11,7 +11,7 @@ class Config:
     """基础配置类"""
 
     SECRET_KEY = os.environ.get("SECRET_KEY") or "a-hard-to-guess-string"
-    BASE_URL = "https://csj.sgj.cn/main/sfsjcx"
+    BASE_URL = os.environ.get("BASE_URL") or "https://csj.sgj.cn/main/sfsjcx"
     DEFAULT_AUTH_KEY = (
         os.environ.get("DEFAULT_AUTH_KEY")
         or "329bSNv6H7fSWPELIdKF9R85s5aRT0VHlrizy8BcOSo1nGrXmCRykQupgyHib3p9gM5OxB%2F2"
@@ -24,6 +24,211 @@ class Config:
         "deposit": 0.1    # 转存系数
     }
 
+    # 响应压缩配置（与Node版 compression 中间件保持一致）
+    COMPRESSION_LEVEL = int(os.environ.get("COMPRESSION_LEVEL") or 6)
+    COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE") or 1024)
+
+    # 查询结果缓存配置（秒）
+    QUERY_CACHE_MAX_ENTRIES = int(os.environ.get("QUERY_CACHE_MAX_ENTRIES") or 512)
+    QUERY_CACHE_TTL = int(os.environ.get("QUERY_CACHE_TTL") or 3600)
+    QUERY_CACHE_TODAY_TTL = int(os.environ.get("QUERY_CACHE_TODAY_TTL") or 300)  # 包含今天的范围
+    # 过期后仍可直接返回并在后台刷新的最大陈旧时间（按抓取时间计算）
+    QUERY_CACHE_MAX_STALE = int(os.environ.get("QUERY_CACHE_MAX_STALE") or 4 * 3600)
+    # 增量刷新窗口（天）：缓存过期后只重新抓取最近N天（默认今天和昨天）并合并，0表示总是全量抓取
+    INCREMENTAL_REFRESH_DAYS = int(os.environ.get("INCREMENTAL_REFRESH_DAYS") or 2)
+
+    # 查询总超时预算（秒），由抓取各阶段分配
+    QUERY_DEADLINE = float(os.environ.get("QUERY_DEADLINE") or 90)
+    # 客户端在 X-Request-Timeout 中声明超时时，截止时间为 min(QUERY_DEADLINE, 客户端超时 - 余量)；
+    # 等待抓取期间每 CLIENT_DISCONNECT_POLL 秒检查一次客户端是否已断开，断开则取消抓取
+    CLIENT_DEADLINE_MARGIN = float(os.environ.get("CLIENT_DEADLINE_MARGIN") or 1)
+    CLIENT_DISCONNECT_POLL = float(os.environ.get("CLIENT_DISCONNECT_POLL") or 0.5)
+    # 抓取阶段超时: (默认, 下限, 上限)（秒）；样本足够后取最近成功耗时 p99 * 系数
+    PHASE_TIMEOUTS = {
+        "goto": (45, 5, 45),
+        "networkidle": (10, 2, 10),
+        "search_input": (15, 3, 15),
+        "results": (30, 5, 30),
+        "results_fallback": (15, 3, 15),
+    }
+    PHASE_TIMEOUT_WINDOW = int(os.environ.get("PHASE_TIMEOUT_WINDOW") or 200)  # 样本数
+    PHASE_TIMEOUT_MULTIPLIER = float(os.environ.get("PHASE_TIMEOUT_MULTIPLIER") or 1.5)
+    PHASE_TIMEOUT_MIN_SAMPLES = int(os.environ.get("PHASE_TIMEOUT_MIN_SAMPLES") or 20)
+
+    # 远程步骤重试: 各错误类型的最大尝试次数、单个查询的重试上限、指数退避（全抖动）参数，
+    # 以及进程级重试预算（每次调用存入 RATIO 个令牌、每次重试消耗1个，最多 MAX_TOKENS 个）
+    RETRY_MAX_ATTEMPTS = {"navigation": 3, "selector": 2, "auth": 2, "empty": 2}
+    RETRY_PER_REQUEST = int(os.environ.get("RETRY_PER_REQUEST") or 3)
+    RETRY_BASE_DELAY = float(os.environ.get("RETRY_BASE_DELAY") or 0.5)
+    RETRY_MAX_DELAY = float(os.environ.get("RETRY_MAX_DELAY") or 5)
+    RETRY_BUDGET_RATIO = float(os.environ.get("RETRY_BUDGET_RATIO") or 0.2)
+    RETRY_BUDGET_MAX_TOKENS = float(os.environ.get("RETRY_BUDGET_MAX_TOKENS") or 10)
+
+    # 熔断器: 最近 CIRCUIT_WINDOW 次（且在 CIRCUIT_WINDOW_SECONDS 秒内）抓取的失败比例
+    # 达到 CIRCUIT_FAILURE_RATE 时熔断 CIRCUIT_OPEN_SECONDS 秒，之后按间隔放行探测请求
+    CIRCUIT_FAILURE_RATE = float(os.environ.get("CIRCUIT_FAILURE_RATE") or 0.5)
+    CIRCUIT_WINDOW = int(os.environ.get("CIRCUIT_WINDOW") or 20)
+    CIRCUIT_WINDOW_SECONDS = float(os.environ.get("CIRCUIT_WINDOW_SECONDS") or 120)
+    CIRCUIT_MIN_CALLS = int(os.environ.get("CIRCUIT_MIN_CALLS") or 5)
+    CIRCUIT_OPEN_SECONDS = float(os.environ.get("CIRCUIT_OPEN_SECONDS") or 30)
+    CIRCUIT_PROBE_INTERVAL = float(os.environ.get("CIRCUIT_PROBE_INTERVAL") or 10)
+    CIRCUIT_HALF_OPEN_SUCCESSES = int(os.environ.get("CIRCUIT_HALF_OPEN_SUCCESSES") or 2)
+    # 最多保留的熔断器个数（每个 站点/app_id 一个），超出时淘汰最久未使用的 closed 熔断器
+    CIRCUIT_MAX_KEYS = int(os.environ.get("CIRCUIT_MAX_KEYS") or 256)
+
+    # Chromium启动配置档（BROWSER_PROFILE 选择）:
+    #   compat      原有参数，含老站点兼容性开关，1920x1080 视口（默认）
+    #   balanced    去掉兼容性开关，限制渲染进程数与JS堆，1280x800 视口
+    #   low-memory  单进程、禁用缓存、更小的JS堆与视口，适合1GB内存的节点
+    # 浏览器上下文均为无痕模式，HTTP缓存只在上下文内有效，因此只限制缓存大小而不配置共享磁盘缓存
+    BROWSER_PROFILES = {
+        "compat": {
+            "args": [
+                "--no-sandbox",
+                "--disable-setuid-sandbox",
+                "--disable-dev-shm-usage",
+                "--disable-accelerated-2d-canvas",
+                "--no-first-run",
+                "--no-zygote",
+                "--disable-gpu",
+                "--disable-web-security",  # 提高老站点兼容性
+                "--disable-features=VizDisplayCompositor",  # 兼容老版本渲染
+                "--disable-background-timer-throttling",  # 防止后台定时器被限制
+                "--disable-backgrounding-occluded-windows",
+                "--disable-renderer-backgrounding",
+                "--disable-field-trial-config",
+                "--disable-ipc-flooding-protection",
+                "--force-color-profile=srgb",  # 确保颜色一致性
+                "--disable-blink-features=AutomationControlled",  # 避免被检测
+            ],
+            "viewport": {"width": 1920, "height": 1080},
+        },
+        "balanced": {
+            "args": [
+                "--no-sandbox",
+                "--disable-setuid-sandbox",
+                "--disable-dev-shm-usage",
+                "--no-first-run",
+                "--no-zygote",
+                "--disable-gpu",
+                "--disable-extensions",
+                "--disable-background-networking",
+                "--disable-background-timer-throttling",
+                "--disable-renderer-backgrounding",
+                "--disable-blink-features=AutomationControlled",
+                "--renderer-process-limit=2",
+                "--js-flags=--max-old-space-size=256",
+            ],
+            "viewport": {"width": 1280, "height": 800},
+        },
+        "low-memory": {
+            "args": [
+                "--no-sandbox",
+                "--disable-setuid-sandbox",
+                "--disable-dev-shm-usage",
+                "--no-first-run",
+                "--no-zygote",
+                # 每个浏览器同一时间只有一个上下文（见 browser_pool），单进程模式可用
+                "--single-process",
+                "--disable-gpu",
+                "--disable-extensions",
+                "--disable-background-networking",
+                "--disable-background-timer-throttling",
+                "--disable-renderer-backgrounding",
+                "--disable-blink-features=AutomationControlled",
+                "--renderer-process-limit=1",
+                "--disk-cache-size=1",
+                "--media-cache-size=1",
+                "--aggressive-cache-discard",
+                "--js-flags=--max-old-space-size=128",
+            ],
+            "viewport": {"width": 800, "height": 600},
+        },
+    }
+    BROWSER_PROFILE = os.environ.get("BROWSER_PROFILE") or "compat"
+
+    # 浏览器池: 每个工作线程复用一个Chromium，使用 BROWSER_MAX_USES 次后重启；
+    # 空闲超过 BROWSER_IDLE_TTL 秒（夜间 BROWSER_NIGHT_HOURS 内为 BROWSER_NIGHT_IDLE_TTL 秒）后关闭
+    BROWSER_POOL_ENABLED = os.environ.get("BROWSER_POOL_ENABLED", "true").lower() == "true"
+    BROWSER_MAX_USES = int(os.environ.get("BROWSER_MAX_USES") or 50)
+    BROWSER_IDLE_TTL = float(os.environ.get("BROWSER_IDLE_TTL") or 600)
+    BROWSER_NIGHT_IDLE_TTL = float(os.environ.get("BROWSER_NIGHT_IDLE_TTL") or 60)
+    BROWSER_NIGHT_HOURS = tuple(
+        int(hour) for hour in (os.environ.get("BROWSER_NIGHT_HOURS") or "0-6").split("-")
+    )
+    BROWSER_JANITOR_INTERVAL = float(os.environ.get("BROWSER_JANITOR_INTERVAL") or 30)
+
+    # 内存限制（Python进程与全部浏览器子进程的RSS之和，MB，0表示不限制）：
+    # 超过软限制时新的抓取排队等待（最多 MEMORY_ADMIT_TIMEOUT 秒），超过硬限制时回收浏览器
+    MEMORY_SOFT_LIMIT_MB = float(os.environ.get("MEMORY_SOFT_LIMIT_MB") or 700)
+    MEMORY_HARD_LIMIT_MB = float(os.environ.get("MEMORY_HARD_LIMIT_MB") or 900)
+    MEMORY_ADMIT_TIMEOUT = float(os.environ.get("MEMORY_ADMIT_TIMEOUT") or 20)
+
+    # 优先级通道: interactive(用户查询) / batch(批量查询) / background(预取、后台刷新)
+    # 按 PRIORITY_WEIGHTS 加权轮询调度；INTERACTIVE_RESERVED_WORKERS 个工作线程只运行交互查询
+    PRIORITY_WEIGHTS = dict(
+        zip(
+            ("interactive", "batch", "background"),
+            (
+                float(weight)
+                for weight in (os.environ.get("PRIORITY_WEIGHTS") or "6,3,1").split(",")
+            ),
+        )
+    )
+    INTERACTIVE_RESERVED_WORKERS = int(os.environ.get("INTERACTIVE_RESERVED_WORKERS") or 1)
+
+    # 对冲请求: 查询抓取超过最近成功抓取耗时的 HEDGE_PERCENTILE 分位数（不少于 HEDGE_MIN_DELAY 秒）
+    # 仍未完成时，在另一个工作线程上再发起一次抓取，取先成功的结果；
+    # 对冲预算为令牌桶，每次查询存入 HEDGE_BUDGET_RATIO 个令牌，每次对冲消耗一个
+    HEDGE_ENABLED = os.environ.get("HEDGE_ENABLED", "false").lower() == "true"
+    HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE") or 0.95)
+    HEDGE_MIN_DELAY = float(os.environ.get("HEDGE_MIN_DELAY") or 3)
+    HEDGE_WINDOW = int(os.environ.get("HEDGE_WINDOW") or 200)
+    HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES") or 20)
+    HEDGE_BUDGET_RATIO = float(os.environ.get("HEDGE_BUDGET_RATIO") or 0.1)
+    HEDGE_BUDGET_MAX_TOKENS = float(os.environ.get("HEDGE_BUDGET_MAX_TOKENS") or 5)
+
+    # 浏览器会话状态(storage_state)复用时间（秒），0表示不复用
+    SESSION_STATE_TTL = int(os.environ.get("SESSION_STATE_TTL") or 1800)
+
+    # 静态资源: 启动时生成 .gz/.br 预压缩变体；可选启用Service Worker缓存应用外壳
+    STATIC_PRECOMPRESS = os.environ.get("STATIC_PRECOMPRESS", "true").lower() == "true"
+    SERVICE_WORKER_ENABLED = (
+        os.environ.get("SERVICE_WORKER_ENABLED", "false").lower() == "true"
+    )
+    # 首页渲染缓存检查模板/静态资源是否变化的间隔（秒）
+    INDEX_CACHE_CHECK_INTERVAL = float(os.environ.get("INDEX_CACHE_CHECK_INTERVAL") or 2)
+
+    # 事件循环监控: 每 LOOP_MONITOR_INTERVAL 秒探测各工作线程事件循环的调度延迟，
+    # 阻塞超过 LOOP_BLOCK_THRESHOLD 秒时记录警告及调用栈；线程池队首任务等待超过 EXECUTOR_WAIT_WARN 秒时警告
+    LOOP_MONITOR_ENABLED = os.environ.get("LOOP_MONITOR_ENABLED", "true").lower() == "true"
+    LOOP_MONITOR_INTERVAL = float(os.environ.get("LOOP_MONITOR_INTERVAL") or 0.25)
+    LOOP_BLOCK_THRESHOLD = float(os.environ.get("LOOP_BLOCK_THRESHOLD") or 0.2)
+    EXECUTOR_WAIT_WARN = float(os.environ.get("EXECUTOR_WAIT_WARN") or 2)
+
+    # 请求时间线追踪: 按 TRACE_SAMPLE_RATE 采样（请求体 trace=true 且带有效 X-Admin-Token 时总是记录），
+    # Chrome trace-event JSON 写入 TRACE_DIR，最多保留 TRACE_MAX_FILES 个文件
+    TRACE_SAMPLE_RATE = float(os.environ.get("TRACE_SAMPLE_RATE") or 0)
+    TRACE_DIR = os.environ.get("TRACE_DIR") or "traces"
+    TRACE_MAX_FILES = int(os.environ.get("TRACE_MAX_FILES") or 200)
+
+    # /api/export 单次导出的UK码数量上限
+    EXPORT_MAX_UK_CODES = int(os.environ.get("EXPORT_MAX_UK_CODES") or 200)
+
+    # 本地列式分析存储（需要 pyarrow）: 抓取到的每日数据按 app_id/月份 写入 ANALYTICS_DIR 下的 Parquet 文件，
+    # 每 ANALYTICS_FLUSH_INTERVAL 秒或缓冲 ANALYTICS_FLUSH_ROWS 行时写盘，分区文件数达到 ANALYTICS_COMPACT_FILES 时合并
+    ANALYTICS_STORE_ENABLED = os.environ.get("ANALYTICS_STORE_ENABLED", "true").lower() == "true"
+    ANALYTICS_DIR = os.environ.get("ANALYTICS_DIR") or "analytics"
+    ANALYTICS_FLUSH_INTERVAL = float(os.environ.get("ANALYTICS_FLUSH_INTERVAL") or 30)
+    ANALYTICS_FLUSH_ROWS = int(os.environ.get("ANALYTICS_FLUSH_ROWS") or 5000)
+    ANALYTICS_COMPACT_FILES = int(os.environ.get("ANALYTICS_COMPACT_FILES") or 8)
+
+    # 管理接口令牌（请求头 X-Admin-Token），未配置时管理接口不可用
+    ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN") or ""
+    # 性能剖析结果目录与单次会话的最长时间（秒）
+    PROFILE_DIR = os.environ.get("PROFILE_DIR") or "profiles"
+    PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS") or 300)
+
     @staticmethod
     def init_app(app):
         """初始化应用配置"""
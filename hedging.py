@@ -0,0 +1,78 @@
+"""对冲请求模块
+
+远程站点的抓取耗时有长尾：主抓取超过最近成功抓取耗时的高分位数（默认p95）仍未完成时，
+在另一个工作线程（另一个浏览器）上再发起一次相同的抓取，取先成功的结果并取消另一个。
+对冲使用全局预算（令牌桶，与重试预算相同）：每次查询存入 ratio 个令牌，每次对冲消耗一个，
+对冲请求量不超过查询量的 ratio 倍。
+"""
+
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from retry_policy import RetryBudget
+from timeout_budget import percentile
+
+
+class HedgePolicy:
+    """对冲延迟与预算"""
+
+    def __init__(
+        self,
+        quantile: float = 0.95,
+        min_delay: float = 3.0,
+        window: int = 200,
+        min_samples: int = 20,
+        budget: Optional[RetryBudget] = None,
+    ):
+        self.quantile = quantile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.budget = budget or RetryBudget(ratio=0.1, max_tokens=5)
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.skipped = 0
+
+    def observe(self, seconds: float) -> None:
+        """记录一次成功抓取的耗时"""
+        with self._lock:
+            self._samples.append(seconds)
+
+    def delay(self) -> Optional[float]:
+        """发起对冲前等待的时间，样本不足时返回None（不对冲）"""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < self.min_samples:
+            return None
+        return max(self.min_delay, percentile(samples, self.quantile))
+
+    def on_query(self) -> None:
+        self.budget.deposit()
+
+    def try_hedge(self) -> bool:
+        """申请发起一次对冲，预算不足时返回False"""
+        if self.budget.withdraw():
+            with self._lock:
+                self.hedged += 1
+            return True
+        with self._lock:
+            self.skipped += 1
+        return False
+
+    def record_win(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.delay()
+        with self._lock:
+            return {
+                "delay": round(delay, 3) if delay is not None else None,
+                "samples": len(self._samples),
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "skipped": self.skipped,
+                "budget_tokens": round(self.budget.tokens, 2),
+            }
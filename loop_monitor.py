@@ -0,0 +1,175 @@
+"""事件循环延迟与线程池饱和监控模块
+
+每个工作线程有自己的事件循环（见 app.get_or_create_event_loop）。后台线程每隔 interval
+向每个正在运行的循环投递一个探测回调，回调执行时记录调度延迟（loop lag）。
+探测超过 block_threshold 仍未执行说明循环被同步调用阻塞：记录一次警告，附带该循环线程当前的调用栈，
+用于定位占用事件循环的代码。循环空闲（未运行）时不探测。
+
+同时检查线程池：各优先级通道队首任务的等待时间超过 queue_wait_threshold 时记录警告（限频）。
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _LoopEntry:
+    __slots__ = (
+        "loop",
+        "thread_id",
+        "thread_name",
+        "token",
+        "pending_since",
+        "reported",
+        "last_lag",
+        "max_lag",
+        "probes",
+        "blocked",
+    )
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.loop = loop
+        self.thread_id = threading.get_ident()
+        self.thread_name = threading.current_thread().name
+        self.token = 0
+        self.pending_since: Optional[float] = None
+        self.reported = False
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.probes = 0
+        self.blocked = 0
+
+
+class LoopMonitor:
+    """事件循环延迟与线程池饱和监控"""
+
+    def __init__(
+        self,
+        interval: float = 0.25,
+        block_threshold: float = 0.2,
+        queue_wait_threshold: float = 2.0,
+        warn_interval: float = 30,
+        stack_depth: int = 25,
+        queue_waits: Optional[Callable[[], Dict[str, float]]] = None,
+        log: Optional[logging.Logger] = None,
+    ):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.queue_wait_threshold = queue_wait_threshold
+        self.warn_interval = warn_interval
+        self.stack_depth = stack_depth
+        self.queue_waits = queue_waits
+        self.log = log or logger
+        self._loops: Dict[int, _LoopEntry] = {}
+        self._lock = threading.Lock()
+        self._last_queue_warning = 0.0
+        self.queue_warnings = 0
+        self.max_queue_wait: Dict[str, float] = {}
+
+    def register(self, loop: asyncio.AbstractEventLoop) -> None:
+        """在创建事件循环的线程中登记该循环"""
+        with self._lock:
+            self._loops[id(loop)] = _LoopEntry(loop)
+
+    def run(self) -> None:
+        """监控线程主循环"""
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                self.log.warning(f"事件循环监控出错: {e}")
+
+    def check(self) -> None:
+        now = time.monotonic()
+        with self._lock:
+            entries = list(self._loops.items())
+        for key, entry in entries:
+            if entry.loop.is_closed():
+                with self._lock:
+                    self._loops.pop(key, None)
+                continue
+            self._check_loop(entry, now)
+        if self.queue_waits is not None:
+            self._check_queue(now)
+
+    def _check_loop(self, entry: _LoopEntry, now: float) -> None:
+        loop = entry.loop
+        if not loop.is_running():
+            # 空闲的循环不探测，作废尚未执行的探测，避免下次运行时误报
+            entry.token += 1
+            entry.pending_since = None
+            entry.reported = False
+            return
+
+        if entry.pending_since is not None:
+            blocked_for = now - entry.pending_since
+            if blocked_for >= self.block_threshold and not entry.reported:
+                entry.reported = True
+                entry.blocked += 1
+                self.log.warning(
+                    f"事件循环被阻塞 {blocked_for * 1000:.0f}ms（线程 {entry.thread_name}）:\n"
+                    f"{self._stack(loop, entry)}"
+                )
+            return
+
+        entry.token += 1
+        entry.pending_since = now
+        try:
+            loop.call_soon_threadsafe(self._on_probe, entry, entry.token, now)
+        except RuntimeError:  # 循环已关闭
+            entry.pending_since = None
+
+    def _on_probe(self, entry: _LoopEntry, token: int, sent: float) -> None:
+        if token != entry.token:
+            return
+        lag = time.monotonic() - sent
+        entry.pending_since = None
+        entry.reported = False
+        entry.last_lag = lag
+        entry.max_lag = max(entry.max_lag, lag)
+        entry.probes += 1
+
+    def _stack(self, loop: asyncio.AbstractEventLoop, entry: _LoopEntry) -> str:
+        # 循环可能由其他线程驱动（如浏览器池回收空闲浏览器时）
+        thread_id = getattr(loop, "_thread_id", None) or entry.thread_id
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            return "  (无法获取调用栈)"
+        return "".join(traceback.format_stack(frame)[-self.stack_depth :])
+
+    def _check_queue(self, now: float) -> None:
+        waits = self.queue_waits()
+        for lane, wait in waits.items():
+            self.max_queue_wait[lane] = max(self.max_queue_wait.get(lane, 0.0), wait)
+        saturated = {lane: wait for lane, wait in waits.items() if wait >= self.queue_wait_threshold}
+        if saturated and now - self._last_queue_warning >= self.warn_interval:
+            self._last_queue_warning = now
+            self.queue_warnings += 1
+            detail = ", ".join(f"{lane} {wait:.1f}s" for lane, wait in saturated.items())
+            self.log.warning(f"线程池饱和，队首任务等待: {detail}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = list(self._loops.values())
+        return {
+            "loops": {
+                entry.thread_name: {
+                    "running": entry.loop.is_running(),
+                    "lag_ms": round(entry.last_lag * 1000, 1),
+                    "max_lag_ms": round(entry.max_lag * 1000, 1),
+                    "probes": entry.probes,
+                    "blocked": entry.blocked,
+                }
+                for entry in entries
+            },
+            "block_threshold_ms": round(self.block_threshold * 1000),
+            "queue_warnings": self.queue_warnings,
+            "max_queue_wait": {lane: round(wait, 3) for lane, wait in self.max_queue_wait.items()},
+        }
@@ -0,0 +1,185 @@
+"""内存管理模块
+
+统计Python进程及其全部子进程（Playwright驱动与Chromium）的RSS：
+- 超过软限制时，新的浏览器上下文排队等待内存回落，等待超时则拒绝
+  （在事件循环中异步轮询，不阻塞循环，等待可被取消）
+- 超过硬限制时，由调用方回收浏览器（见 browser_pool）
+优先使用 psutil（可选依赖），否则读取 /proc（仅Linux）；两者都不可用时不做限制。
+"""
+
+import asyncio
+import os
+import threading
+import time
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, List
+
+try:  # 可选依赖: psutil 跨平台进程信息
+    import psutil
+except ImportError:  # pragma: no cover - 取决于部署环境
+    psutil = None
+
+PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+MB = 1024 * 1024
+
+
+def _proc_children() -> Dict[int, List[int]]:
+    """读取 /proc 构建 ppid -> [pid] 映射"""
+    children: Dict[int, List[int]] = {}
+    for entry in Path("/proc").iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / "stat").read_text()
+        except OSError:
+            continue
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry.name))
+    return children
+
+
+def _proc_rss(pid: int) -> int:
+    try:
+        return int(Path(f"/proc/{pid}/statm").read_text().split()[1]) * PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return 0
+
+
+def process_tree_rss(pid: int) -> Dict[str, int]:
+    """返回 {python: 本进程RSS, browser: 全部子孙进程RSS之和, processes: 子孙进程数}"""
+    if psutil is not None:
+        try:
+            process = psutil.Process(pid)
+            descendants = process.children(recursive=True)
+            browser = 0
+            for child in descendants:
+                try:
+                    browser += child.memory_info().rss
+                except psutil.Error:
+                    continue
+            return {
+                "python": process.memory_info().rss,
+                "browser": browser,
+                "processes": len(descendants),
+            }
+        except psutil.Error:
+            pass
+
+    if not Path("/proc").exists():
+        return {"python": 0, "browser": 0, "processes": 0}
+
+    children = _proc_children()
+    stack = list(children.get(pid, []))
+    browser = 0
+    count = 0
+    while stack:
+        child = stack.pop()
+        stack.extend(children.get(child, []))
+        browser += _proc_rss(child)
+        count += 1
+    return {"python": _proc_rss(pid), "browser": browser, "processes": count}
+
+
+class MemoryGovernor:
+    """基于进程树RSS的浏览器上下文准入控制"""
+
+    def __init__(
+        self,
+        soft_limit_mb: float = 700,
+        hard_limit_mb: float = 900,
+        sample_interval: float = 0.5,
+        pid: int = 0,
+    ):
+        self.soft_limit = soft_limit_mb * MB
+        self.hard_limit = hard_limit_mb * MB
+        self.sample_interval = sample_interval
+        self.pid = pid or os.getpid()
+        self._sample: Dict[str, int] = {"python": 0, "browser": 0, "processes": 0, "total": 0}
+        self._sampled_at = 0.0
+        self._peak = 0
+        self._active = 0
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.rejected = 0
+
+    def sample(self) -> Dict[str, int]:
+        """进程树RSS（按 sample_interval 缓存）"""
+        now = time.monotonic()
+        if now - self._sampled_at >= self.sample_interval:
+            sample = process_tree_rss(self.pid)
+            sample["total"] = sample["python"] + sample["browser"]
+            self._sample = sample
+            self._sampled_at = now
+            self._peak = max(self._peak, sample["total"])
+        return self._sample
+
+    def total(self) -> int:
+        return self.sample().get("total", 0)
+
+    def over_soft(self) -> bool:
+        return self.soft_limit > 0 and self.total() >= self.soft_limit
+
+    def over_hard(self) -> bool:
+        return self.hard_limit > 0 and self.total() >= self.hard_limit
+
+    def try_admit(self) -> bool:
+        """不等待地申请创建浏览器上下文，超过软限制时返回False
+
+        没有进行中的上下文时总是放行，避免基线内存超过软限制时永远无法抓取。
+        """
+        with self._lock:
+            if self.over_soft() and self._active > 0:
+                return False
+            self._active += 1
+            return True
+
+    async def admit(self, timeout: float) -> bool:
+        """申请创建浏览器上下文；超过软限制时每 sample_interval 重试一次，超时返回False
+
+        等待期间让出事件循环，任务被取消时直接抛出 CancelledError（未占用名额）。
+        """
+        if self.try_admit():
+            return True
+        with self._lock:
+            self.queued += 1
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                with self._lock:
+                    self.rejected += 1
+                return False
+            await asyncio.sleep(min(remaining, self.sample_interval))
+            if self.try_admit():
+                return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._active -= 1
+
+    @asynccontextmanager
+    async def admission(self, timeout: float) -> AsyncIterator[bool]:
+        """admit() 的上下文管理形式：产出是否放行，放行时在退出（含异常与取消）时释放名额"""
+        admitted = await self.admit(timeout)
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                self.release()
+
+    def stats(self) -> Dict[str, Any]:
+        sample = self.sample()
+        with self._lock:
+            return {
+                "python_mb": round(sample["python"] / MB, 1),
+                "browser_mb": round(sample["browser"] / MB, 1),
+                "total_mb": round(sample["total"] / MB, 1),
+                "peak_mb": round(self._peak / MB, 1),
+                "browser_processes": sample["processes"],
+                "soft_limit_mb": round(self.soft_limit / MB),
+                "hard_limit_mb": round(self.hard_limit / MB),
+                "active_contexts": self._active,
+                "queued": self.queued,
+                "rejected": self.rejected,
+            }
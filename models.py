@@ -0,0 +1,257 @@
+"""查询结果数据模型
+
+每日数据以列数组存储（日期为序数、计数为整数、金额为以分为单位的整数），
+在抓取时一次性解析，之后的汇总、缓存与序列化均直接使用类型化的列，不再重复解析字符串。
+"""
+
+import re
+from array import array
+from dataclasses import dataclass
+from datetime import date
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+# 标准表头，与前端 DISPLAY_COLUMNS 一致
+STANDARD_HEADERS = [
+    "日期",
+    "移动拉新数",
+    "移动转存数",
+    "会员订单数",
+    "会员订单金额",
+    "会员佣金（元）",
+]
+DATE_COLUMN = STANDARD_HEADERS[0]
+INT_COLUMNS = ("移动拉新数", "移动转存数", "会员订单数")
+AMOUNT_COLUMNS = ("会员订单金额", "会员佣金（元）")
+
+_CENT = Decimal("0.01")
+# 单元格数值的位数上限（整数部分最多15位）：金额以分存入 array("q")，需低于 2**63 / 100
+_MAX_CELL_DIGITS = 15
+# 日期单元格：2024-01-05、2024/1/5、2024年1月5日
+_DATE_PATTERN = re.compile(r"(\d{4})\s*[-/年]\s*(\d{1,2})\s*[-/月]\s*(\d{1,2})\s*日?")
+
+
+def parse_date(value: Any) -> Optional[date]:
+    """解析日期单元格，支持 YYYY-MM-DD、YYYY/MM/DD 与 YYYY年MM月DD日，月、日可以不补零"""
+    match = _DATE_PATTERN.fullmatch(str(value).strip())
+    if match is None:
+        return None
+    try:
+        return date(*map(int, match.groups()))
+    except ValueError:
+        return None
+
+
+def parse_decimal(value: Any) -> Optional[Decimal]:
+    """解析数值单元格（允许千分位逗号），无法解析时返回None
+
+    NaN/Infinity 以及整数部分超过 _MAX_CELL_DIGITS 位的值（无法存入64位整数列）同样视为无法解析。
+    """
+    if value is None:
+        return None
+    text = str(value).strip().replace(",", "")
+    if not text:
+        return None
+    try:
+        number = Decimal(text)
+    except InvalidOperation:
+        return None
+    # adjusted() 不受decimal上下文限制，极大的指数也不会溢出
+    if not number.is_finite() or number.adjusted() >= _MAX_CELL_DIGITS:
+        return None
+    return number
+
+
+def parse_int(value: Any) -> int:
+    number = parse_decimal(value)
+    return int(number) if number is not None else 0
+
+
+def parse_cents(value: Any) -> int:
+    number = parse_decimal(value)
+    if number is None:
+        return 0
+    return int((number * 100).to_integral_value(ROUND_HALF_UP))
+
+
+@dataclass(slots=True)
+class DailyRow:
+    """单日数据行"""
+
+    day: Optional[date]
+    new_users: int
+    deposits: int
+    orders: int
+    order_amount: Decimal
+    commission: Decimal
+    label: Optional[str] = None  # 日期列无法解析时（如合计行）保留原文
+
+    def to_strings(self) -> List[str]:
+        return [
+            self.label if self.day is None else self.day.isoformat(),
+            str(self.new_users),
+            str(self.deposits),
+            str(self.orders),
+            f"{self.order_amount:.2f}",
+            f"{self.commission:.2f}",
+        ]
+
+
+class DailyTable:
+    """列数组存储的每日数据表"""
+
+    __slots__ = (
+        "days",
+        "new_users",
+        "deposits",
+        "orders",
+        "order_amount_cents",
+        "commission_cents",
+        "labels",
+    )
+
+    def __init__(self):
+        self.days = array("i")  # date.toordinal()，0表示非日期行
+        self.new_users = array("q")
+        self.deposits = array("q")
+        self.orders = array("q")
+        self.order_amount_cents = array("q")
+        self.commission_cents = array("q")
+        self.labels: Dict[int, str] = {}  # 非日期行的原始文本（稀疏）
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[Any]]) -> "DailyTable":
+        """从字符串行解析，缺失的单元格按0处理，多余的单元格被截断"""
+        table = cls()
+        for row in rows:
+            table.append(row)
+        return table
+
+    def append(self, row: Sequence[Any]) -> None:
+        cells = list(row[: len(STANDARD_HEADERS)])
+        cells += ["0"] * (len(STANDARD_HEADERS) - len(cells))
+
+        day = parse_date(cells[0])
+        if day is None:
+            self.labels[len(self.days)] = str(cells[0]).strip()
+        self.days.append(day.toordinal() if day else 0)
+        self.new_users.append(parse_int(cells[1]))
+        self.deposits.append(parse_int(cells[2]))
+        self.orders.append(parse_int(cells[3]))
+        self.order_amount_cents.append(parse_cents(cells[4]))
+        self.commission_cents.append(parse_cents(cells[5]))
+
+    def _append_from(self, other: "DailyTable", index: int) -> None:
+        if index in other.labels:
+            self.labels[len(self.days)] = other.labels[index]
+        self.days.append(other.days[index])
+        self.new_users.append(other.new_users[index])
+        self.deposits.append(other.deposits[index])
+        self.orders.append(other.orders[index])
+        self.order_amount_cents.append(other.order_amount_cents[index])
+        self.commission_cents.append(other.commission_cents[index])
+
+    def patch(self, other: "DailyTable") -> "DailyTable":
+        """用other中的行替换相同日期的行并补充新日期，返回新表（本表不变）
+
+        新日期按本表的排序方向插入：升序表追加在末尾，降序表插入在开头。
+        """
+        replacements = {
+            ordinal: index for index, ordinal in enumerate(other.days) if ordinal
+        }
+        existing = set(self.days)
+        new_indices = [
+            index
+            for index, ordinal in enumerate(other.days)
+            if ordinal and ordinal not in existing
+        ]
+        descending = len(self) > 1 and self.days[0] > self.days[-1]
+
+        table = DailyTable()
+        if descending:
+            for index in sorted(new_indices, key=lambda i: -other.days[i]):
+                table._append_from(other, index)
+        for index, ordinal in enumerate(self.days):
+            if ordinal in replacements:
+                table._append_from(other, replacements[ordinal])
+            else:
+                table._append_from(self, index)
+        if not descending:
+            for index in sorted(new_indices, key=lambda i: other.days[i]):
+                table._append_from(other, index)
+        return table
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def day(self, index: int) -> Optional[date]:
+        ordinal = self.days[index]
+        return date.fromordinal(ordinal) if ordinal else None
+
+    def row(self, index: int) -> DailyRow:
+        return DailyRow(
+            day=self.day(index),
+            new_users=self.new_users[index],
+            deposits=self.deposits[index],
+            orders=self.orders[index],
+            order_amount=Decimal(self.order_amount_cents[index]) * _CENT,
+            commission=Decimal(self.commission_cents[index]) * _CENT,
+            label=self.labels.get(index),
+        )
+
+    def __iter__(self) -> Iterator[DailyRow]:
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def date_strings(self) -> List[str]:
+        return [
+            self.labels[i] if not ordinal else date.fromordinal(ordinal).isoformat()
+            for i, ordinal in enumerate(self.days)
+        ]
+
+    def to_rows(self) -> List[List[str]]:
+        """转换为前端使用的字符串二维数组"""
+        return [
+            [day, str(n), str(d), str(o), f"{a / 100:.2f}", f"{c / 100:.2f}"]
+            for day, n, d, o, a, c in zip(
+                self.date_strings(),
+                self.new_users,
+                self.deposits,
+                self.orders,
+                self.order_amount_cents,
+                self.commission_cents,
+            )
+        ]
+
+    def to_columns(self) -> List[List[Any]]:
+        """转换为列数组（数值列为数字类型），按 STANDARD_HEADERS 顺序"""
+        return [
+            self.date_strings(),
+            self.new_users.tolist(),
+            self.deposits.tolist(),
+            self.orders.tolist(),
+            [cents / 100 for cents in self.order_amount_cents],
+            [cents / 100 for cents in self.commission_cents],
+        ]
+
+    def daily_count(self) -> int:
+        """日期行数（不含“合计”等非日期行）"""
+        return len(self.days) - len(self.labels)
+
+    def totals(self) -> Dict[str, Any]:
+        """日期行的数值列总计，金额以元为单位
+
+        “合计”等非日期行（labels）不计入，避免与各日数据重复累加；
+        与分析存储（只保存日期行）的汇总口径一致。
+        """
+
+        def total(column: array) -> int:
+            return sum(column) - sum(column[index] for index in self.labels)
+
+        return {
+            "移动拉新数": total(self.new_users),
+            "移动转存数": total(self.deposits),
+            "会员订单数": total(self.orders),
+            "会员订单金额": total(self.order_amount_cents) / 100,
+            "会员佣金（元）": total(self.commission_cents) / 100,
+        }
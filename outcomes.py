@@ -0,0 +1,65 @@
+"""抓取结果类型模块
+
+每次抓取都有明确的结果类型，随查询结果返回并计入指标：
+    ok            解析到数据（至少一行解析出日期）
+    empty         页面正常返回且确认没有数据（有标准表头无数据行，或页面显示“暂无数据”）
+    parse_failed  页面返回但未能解析出表格（页面结构变化、错误页等）
+    timeout       页面加载或等待结果超时
+    blocked       会话失效/鉴权失败，远程站点已熔断，或本地内存不足（后者不计入熔断器与结果计数）
+    error         其他未分类的错误
+只有 ok 与 empty 的结果可以写入缓存。
+"""
+
+import threading
+from typing import Dict, Sequence
+
+from models import STANDARD_HEADERS, DailyTable
+
+OUTCOME_OK = "ok"
+OUTCOME_EMPTY = "empty"
+OUTCOME_PARSE_FAILED = "parse_failed"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_BLOCKED = "blocked"
+OUTCOME_ERROR = "error"
+
+CACHEABLE_OUTCOMES = (OUTCOME_OK, OUTCOME_EMPTY)
+
+# 失败结果对应的HTTP状态码
+OUTCOME_STATUS = {
+    OUTCOME_PARSE_FAILED: 502,
+    OUTCOME_BLOCKED: 503,
+    OUTCOME_TIMEOUT: 504,
+    OUTCOME_ERROR: 500,
+}
+
+
+def classify_extraction(headers: Sequence[str], table: DailyTable, empty: bool) -> str:
+    """根据页面内提取的表头、解析后的数据行与空数据标记确定结果类型
+
+    文本/启发式解析方式会把任意文本（错误页、“加载中…”、登录提示）解析成表头和数据行，
+    这些行都解析不出日期：没有日期行时只有空数据标记或标准表头才能确认为空，否则为 parse_failed。
+    """
+    if table.daily_count():
+        return OUTCOME_OK
+    if empty:
+        return OUTCOME_EMPTY
+    recognised = any(str(header).strip() in STANDARD_HEADERS for header in headers)
+    if recognised and not len(table):
+        return OUTCOME_EMPTY
+    return OUTCOME_PARSE_FAILED
+
+
+class OutcomeCounter:
+    """线程安全的结果类型计数"""
+
+    def __init__(self):
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, outcome: str) -> None:
+        with self._lock:
+            self._counts[outcome] = self._counts.get(outcome, 0) + 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return dict(self._counts)
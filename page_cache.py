@@ -0,0 +1,62 @@
+"""页面渲染缓存模块
+
+缓存与请求无关的页面渲染结果（含ETag与预压缩的响应体），
+仅在签名（模板修改时间、静态资源哈希等）变化时重新渲染；签名检查按时间间隔节流。
+"""
+
+import gzip
+import hashlib
+import threading
+import time
+from typing import Any, Callable, Optional
+
+try:  # 可选依赖: brotli 压缩
+    import brotli
+except ImportError:  # pragma: no cover - 取决于部署环境
+    brotli = None
+
+
+class RenderedPage:
+    """渲染后的页面"""
+
+    __slots__ = ("body", "gzip_body", "br_body", "etag", "signature")
+
+    def __init__(self, body: bytes, signature: Any):
+        self.body = body
+        self.gzip_body = gzip.compress(body, compresslevel=9, mtime=0)
+        self.br_body = brotli.compress(body) if brotli is not None else None
+        self.etag = hashlib.sha256(body).hexdigest()[:16]
+        self.signature = signature
+
+
+class PageCache:
+    """线程安全的单页面渲染缓存"""
+
+    def __init__(
+        self,
+        render: Callable[[], str],
+        signature: Callable[[], Any],
+        check_interval: float = 2.0,
+    ):
+        self._render = render
+        self._signature = signature
+        self.check_interval = check_interval
+        self._page: Optional[RenderedPage] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.renders = 0
+
+    def get(self) -> RenderedPage:
+        """返回缓存的页面，签名变化时重新渲染"""
+        page = self._page
+        now = time.monotonic()
+        if page is not None and now - self._checked_at < self.check_interval:
+            return page
+
+        with self._lock:
+            signature = self._signature()
+            self._checked_at = now
+            if self._page is None or self._page.signature != signature:
+                self._page = RenderedPage(self._render().encode("utf-8"), signature)
+                self.renders += 1
+            return self._page
@@ -0,0 +1,212 @@
+"""优先级线程池模块
+
+替代 ThreadPoolExecutor，按优先级通道调度任务：
+    interactive  用户正在等待的查询
+    batch        批量查询（请求中指定 priority=batch）
+    background   预取、后台刷新缓存等
+每个通道有独立的队列，通道之间按权重做平滑加权轮询；reserved 个工作线程只运行 interactive 任务，
+batch/background 最多同时占用 max_workers - reserved 个线程。
+
+background 任务可在抓取阶段之间的安全点被抢占：有 interactive 任务排队且没有空闲线程时，
+checkpoint() 抛出 Preempted，由任务自行决定是否重新排队。
+
+工作线程是固定的（每个线程有自己的事件循环与浏览器，见 browser_pool），按需创建，不会退出。
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+INTERACTIVE = "interactive"
+BATCH = "batch"
+BACKGROUND = "background"
+LANES = (INTERACTIVE, BATCH, BACKGROUND)
+
+
+class Preempted(Exception):
+    """background 任务在安全点让出工作线程"""
+
+
+class _WorkItem:
+    __slots__ = ("future", "fn", "args", "kwargs", "lane", "submitted")
+
+    def __init__(self, future: Future, fn: Callable, args, kwargs, lane: str):
+        self.future = future
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.lane = lane
+        self.submitted = time.monotonic()
+
+
+class PriorityExecutor:
+    """带优先级通道与预留容量的线程池"""
+
+    def __init__(
+        self,
+        max_workers: int,
+        weights: Optional[Dict[str, float]] = None,
+        reserved: int = 1,
+        thread_name_prefix: str = "",
+    ):
+        self.max_workers = max_workers
+        self.weights = {INTERACTIVE: 6, BATCH: 3, BACKGROUND: 1}
+        self.weights.update(weights or {})
+        # 至少保留一个线程给 batch/background，避免其永远无法运行
+        self.reserved = max(0, min(reserved, max_workers - 1))
+        self.thread_name_prefix = thread_name_prefix
+        self._queues: Dict[str, Deque[_WorkItem]] = {lane: deque() for lane in LANES}
+        self._running = {lane: 0 for lane in LANES}
+        self._credit = {lane: 0.0 for lane in LANES}
+        self._condition = threading.Condition()
+        self._threads: List[threading.Thread] = []
+        self._idle = 0
+        self._local = threading.local()
+        self._shutdown = False
+        self._submitted = {lane: 0 for lane in LANES}
+        self._wait_total = {lane: 0.0 for lane in LANES}
+        self._wait_max = {lane: 0.0 for lane in LANES}
+        self.preempted = 0
+
+    def submit(self, fn: Callable, *args, lane: str = INTERACTIVE, **kwargs) -> Future:
+        if lane not in self._queues:
+            raise ValueError(f"未知的优先级通道: {lane}")
+        future: Future = Future()
+        with self._condition:
+            if self._shutdown:
+                raise RuntimeError("cannot schedule new futures after shutdown")
+            self._queues[lane].append(_WorkItem(future, fn, args, kwargs, lane))
+            self._submitted[lane] += 1
+            queued = sum(len(queue) for queue in self._queues.values())
+            if self._idle < queued and len(self._threads) < self.max_workers:
+                self._start_worker()
+            self._condition.notify_all()
+        return future
+
+    def _start_worker(self) -> None:
+        thread = threading.Thread(
+            target=self._worker,
+            name=f"{self.thread_name_prefix}{len(self._threads)}",
+            daemon=True,
+        )
+        self._threads.append(thread)
+        thread.start()
+
+    def _eligible(self, lane: str) -> bool:
+        if lane == INTERACTIVE:
+            return True
+        shared = self._running[BATCH] + self._running[BACKGROUND]
+        return shared < self.max_workers - self.reserved
+
+    def _next(self) -> Optional[_WorkItem]:
+        """平滑加权轮询选择下一个任务（调用方持有锁）"""
+        lanes = [lane for lane in LANES if self._queues[lane] and self._eligible(lane)]
+        if not lanes:
+            return None
+        total = sum(self.weights[lane] for lane in lanes)
+        for lane in lanes:
+            self._credit[lane] += self.weights[lane]
+        lane = max(lanes, key=lambda name: self._credit[name])
+        self._credit[lane] -= total
+        item = self._queues[lane].popleft()
+        waited = time.monotonic() - item.submitted
+        self._wait_total[lane] += waited
+        self._wait_max[lane] = max(self._wait_max[lane], waited)
+        self._running[lane] += 1
+        return item
+
+    def _worker(self) -> None:
+        while True:
+            with self._condition:
+                item = self._next()
+                while item is None:
+                    if self._shutdown and not any(self._queues.values()):
+                        return
+                    self._idle += 1
+                    self._condition.wait()
+                    self._idle -= 1
+                    item = self._next()
+
+            lane = item.lane
+            if item.future.set_running_or_notify_cancel():
+                self._local.lane = lane
+                try:
+                    item.future.set_result(item.fn(*item.args, **item.kwargs))
+                except BaseException as e:
+                    item.future.set_exception(e)
+                finally:
+                    self._local.lane = None
+            item = None  # 不持有已完成任务的引用
+
+            with self._condition:
+                self._running[lane] -= 1
+                self._condition.notify_all()
+
+    def current_lane(self) -> Optional[str]:
+        """当前工作线程正在运行的任务所属通道"""
+        return getattr(self._local, "lane", None)
+
+    def checkpoint(self) -> None:
+        """background 任务的安全点：有 interactive 任务在排队等待线程时抛出 Preempted"""
+        if self.current_lane() != BACKGROUND:
+            return
+        with self._condition:
+            waiting = len(self._queues[INTERACTIVE]) > self._idle
+            if waiting:
+                self.preempted += 1
+        if waiting:
+            raise Preempted("有交互查询在等待，后台任务让出工作线程")
+
+    def free_workers(self) -> int:
+        """可立即运行新的 interactive 任务的线程数"""
+        with self._condition:
+            busy = sum(self._running.values())
+            queued = sum(len(queue) for queue in self._queues.values())
+            return max(0, self.max_workers - busy - queued)
+
+    def queue_waits(self) -> Dict[str, float]:
+        """各通道队首任务已等待的时间（秒），空队列不包含在内"""
+        now = time.monotonic()
+        with self._condition:
+            return {
+                lane: now - queue[0].submitted
+                for lane, queue in self._queues.items()
+                if queue
+            }
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False) -> None:
+        with self._condition:
+            self._shutdown = True
+            if cancel_futures:
+                for queue in self._queues.values():
+                    while queue:
+                        queue.popleft().future.cancel()
+            self._condition.notify_all()
+        if wait:
+            for thread in list(self._threads):
+                if thread is not threading.current_thread():
+                    thread.join()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._condition:
+            lanes = {}
+            for lane in LANES:
+                started = self._submitted[lane] - len(self._queues[lane])
+                lanes[lane] = {
+                    "queued": len(self._queues[lane]),
+                    "running": self._running[lane],
+                    "submitted": self._submitted[lane],
+                    "avg_wait": round(self._wait_total[lane] / started, 3) if started else 0.0,
+                    "max_wait": round(self._wait_max[lane], 3),
+                    "weight": self.weights[lane],
+                }
+            return {
+                "workers": len(self._threads),
+                "max_workers": self.max_workers,
+                "reserved_interactive": self.reserved,
+                "idle": self._idle,
+                "preempted": self.preempted,
+                "lanes": lanes,
+            }
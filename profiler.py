@@ -0,0 +1,266 @@
+"""按需性能剖析模块
+
+由管理接口启动一次剖析会话，覆盖接下来的 N 个查询请求或 T 秒：
+    cprofile  在查询请求线程（profile_request）与执行 run_async_task 的工作线程（profile_task）
+              上分别启用 cProfile，结束时合并，输出 .prof（pstats/snakeviz）与按累计耗时排序的文本
+    sampling  后台线程按 interval 采样全部线程的调用栈（含Flask线程与事件循环线程），
+              输出 collapsed stacks（.folded，可直接用于 flamegraph.pl / speedscope）
+可同时启用 tracemalloc，结束时输出与开始时相比的内存分配差异。
+
+Python 3.12 起 cProfile 基于进程级的 sys.monitoring，同一时刻只能有一个 cProfile 处于启用状态：
+启用失败（另一线程或其他剖析工具已启用）的线程不做剖析，计入 threads_skipped，请求照常执行。
+
+没有会话时各钩子只检查一个属性，不启用任何追踪。
+"""
+
+import cProfile
+import io
+import math
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+MODES = ("cprofile", "sampling")
+
+
+class ProfileSession:
+    """一次剖析会话"""
+
+    def __init__(
+        self,
+        mode: str,
+        requests: Optional[int],
+        seconds: float,
+        trace_memory: bool,
+        interval: float,
+    ):
+        self.mode = mode
+        self.requests = requests
+        self.seconds = seconds
+        self.trace_memory = trace_memory
+        self.interval = interval
+        self.started = datetime.now()
+        self.started_at = time.monotonic()
+        self.completed_requests = 0
+        self.profiles: List[cProfile.Profile] = []
+        self.threads_skipped = 0
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.snapshot: Optional[tracemalloc.Snapshot] = None
+        self.started_tracemalloc = False
+        self.finished = threading.Event()
+
+    @property
+    def name(self) -> str:
+        return f"{self.started:%Y%m%d-%H%M%S-%f}-{self.mode}"
+
+
+class Profiler:
+    """剖析会话管理"""
+
+    def __init__(self, output_dir: str, max_seconds: float = 300):
+        self.output_dir = Path(output_dir)
+        self.max_seconds = max_seconds
+        self.session: Optional[ProfileSession] = None
+        self.last_result: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def start(
+        self,
+        mode: str = "sampling",
+        requests: Optional[int] = None,
+        seconds: Optional[float] = None,
+        trace_memory: bool = False,
+        interval: float = 0.005,
+    ) -> Dict[str, Any]:
+        """启动剖析会话：requests 个查询完成或 seconds 秒后（以先到者为准）结束
+
+        seconds 必须在 (0, max_seconds] 之间，不指定时为 max_seconds。
+        """
+        if mode not in MODES:
+            raise ValueError(f"mode 必须为 {'/'.join(MODES)}")
+        if requests is not None and requests <= 0:
+            raise ValueError("requests 必须为正整数")
+        if seconds is not None and not (
+            math.isfinite(seconds) and 0 < seconds <= self.max_seconds
+        ):
+            raise ValueError(f"seconds 必须在 0 到 {self.max_seconds:g} 之间")
+        if not (math.isfinite(interval) and interval > 0):
+            raise ValueError("interval 必须为正数")
+        if requests is None and seconds is None:
+            raise ValueError("需要指定 requests 或 seconds")
+        seconds = seconds or self.max_seconds
+
+        with self._lock:
+            if self.session is not None:
+                raise RuntimeError("已有进行中的剖析会话")
+            session = ProfileSession(mode, requests, seconds, trace_memory, interval)
+            if trace_memory:
+                if not tracemalloc.is_tracing():
+                    tracemalloc.start(25)
+                    session.started_tracemalloc = True
+                session.snapshot = tracemalloc.take_snapshot()
+            self.session = session
+
+        if mode == "sampling":
+            threading.Thread(
+                target=self._sample, args=(session,), name="profiler_sampler", daemon=True
+            ).start()
+        timer = threading.Timer(seconds, self._expire, args=(session,))
+        timer.daemon = True
+        timer.start()
+        return self.status()
+
+    def _expire(self, session: ProfileSession) -> None:
+        if self.session is session:
+            self.stop()
+
+    @contextmanager
+    def _profile_thread(self, session: ProfileSession) -> Iterator[None]:
+        # 同一线程中嵌套调用时只由外层启用
+        if session.mode != "cprofile" or getattr(self._local, "profiling", False):
+            yield
+            return
+        profile: Optional[cProfile.Profile] = cProfile.Profile()
+        self._local.profiling = True
+        try:
+            profile.enable()
+        except ValueError:  # Python 3.12+: 已有其他 cProfile/剖析工具启用
+            profile = None
+            with self._lock:
+                session.threads_skipped += 1
+        try:
+            yield
+        finally:
+            self._local.profiling = False
+            if profile is not None:
+                profile.disable()
+                with self._lock:
+                    if not session.finished.is_set():
+                        session.profiles.append(profile)
+
+    @contextmanager
+    def profile_request(self) -> Iterator[None]:
+        """包裹一次查询请求，计入会话的请求数"""
+        session = self.session
+        if session is None:
+            yield
+            return
+        try:
+            with self._profile_thread(session):
+                yield
+        finally:
+            with self._lock:
+                session.completed_requests += 1
+                done = session.requests and session.completed_requests >= session.requests
+            if done and self.session is session:
+                self.stop()
+
+    @contextmanager
+    def profile_task(self) -> Iterator[None]:
+        """包裹 run_async_task 在工作线程上运行事件循环的过程"""
+        session = self.session
+        if session is None:
+            yield
+            return
+        with self._profile_thread(session):
+            yield
+
+    def _sample(self, session: ProfileSession) -> None:
+        """采样全部线程的调用栈，按 collapsed stacks 格式累计"""
+        own = threading.get_ident()
+        while not session.finished.wait(session.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            frames = sys._current_frames()
+            stacks = []
+            for ident, frame in frames.items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                stacks.append(";".join(reversed(stack)))
+            del frames
+            with self._lock:
+                session.stacks.update(stacks)
+                session.samples += 1
+
+    def stop(self) -> Optional[Dict[str, Any]]:
+        """结束当前会话并写出结果文件，没有会话时返回None"""
+        with self._lock:
+            session = self.session
+            if session is None:
+                return None
+            self.session = None
+            session.finished.set()
+            profiles = list(session.profiles)
+            stacks = Counter(session.stacks)
+
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        files: Dict[str, str] = {}
+        base = self.output_dir / session.name
+
+        if session.mode == "cprofile" and profiles:
+            stats = pstats.Stats(*profiles)
+            stats.dump_stats(f"{base}.prof")
+            files["prof"] = f"{base}.prof"
+            text = io.StringIO()
+            pstats.Stats(*profiles, stream=text).sort_stats("cumulative").print_stats(60)
+            Path(f"{base}.txt").write_text(text.getvalue(), encoding="utf-8")
+            files["stats"] = f"{base}.txt"
+        if session.mode == "sampling" and stacks:
+            lines = [f"{stack} {count}" for stack, count in stacks.most_common()]
+            Path(f"{base}.folded").write_text("\n".join(lines) + "\n", encoding="utf-8")
+            files["folded"] = f"{base}.folded"
+
+        if session.snapshot is not None:
+            snapshot = tracemalloc.take_snapshot()
+            if session.started_tracemalloc:
+                tracemalloc.stop()
+            diff = snapshot.compare_to(session.snapshot, "lineno")
+            lines = [str(stat) for stat in diff[:50]]
+            Path(f"{base}-tracemalloc.txt").write_text("\n".join(lines) + "\n", encoding="utf-8")
+            files["tracemalloc"] = f"{base}-tracemalloc.txt"
+
+        result = {
+            "name": session.name,
+            "mode": session.mode,
+            "duration": round(time.monotonic() - session.started_at, 3),
+            "requests": session.completed_requests,
+            "threads_profiled": len(profiles),
+            "threads_skipped": session.threads_skipped,
+            "samples": session.samples,
+            "files": files,
+        }
+        self.last_result = result
+        return result
+
+    def status(self) -> Dict[str, Any]:
+        session = self.session
+        if session is None:
+            return {"active": False, "last_result": self.last_result}
+        return {
+            "active": True,
+            "name": session.name,
+            "mode": session.mode,
+            "elapsed": round(time.monotonic() - session.started_at, 3),
+            "seconds": session.seconds,
+            "requests": session.requests,
+            "completed_requests": session.completed_requests,
+            "trace_memory": session.trace_memory,
+            "last_result": self.last_result,
+        }
@@ -0,0 +1,139 @@
+"""查询结果缓存模块
+
+按 (app_id, UK码, 开始日期, 结束日期) 缓存抓取结果及其汇总，LRU淘汰。
+包含今天的查询范围数据仍在变化，使用较短的TTL。
+过期但未超过最大陈旧时间的条目仍可使用（stale-while-revalidate），由调用方在后台刷新。
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime
+from typing import Any, Dict, Optional, Set, Tuple
+
+CacheKey = Tuple[str, str, str, str]
+
+
+class CacheEntry:
+    """缓存条目"""
+
+    __slots__ = ("result", "summary", "created_at", "expires_at")
+
+    def __init__(self, result: Dict[str, Any], summary: Dict[str, Any], ttl: float):
+        self.result = result
+        self.summary = summary
+        self.created_at = time.time()
+        self.expires_at = self.created_at + ttl
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.created_at
+
+    @property
+    def created_day(self) -> date:
+        """抓取当天的日期"""
+        return date.fromtimestamp(self.created_at)
+
+    @property
+    def as_of(self) -> str:
+        """数据抓取时间（ISO格式）"""
+        return datetime.fromtimestamp(self.created_at).isoformat(timespec="seconds")
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class QueryCache:
+    """线程安全的查询结果缓存"""
+
+    def __init__(self, max_entries: int = 512, ttl: float = 3600, today_ttl: float = 300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.today_ttl = today_ttl
+        self._entries: "OrderedDict[CacheKey, CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: Set[CacheKey] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(app_id: str, uk_code: str, start_date: str, end_date: str) -> CacheKey:
+        return (app_id, uk_code, start_date, end_date)
+
+    def ttl_for(self, end_date: str) -> float:
+        """包含今天的查询范围使用较短的TTL"""
+        if end_date >= date.today().isoformat():
+            return self.today_ttl
+        return self.ttl
+
+    def get(self, key: CacheKey) -> Optional[CacheEntry]:
+        """获取未过期的缓存条目"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or not entry.is_fresh():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def lookup(self, key: CacheKey, max_stale: float) -> Tuple[Optional[CacheEntry], bool]:
+        """获取可用的缓存条目，返回 (条目, 是否未过期)
+
+        已过期但抓取时间在 max_stale 秒以内的条目仍然返回，由调用方决定是否后台刷新。
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (not entry.is_fresh() and entry.age >= max_stale):
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            if entry.is_fresh():
+                self.hits += 1
+                return entry, True
+            self.stale_hits += 1
+            return entry, False
+
+    def peek(self, key: CacheKey) -> Optional[CacheEntry]:
+        """获取条目（不论是否过期），不影响命中统计与LRU顺序"""
+        with self._lock:
+            return self._entries.get(key)
+
+    def begin_refresh(self, key: CacheKey) -> bool:
+        """标记条目正在后台刷新，已在刷新中时返回False，避免重复抓取"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: CacheKey) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def set(
+        self,
+        key: CacheKey,
+        result: Dict[str, Any],
+        summary: Dict[str, Any],
+        ttl: Optional[float] = None,
+    ) -> CacheEntry:
+        """写入缓存条目（ttl默认按查询范围确定），超出容量时淘汰最久未使用的条目"""
+        entry = CacheEntry(result, summary, self.ttl_for(key[3]) if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshing": len(self._refreshing),
+            }
@@ -0,0 +1,201 @@
+"""请求时间线追踪模块
+
+按采样率（或管理员请求显式要求）为 /api/query 记录时间线，输出 Chrome trace-event JSON，
+可直接在 chrome://tracing 或 Perfetto 中打开。每个阶段为一个 complete 事件（ph=X），
+tid 为执行该阶段的线程（Flask请求线程、执行抓取的工作线程），并附带线程名元数据。
+
+当前追踪保存在 ContextVar 中：请求线程中设置，提交到线程池时由 propagate 复制上下文带到工作线程，
+事件循环中创建的任务会继承该上下文。没有追踪时 span/record 不做任何记录。
+
+追踪文件由后台线程异步写入 output_dir，目录中最多保留 max_files 个文件（删除最旧的）；
+写入队列已满时丢弃并计数。
+"""
+
+import contextvars
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+current_trace: contextvars.ContextVar[Optional["Trace"]] = contextvars.ContextVar(
+    "current_trace", default=None
+)
+
+
+class Trace:
+    """一次请求的时间线"""
+
+    def __init__(self, trace_id: str):
+        self.trace_id = trace_id
+        self.origin = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self._threads: Dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def now(self) -> float:
+        return time.perf_counter()
+
+    def complete(
+        self, name: str, start: float, end: float, cat: str = "app", **args: Any
+    ) -> None:
+        """记录 [start, end]（perf_counter秒）的一个阶段"""
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": round((start - self.origin) * 1e6, 1),
+            "dur": round((end - start) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": thread.ident,
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+            self._threads.setdefault(thread.ident, thread.name)
+
+    def to_json(self) -> Dict[str, Any]:
+        with self._lock:
+            events = list(self.events)
+            threads = dict(self._threads)
+        pid = os.getpid()
+        metadata = [
+            {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        return {
+            "traceEvents": metadata + events,
+            "displayTimeUnit": "ms",
+            "otherData": {"trace_id": self.trace_id},
+        }
+
+
+@contextmanager
+def span(name: str, cat: str = "app", **args: Any) -> Iterator[None]:
+    """在当前追踪中记录一个阶段"""
+    trace = current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = trace.now()
+    try:
+        yield
+    finally:
+        trace.complete(name, start, trace.now(), cat, **args)
+
+
+def record(name: str, start: float, cat: str = "app", **args: Any) -> None:
+    """记录从 start（time.perf_counter()）到现在的阶段"""
+    trace = current_trace.get()
+    if trace is not None:
+        trace.complete(name, start, trace.now(), cat, **args)
+
+
+def propagate(fn: Callable) -> Callable:
+    """把当前追踪带到线程池任务中，并记录任务在线程池中排队等待的时间"""
+    trace = current_trace.get()
+    if trace is None:
+        return fn
+    context = contextvars.copy_context()
+    queued = trace.now()
+
+    def run(*args, **kwargs):
+        trace.complete("executor_queue", queued, trace.now(), "executor")
+        return context.run(fn, *args, **kwargs)
+
+    return run
+
+
+class TraceRecorder:
+    """追踪采样与异步写入"""
+
+    def __init__(
+        self,
+        output_dir: str,
+        sample_rate: float = 0.0,
+        max_files: int = 200,
+        queue_size: int = 64,
+    ):
+        self.output_dir = Path(output_dir)
+        self.sample_rate = sample_rate
+        self.max_files = max_files
+        self._queue: "queue.Queue[Trace]" = queue.Queue(maxsize=queue_size)
+        self._files: Optional[deque] = None
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.written = 0
+        self.dropped = 0
+
+    def should_trace(self, forced: bool = False) -> bool:
+        return forced or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    @contextmanager
+    def activate(self, trace: Trace) -> Iterator[Trace]:
+        """在当前上下文中启用追踪，结束后提交异步写入"""
+        token = current_trace.set(trace)
+        try:
+            yield trace
+        finally:
+            current_trace.reset(token)
+            self.submit(trace)
+
+    def submit(self, trace: Trace) -> None:
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(trace)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _ensure_writer(self) -> None:
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(
+                    target=self._write_loop, name="trace_writer", daemon=True
+                )
+                self._writer.start()
+
+    def _write_loop(self) -> None:
+        while True:
+            trace = self._queue.get()
+            try:
+                self._write(trace)
+            except Exception as e:
+                logger.warning(f"写入追踪文件失败: {e}")
+
+    def _write(self, trace: Trace) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self._files is None:
+            existing = sorted(self.output_dir.glob("*.json"), key=lambda p: p.stat().st_mtime)
+            self._files = deque(existing)
+        path = self.output_dir / f"{trace.trace_id}.json"
+        path.write_text(json.dumps(trace.to_json(), ensure_ascii=False), encoding="utf-8")
+        self._files.append(path)
+        while len(self._files) > self.max_files:
+            oldest = self._files.popleft()
+            try:
+                oldest.unlink()
+            except OSError:
+                pass
+        with self._lock:
+            self.written += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "sample_rate": self.sample_rate,
+                "written": self.written,
+                "dropped": self.dropped,
+                "pending": self._queue.qsize(),
+                "max_files": self.max_files,
+            }
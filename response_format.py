@@ -0,0 +1,183 @@
+"""查询结果响应格式模块
+
+负责查询结果的序列化协商（行式JSON / 列式JSON / msgpack）以及响应压缩（gzip / brotli），
+与Node版本中 compression 中间件的行为保持一致。
+"""
+
+import gzip
+import json
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+from models import AMOUNT_COLUMNS, INT_COLUMNS, DailyTable
+
+try:  # 可选依赖: msgpack 二进制序列化
+    import msgpack
+except ImportError:  # pragma: no cover - 取决于部署环境
+    msgpack = None
+
+try:  # 可选依赖: brotli 压缩
+    import brotli
+except ImportError:  # pragma: no cover - 取决于部署环境
+    brotli = None
+
+
+# 响应格式
+FORMAT_ROWS = "rows"  # 默认格式: headers + rows(字符串二维数组)，前端直接使用
+FORMAT_COLUMNAR = "columnar"  # 列式JSON，数值列为数字类型
+FORMAT_MSGPACK = "msgpack"  # 列式msgpack，需要安装msgpack
+
+COLUMNAR_MIMETYPE = "application/vnd.dataquery.columnar+json"
+MSGPACK_MIMETYPES = ("application/msgpack", "application/x-msgpack")
+
+# 仅在debug模式下返回的调试字段
+DEBUG_FIELDS = ("html", "full_html")
+
+# 可压缩的响应类型
+COMPRESSIBLE_MIMETYPES = (
+    "application/json",
+    "application/javascript",
+    "application/msgpack",
+    "application/x-msgpack",
+    COLUMNAR_MIMETYPE,
+    "image/svg+xml",
+)
+
+
+def parse_number(value: Any, as_int: bool = False) -> Optional[float]:
+    """将单元格文本解析为数值，无法解析或不是有限值（NaN/Infinity）时返回None"""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        number = float(value)
+    else:
+        text = str(value).strip().replace(",", "")
+        if not text:
+            return None
+        try:
+            number = float(text)
+        except ValueError:
+            return None
+    if not math.isfinite(number):
+        return None
+    if as_int:
+        return value if isinstance(value, int) else int(number)
+    return number
+
+
+def rows_to_columns(headers: List[str], rows: List[List[Any]]) -> List[List[Any]]:
+    """将行数据转置为列数组，数值列转换为数字类型"""
+    if isinstance(rows, DailyTable):
+        return rows.to_columns()
+
+    columns = []
+    for index, header in enumerate(headers):
+        values = [row[index] if index < len(row) else None for row in rows]
+        if header in INT_COLUMNS:
+            values = [parse_number(value, as_int=True) for value in values]
+        elif header in AMOUNT_COLUMNS:
+            values = [parse_number(value) for value in values]
+        columns.append(values)
+    return columns
+
+
+def negotiate_format(
+    requested: Optional[str], accept_mimetypes: Optional[Any] = None
+) -> str:
+    """根据显式参数或Accept头协商响应格式
+
+    显式的 ``format`` 参数优先；其次按Accept头选择；msgpack不可用时退回列式JSON。
+    """
+    fmt = (requested or "").strip().lower()
+
+    if not fmt and accept_mimetypes is not None:
+        if any(accept_mimetypes.quality(m) > 0 for m in MSGPACK_MIMETYPES):
+            fmt = FORMAT_MSGPACK
+        elif accept_mimetypes.quality(COLUMNAR_MIMETYPE) > 0:
+            fmt = FORMAT_COLUMNAR
+
+    if fmt == FORMAT_MSGPACK and msgpack is None:
+        fmt = FORMAT_COLUMNAR
+    if fmt not in (FORMAT_ROWS, FORMAT_COLUMNAR, FORMAT_MSGPACK):
+        fmt = FORMAT_ROWS
+    return fmt
+
+
+def shape_payload(result: Dict[str, Any], fmt: str, debug: bool = False) -> Dict[str, Any]:
+    """按协商格式整理响应数据，非debug模式下去掉原始HTML"""
+    payload = {
+        key: value
+        for key, value in result.items()
+        if debug or key not in DEBUG_FIELDS
+    }
+    if fmt == FORMAT_ROWS:
+        if isinstance(payload.get("rows"), DailyTable):
+            payload["rows"] = payload["rows"].to_rows()
+        return payload
+
+    headers = payload.get("headers", [])
+    rows = payload.pop("rows", [])
+    payload["format"] = FORMAT_COLUMNAR
+    payload["row_count"] = len(rows)
+    payload["columns"] = rows_to_columns(headers, rows)
+    return payload
+
+
+def encode_payload(payload: Dict[str, Any], fmt: str) -> Tuple[bytes, str]:
+    """序列化响应数据，返回 (字节, mimetype)"""
+    if fmt == FORMAT_MSGPACK:
+        return msgpack.packb(payload, use_bin_type=True), MSGPACK_MIMETYPES[0]
+
+    body = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    mimetype = COLUMNAR_MIMETYPE if fmt == FORMAT_COLUMNAR else "application/json"
+    return body.encode("utf-8"), mimetype
+
+
+def choose_encoding(accept_encodings: Any) -> Optional[str]:
+    """从Accept-Encoding中选择压缩算法，优先brotli"""
+    if accept_encodings is None:
+        return None
+    if brotli is not None and accept_encodings.quality("br") > 0:
+        return "br"
+    if accept_encodings.quality("gzip") > 0:
+        return "gzip"
+    return None
+
+
+def compress_body(data: bytes, encoding: str, level: int = 6) -> bytes:
+    """按指定算法压缩响应体"""
+    if encoding == "br":
+        # brotli质量范围为0-11，与gzip级别大致对应
+        return brotli.compress(data, quality=min(11, max(0, level - 1)))
+    return gzip.compress(data, compresslevel=level)
+
+
+def compress_response(response, accept_encodings: Any, level: int = 6, min_size: int = 1024):
+    """对Flask响应进行压缩（跳过流式响应、文件响应及已编码响应）"""
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.status_code < 200
+        or response.status_code in (204, 304)
+        or "Content-Encoding" in response.headers
+    ):
+        return response
+
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES and not (
+        response.mimetype or ""
+    ).startswith("text/"):
+        return response
+
+    response.vary.add("Accept-Encoding")
+
+    data = response.get_data()
+    if len(data) < min_size:
+        return response
+
+    encoding = choose_encoding(accept_encodings)
+    if encoding is None:
+        return response
+
+    response.set_data(compress_body(data, encoding, level))
+    response.headers["Content-Encoding"] = encoding
+    return response
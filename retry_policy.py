@@ -0,0 +1,186 @@
+"""重试策略模块
+
+抓取过程中所有访问远程站点的步骤使用同一重试策略：
+- 按错误类型分类（导航/选择器/鉴权/空数据），只重试可能成功的错误，各类型有独立的最大尝试次数
+- 指数退避 + 全抖动(full jitter)，等待时间不超过查询的剩余超时预算
+- 单个查询的重试次数上限，以及进程级重试预算（令牌桶: 每次调用存入一定比例的令牌，
+  每次重试消耗一个令牌），远程站点故障时重试不会成倍放大请求量
+"""
+
+import asyncio
+import random
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+from timeout_budget import Deadline, DeadlineExceeded
+
+NAVIGATION = "navigation"
+SELECTOR = "selector"
+AUTH = "auth"
+EMPTY = "empty"
+FATAL = "fatal"
+
+_NAVIGATION_MARKERS = ("goto", "wait_for_load_state", "net::err", "ns_error", "navigation")
+_FATAL_MARKERS = ("target closed", "has been closed", "browser closed")
+
+
+class SessionExpired(Exception):
+    """会话已失效（鉴权失败），需以新会话重试"""
+
+
+class EmptyData(Exception):
+    """页面正常返回但未解析到数据，payload 为最后一次得到的结果"""
+
+    def __init__(self, message: str, payload: Any = None):
+        super().__init__(message)
+        self.payload = payload
+
+
+def classify_error(error: BaseException) -> str:
+    """错误分类，决定是否重试"""
+    if isinstance(error, DeadlineExceeded):
+        return FATAL
+    if isinstance(error, SessionExpired):
+        return AUTH
+    if isinstance(error, EmptyData):
+        return EMPTY
+    if isinstance(error, PlaywrightError):
+        message = str(error).lower()
+        if any(marker in message for marker in _FATAL_MARKERS):
+            return FATAL
+        if any(marker in message for marker in _NAVIGATION_MARKERS):
+            return NAVIGATION
+        if isinstance(error, PlaywrightTimeoutError):
+            return SELECTOR
+    return FATAL
+
+
+class RetryBudget:
+    """进程级重试预算（令牌桶）"""
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self._tokens = max_tokens
+        self._lock = threading.Lock()
+        self.exhausted = 0
+
+    def deposit(self) -> None:
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            self.exhausted += 1
+            return False
+
+    @property
+    def tokens(self) -> float:
+        with self._lock:
+            return self._tokens
+
+
+class RetryPolicy:
+    """重试策略配置与统计"""
+
+    def __init__(
+        self,
+        max_attempts: Dict[str, int],
+        budget: RetryBudget,
+        per_request: int = 3,
+        base_delay: float = 0.5,
+        max_delay: float = 5.0,
+    ):
+        self.max_attempts = dict(max_attempts)
+        self.budget = budget
+        self.per_request = per_request
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries: Dict[str, int] = {}
+        self.failures: Dict[str, int] = {}
+
+    def backoff(self, retry: int) -> float:
+        """第retry次重试（从1开始）前的等待时间"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (retry - 1)))
+
+    def _count(self, counter: Dict[str, int], category: str) -> None:
+        with self._lock:
+            counter[category] = counter.get(category, 0) + 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "retries": dict(self.retries),
+                "failures": dict(self.failures),
+                "budget_tokens": round(self.budget.tokens, 2),
+                "budget_exhausted": self.budget.exhausted,
+            }
+
+
+class Retrier:
+    """单个查询的重试执行器（共享该查询的重试次数上限与超时预算）"""
+
+    def __init__(self, policy: RetryPolicy, deadline: Deadline, logger=None):
+        self.policy = policy
+        self.deadline = deadline
+        self.logger = logger
+        self.retries = 0
+
+    async def call(
+        self,
+        step: str,
+        func: Callable[[], Awaitable[Any]],
+        on_retry: Optional[Callable[[str, BaseException], Awaitable[None]]] = None,
+    ) -> Any:
+        """执行步骤，可重试的错误按退避等待后重试；无法重试时抛出最后一次的错误"""
+        policy = self.policy
+        with policy._lock:
+            policy.calls += 1
+        policy.budget.deposit()
+
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                return await func()
+            except Exception as error:
+                category = classify_error(error)
+                reason = self._give_up_reason(category, attempt)
+                if reason:
+                    policy._count(policy.failures, category)
+                    if self.logger and category != FATAL:
+                        self.logger.warning(f"{step} 失败({category})，{reason}: {error}")
+                    raise
+
+                self.retries += 1
+                policy._count(policy.retries, category)
+                delay = self.deadline.sleep_time(policy.backoff(attempt))
+                if self.logger:
+                    self.logger.warning(
+                        f"{step} 失败({category})，{delay:.2f}秒后第{attempt}次重试: {error}"
+                    )
+                if on_retry is not None:
+                    await on_retry(category, error)
+                await asyncio.sleep(delay)
+
+    def _give_up_reason(self, category: str, attempt: int) -> Optional[str]:
+        if category == FATAL:
+            return "不可重试"
+        if attempt >= self.policy.max_attempts.get(category, 1):
+            return "已达最大尝试次数"
+        if self.retries >= self.policy.per_request:
+            return "已达单个查询重试上限"
+        if self.deadline.expired():
+            return "超时预算已耗尽"
+        if not self.policy.budget.withdraw():
+            return "进程重试预算不足"
+        return None
@@ -0,0 +1,69 @@
+"""浏览器会话状态缓存模块
+
+按 app_id 缓存 Playwright 的 storage_state（cookies 与 localStorage），
+新建浏览器上下文时直接带上已建立的会话，避免每次查询都重新走 auth_key 的会话初始化。
+storage_state 是可JSON序列化的字典，可在线程/事件循环之间安全共享。
+"""
+
+import threading
+import time
+from typing import Any, Dict, Optional
+
+
+class StorageStateCache:
+    """线程安全的 storage_state 缓存，过期或鉴权失败时失效"""
+
+    def __init__(self, ttl: float = 1800):
+        self.ttl = ttl
+        self._states: Dict[str, Dict[str, Any]] = {}
+        self._expires: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.captures = 0
+        self.invalidations = 0
+
+    def get(self, app_id: str) -> Optional[Dict[str, Any]]:
+        """获取未过期的会话状态"""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            state = self._states.get(app_id)
+            if state is None:
+                return None
+            if time.time() >= self._expires[app_id]:
+                del self._states[app_id]
+                del self._expires[app_id]
+                return None
+            return state
+
+    def set(self, app_id: str, state: Dict[str, Any]) -> None:
+        """保存会话状态，过期时间取TTL与最早过期cookie中较早者"""
+        if self.ttl <= 0:
+            return
+        expires_at = time.time() + self.ttl
+        cookie_expiries = [
+            cookie["expires"]
+            for cookie in state.get("cookies", [])
+            if cookie.get("expires", -1) > 0
+        ]
+        if cookie_expiries:
+            expires_at = min(expires_at, min(cookie_expiries))
+
+        with self._lock:
+            self._states[app_id] = state
+            self._expires[app_id] = expires_at
+            self.captures += 1
+
+    def invalidate(self, app_id: str) -> None:
+        """鉴权失败时丢弃会话状态，下次查询重新建立"""
+        with self._lock:
+            if self._states.pop(app_id, None) is not None:
+                self._expires.pop(app_id, None)
+                self.invalidations += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "cached": len(self._states),
+                "captures": self.captures,
+                "invalidations": self.invalidations,
+            }
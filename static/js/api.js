@@ -169,22 +169,34 @@ export class QueryManager {
     }
 
     async sendRequestWithTimeout(params, timeout = 60000) {
-        const timeoutPromise = new Promise((_, reject) => {
-            setTimeout(() => {
-                reject(new Error('请求超时，服务器响应时间过长'));
-            }, timeout);
-        });
+        // 超时后中止请求，后端检测到连接断开会立即停止抓取
+        const controller = this.abortController;
+        let timedOut = false;
+        const timer = setTimeout(() => {
+            timedOut = true;
+            controller.abort();
+        }, timeout);
 
-        const fetchPromise = this.sendRequest(params);
-        return Promise.race([fetchPromise, timeoutPromise]);
+        try {
+            return await this.sendRequest(params, timeout);
+        } catch (error) {
+            if (timedOut) {
+                throw new Error('请求超时，服务器响应时间过长');
+            }
+            throw error;
+        } finally {
+            clearTimeout(timer);
+        }
     }
 
-    async sendRequest(params) {
+    async sendRequest(params, timeout) {
         try {
             const response = await fetch('/api/query', {
                 method: 'POST',
                 headers: {
                     'Content-Type': 'application/json',
+                    // 告知后端客户端的等待时间，后端据此设置查询截止时间
+                    'X-Request-Timeout': String(timeout),
                 },
                 body: JSON.stringify(params),
                 signal: this.abortController.signal
@@ -5,6 +5,9 @@
 
 import { CALCULATION_CONFIG, ERROR_MESSAGES } from './config.js';
 
+// 日期单元格（YYYY-MM-DD 或 YYYY/MM/DD），与后端 models.parse_date 一致
+const DATE_CELL = /^\d{4}[-/]\d{2}[-/]\d{2}$/;
+
 export class CalculationService {
     /**
      * 计算收入数据
@@ -36,6 +39,26 @@ export class CalculationService {
         }
     }
 
+    /**
+     * 将后端返回的收益汇总转换为 calculateIncome 的结果结构
+     * @param {Object} totals - 总计数据对象
+     * @param {Object} income - 后端收益数据 {new_user, deposit, total}
+     * @returns {Object} 收入计算结果
+     */
+    static fromServerIncome(totals, income) {
+        return {
+            laxinTotal: totals['移动拉新数'] || 0,
+            zhuancunTotal: totals['移动转存数'] || 0,
+            laxinIncome: income.new_user || 0,
+            zhuancunIncome: income.deposit || 0,
+            totalIncome: income.total || 0,
+            rates: {
+                laxin: CALCULATION_CONFIG.INCOME_RATES.LAXIN,
+                zhuancun: CALCULATION_CONFIG.INCOME_RATES.ZHUANCUN
+            }
+        };
+    }
+
     /**
      * 计算数值列总计
      * @param {Array} headers - 表头数组
@@ -63,10 +86,9 @@ export class CalculationService {
                 }
             });
 
-            // 计算总计
-            rows.forEach(row => {
-                if (!Array.isArray(row)) return;
-
+            // 计算总计（只统计日期行，“合计”等非日期行不计入，与后端汇总口径一致）
+            const dailyRows = rows.filter(row => Array.isArray(row) && DATE_CELL.test(String(row[0]).trim()));
+            dailyRows.forEach(row => {
                 for (const colName in indices) {
                     const val = parseFloat(row[indices[colName]]);
                     if (!isNaN(val)) {
@@ -78,7 +100,7 @@ export class CalculationService {
             return {
                 totals,
                 indices,
-                rowCount: rows.length,
+                rowCount: dailyRows.length,
                 columnCount: Object.keys(indices).length
             };
         } catch (error) {
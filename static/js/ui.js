@@ -192,17 +192,19 @@ export function createTableHTML(headers, rows) {
  * 计算并显示总计
  * @param {string[]} headers - 表头数组
  * @param {Array<string[]>} rows - 数据行数组
+ * @param {object|null} summary - 后端返回的汇总数据（存在时直接使用，不再逐行计算）
  */
-export function calculateAndDisplayTotals(headers, rows) {
+export function calculateAndDisplayTotals(headers, rows, summary = null) {
     try {
         // 验证输入数据
         if (!CalculationService.validateCalculationData({ headers, rows })) {
             throw new Error('输入数据验证失败');
         }
 
-        // 计算基础总计
-        const calculationResult = CalculationService.calculateTotals(headers, rows);
-        const { totals } = calculationResult;
+        // 优先使用后端汇总，缺失时回退到前端计算
+        const totals = summary && summary.totals
+            ? summary.totals
+            : CalculationService.calculateTotals(headers, rows).totals;
 
         // 显示基础总计数据
         const columnMapping = {
@@ -230,7 +232,9 @@ export function calculateAndDisplayTotals(headers, rows) {
         }
 
         // 计算和显示收入
-        const incomeData = CalculationService.calculateIncome(totals);
+        const incomeData = summary && summary.income
+            ? CalculationService.fromServerIncome(totals, summary.income)
+            : CalculationService.calculateIncome(totals);
         
         // 显示拉新收入
         const laxinIncomeEl = document.getElementById(
@@ -325,7 +329,7 @@ export function renderResults(data) {
         resultCard.classList.remove('hidden');
 
         // 计算并显示统计
-        calculateAndDisplayTotals(headers, rows);
+        calculateAndDisplayTotals(headers, rows, data.summary || null);
 
         showStatus('查询完成！');
         console.timeEnd('renderResults');
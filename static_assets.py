@@ -0,0 +1,149 @@
+"""静态资源缓存模块
+
+- 按文件内容计算哈希，静态资源URL附带 ?v=<哈希>，哈希匹配时返回长期不可变缓存头
+- 预压缩 .gz/.br 变体，按 Accept-Encoding 直接返回压缩文件
+- 为ES模块生成 import map，使模块内部的相对导入同样使用带哈希的URL
+"""
+
+import gzip
+import hashlib
+import mimetypes
+import os
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from flask import request, send_from_directory
+from werkzeug.security import safe_join
+
+try:  # 可选依赖: brotli 预压缩
+    import brotli
+except ImportError:  # pragma: no cover - 取决于部署环境
+    brotli = None
+
+PRECOMPRESS_EXTENSIONS = (".js", ".css", ".html", ".svg", ".json")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class StaticAssets:
+    """静态资源哈希、预压缩与发送"""
+
+    def __init__(self, static_folder: str, static_url_path: str):
+        self.static_folder = static_folder
+        self.static_url_path = static_url_path.rstrip("/")
+        self._hashes: Dict[str, Tuple[int, int, str]] = {}
+        self._lock = threading.Lock()
+
+    def _iter_assets(self) -> List[str]:
+        """列出静态目录中的源文件（相对路径，不含预压缩变体）"""
+        assets = []
+        for root, _, files in os.walk(self.static_folder):
+            for name in files:
+                if name.endswith((".gz", ".br")):
+                    continue
+                path = os.path.join(root, name)
+                assets.append(os.path.relpath(path, self.static_folder).replace(os.sep, "/"))
+        return sorted(assets)
+
+    def file_hash(self, filename: str) -> Optional[str]:
+        """文件内容哈希（按mtime与大小缓存），文件不存在时返回None"""
+        path = safe_join(self.static_folder, filename)
+        if path is None:
+            return None
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+
+        with self._lock:
+            cached = self._hashes.get(filename)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+
+        with open(path, "rb") as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:12]
+        with self._lock:
+            self._hashes[filename] = (stat.st_mtime_ns, stat.st_size, digest)
+        return digest
+
+    def url(self, filename: str) -> str:
+        digest = self.file_hash(filename)
+        base = f"{self.static_url_path}/{filename}"
+        return f"{base}?v={digest}" if digest else base
+
+    def version(self) -> str:
+        """全部静态资源的组合哈希，任一资源变化时随之变化"""
+        combined = hashlib.sha256()
+        for filename in self._iter_assets():
+            combined.update(filename.encode("utf-8"))
+            combined.update((self.file_hash(filename) or "").encode("ascii"))
+        return combined.hexdigest()[:12]
+
+    def import_map(self) -> Dict[str, Any]:
+        """ES模块的import map：未带哈希的模块URL映射到带哈希的URL"""
+        imports = {
+            f"{self.static_url_path}/{filename}": self.url(filename)
+            for filename in self._iter_assets()
+            if filename.endswith(".js")
+        }
+        return {"imports": imports}
+
+    def precache_urls(self) -> List[str]:
+        return [self.url(filename) for filename in self._iter_assets()]
+
+    def precompress(self, level: int = 9) -> int:
+        """为可压缩的静态资源生成 .gz（及 .br）变体，已是最新的跳过，返回生成数量"""
+        count = 0
+        for filename in self._iter_assets():
+            if not filename.endswith(PRECOMPRESS_EXTENSIONS):
+                continue
+            path = os.path.join(self.static_folder, filename)
+            with open(path, "rb") as f:
+                data = f.read()
+            variants = [(".gz", lambda d: gzip.compress(d, compresslevel=level, mtime=0))]
+            if brotli is not None:
+                variants.append((".br", lambda d: brotli.compress(d, quality=11)))
+            for ext, compress in variants:
+                target = path + ext
+                if os.path.exists(target) and os.path.getmtime(target) >= os.path.getmtime(path):
+                    continue
+                with open(target, "wb") as f:
+                    f.write(compress(data))
+                count += 1
+        return count
+
+    def _precompressed_variant(self, filename: str) -> Optional[Tuple[str, str]]:
+        """根据Accept-Encoding选择已存在且不早于源文件的预压缩变体"""
+        path = safe_join(self.static_folder, filename)
+        if path is None or not os.path.isfile(path):
+            return None
+        candidates = []
+        if request.accept_encodings.quality("br") > 0:
+            candidates.append(("br", ".br"))
+        if request.accept_encodings.quality("gzip") > 0:
+            candidates.append(("gzip", ".gz"))
+        for encoding, ext in candidates:
+            variant = path + ext
+            if os.path.isfile(variant) and os.path.getmtime(variant) >= os.path.getmtime(path):
+                return encoding, filename + ext
+        return None
+
+    def send(self, filename: str):
+        """发送静态文件：带当前哈希的URL长期缓存，否则每次协商缓存"""
+        variant = self._precompressed_variant(filename)
+        if variant is not None:
+            encoding, variant_name = variant
+            mimetype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+            response = send_from_directory(
+                self.static_folder, variant_name, mimetype=mimetype
+            )
+            response.headers["Content-Encoding"] = encoding
+        else:
+            response = send_from_directory(self.static_folder, filename)
+        response.vary.add("Accept-Encoding")
+
+        version = request.args.get("v")
+        if version and version == self.file_hash(filename):
+            response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+        return response
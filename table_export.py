@@ -0,0 +1,139 @@
+"""查询结果流式导出模块
+
+把多个UK码的查询结果依次写成 CSV 或 XLSX，以字节块的生成器形式输出，供 Flask 流式响应
+（分块传输）使用：每个UK码的结果写出后即可释放，内存占用与总行数无关。
+
+    CSV   每个UK码的行写完后立即输出一块，带 UTF-8 BOM 以便 Excel 正确识别中文
+    XLSX  xlsx 是 zip 容器，无法边写边发送：使用 xlsxwriter 的 constant_memory 模式
+          逐行写入临时文件（内存中只保留当前行），完成后分块读出并删除临时文件
+
+数值列按数字写入（金额以元为单位保留两位小数），查询失败或为空的UK码写一行说明。
+"""
+
+import csv
+import io
+import math
+import os
+import tempfile
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from models import AMOUNT_COLUMNS, INT_COLUMNS, STANDARD_HEADERS, DailyTable
+
+try:  # 可选依赖: xlsxwriter 生成XLSX
+    import xlsxwriter
+except ImportError:  # pragma: no cover - 取决于部署环境
+    xlsxwriter = None
+
+FORMAT_CSV = "csv"
+FORMAT_XLSX = "xlsx"
+FORMATS = (FORMAT_CSV, FORMAT_XLSX)
+
+MIMETYPES = {
+    FORMAT_CSV: "text/csv",
+    FORMAT_XLSX: "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+EXPORT_HEADERS = ["UK码", *STANDARD_HEADERS, "备注"]
+
+# (UK码, 查询结果中的行（DailyTable 或字符串二维数组）, 备注)；行为None时只输出备注
+ExportItem = Tuple[str, Optional[Any], str]
+
+
+def available(fmt: str) -> bool:
+    return fmt == FORMAT_CSV or (fmt == FORMAT_XLSX and xlsxwriter is not None)
+
+
+def _parse_cell(value: Any, header: str) -> Any:
+    """字符串行中的数值单元格转为数字，无法解析或不是有限值（NaN/Infinity）时保留原文"""
+    if header not in INT_COLUMNS and header not in AMOUNT_COLUMNS:
+        return value
+    text = str(value).strip().replace(",", "")
+    try:
+        number = int(text) if header in INT_COLUMNS else float(text)
+    except ValueError:
+        return value
+    # xlsxwriter 的 write_number 不接受 NaN/Infinity，会中断整个导出
+    return number if math.isfinite(number) else value
+
+
+def iter_rows(uk_code: str, rows: Optional[Any], note: str) -> Iterator[List[Any]]:
+    """生成一个UK码的导出行（数值列为数字类型）"""
+    if rows is None or not len(rows):
+        yield [uk_code, *([""] * len(STANDARD_HEADERS)), note or "查询结果为空"]
+        return
+    if isinstance(rows, DailyTable):
+        for day, n, d, o, a, c in zip(
+            rows.date_strings(),
+            rows.new_users,
+            rows.deposits,
+            rows.orders,
+            rows.order_amount_cents,
+            rows.commission_cents,
+        ):
+            yield [uk_code, day, n, d, o, a / 100, c / 100, note]
+        return
+    for row in rows:
+        cells = list(row[: len(STANDARD_HEADERS)])
+        cells += [""] * (len(STANDARD_HEADERS) - len(cells))
+        yield [
+            uk_code,
+            *(_parse_cell(cell, header) for cell, header in zip(cells, STANDARD_HEADERS)),
+            note,
+        ]
+
+
+def csv_chunks(items: Iterable[ExportItem]) -> Iterator[bytes]:
+    """逐个UK码输出CSV字节块"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADERS)
+    yield ("\ufeff" + buffer.getvalue()).encode("utf-8")
+
+    for uk_code, rows, note in items:
+        buffer.seek(0)
+        buffer.truncate()
+        for row in iter_rows(uk_code, rows, note):
+            writer.writerow(
+                [f"{cell:.2f}" if isinstance(cell, float) else cell for cell in row]
+            )
+        yield buffer.getvalue().encode("utf-8")
+
+
+def xlsx_chunks(items: Iterable[ExportItem], chunk_size: int = 64 * 1024) -> Iterator[bytes]:
+    """以 constant_memory 模式写入临时XLSX文件，完成后分块输出"""
+    if xlsxwriter is None:
+        raise RuntimeError("导出XLSX需要安装 xlsxwriter")
+
+    fd, path = tempfile.mkstemp(prefix="export-", suffix=".xlsx")
+    os.close(fd)
+    try:
+        workbook = xlsxwriter.Workbook(path, {"constant_memory": True})
+        sheet = workbook.add_worksheet("查询结果")
+        bold = workbook.add_format({"bold": True})
+        money = workbook.add_format({"num_format": "0.00"})
+        amount_indices = {EXPORT_HEADERS.index(header) for header in AMOUNT_COLUMNS}
+
+        sheet.set_column(0, 1, 14)
+        sheet.write_row(0, 0, EXPORT_HEADERS, bold)
+        line = 1
+        for uk_code, rows, note in items:
+            for row in iter_rows(uk_code, rows, note):
+                for col, cell in enumerate(row):
+                    if col in amount_indices and isinstance(cell, float):
+                        sheet.write_number(line, col, cell, money)
+                    else:
+                        sheet.write(line, col, cell)
+                line += 1
+        workbook.close()
+
+        with open(path, "rb") as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
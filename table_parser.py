@@ -0,0 +1,273 @@
+"""表格HTML解析模块
+
+将目标页面 div.tab_warp 中的表格转换为 (表头, 数据行)。
+按顺序尝试四种解析方式，返回第一个成功的结果：
+    1. 传统 <table> 标签
+    2. div.table / div.table_header / div.table_body_item 结构（目标页面）
+    3. 类名包含 table/list/data 的通用div结构
+    4. 按行分割文本
+抓取时由页面内脚本 EXTRACT_TABLE_JS 按相同逻辑直接在浏览器中提取；
+修改解析方式时两者需同步（Python实现用于回归语料与离线解析）。
+"""
+
+from typing import Callable, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+ParseResult = Tuple[List[str], List[List[str]]]
+
+
+def parse_table_tag(soup: BeautifulSoup) -> Optional[ParseResult]:
+    """方式1: 查找传统table标签"""
+    table = soup.find("table")
+    if not table:
+        return None
+
+    headers = []
+    rows = []
+
+    # 提取表头
+    header_row = table.find("thead")
+    first_row = None
+    if header_row:
+        headers = [
+            header.get_text().strip() for header in header_row.find_all(["th", "td"])
+        ]
+    else:
+        # 如果没有thead，尝试第一行作为表头
+        first_row = table.find("tr")
+        if first_row:
+            headers = [
+                cell.get_text().strip() for cell in first_row.find_all(["th", "td"])
+            ]
+
+    # 提取数据行：有tbody时取其中的tr，否则取table中所有tr；
+    # 跳过表头行（thead中的行；没有thead时为第一行，不论是否位于tbody中）
+    body = table.find("tbody")
+    for row in (body or table).find_all("tr"):
+        if row.find_parent("thead") is not None or (headers and row is first_row):
+            continue
+        cells = [cell.get_text().strip() for cell in row.find_all(["td", "th"])]
+        if cells:  # 只添加非空行
+            rows.append(cells)
+
+    if headers or rows:
+        return headers, rows
+    return None
+
+
+def parse_div_table(soup: BeautifulSoup) -> Optional[ParseResult]:
+    """方式2: 查找div结构的表格（针对目标页面）"""
+    table_container = soup.find("div", class_="table")
+    if not table_container:
+        return None
+
+    headers = []
+    rows = []
+
+    # 提取表头
+    header_row = table_container.find("div", class_="table_header")
+    if header_row:
+        headers = [
+            header.get_text().strip()
+            for header in header_row.find_all("div")
+            if header.get_text().strip()
+        ]
+
+    # 提取数据行
+    body = table_container.find("div", class_="table_body")
+    if body:
+        for row in body.find_all("div", class_="table_body_item"):
+            cells = [
+                cell.get_text().strip()
+                for cell in row.find_all("div")
+                if cell.get_text().strip()
+            ]
+            if cells:
+                rows.append(cells)
+
+    if headers or rows:
+        return headers, rows
+    return None
+
+
+def parse_heuristic_divs(soup: BeautifulSoup) -> Optional[ParseResult]:
+    """方式3: 通用div结构解析"""
+    # 查找可能的表格容器
+    possible_containers = soup.find_all(
+        "div",
+        class_=lambda x: x
+        and ("table" in x.lower() or "list" in x.lower() or "data" in x.lower()),
+    )
+
+    for container in possible_containers:
+        # 尝试提取结构化数据
+        container_rows = container.find_all("div", recursive=False)
+        if len(container_rows) >= 2:  # 至少有表头和一行数据
+            # 第一行作为表头
+            first_row = container_rows[0]
+            potential_headers = [
+                cell.get_text().strip()
+                for cell in first_row.find_all("div")
+                if cell.get_text().strip()
+            ]
+
+            # 其余行作为数据
+            potential_rows = []
+            for row_div in container_rows[1:]:
+                cells = [
+                    cell.get_text().strip()
+                    for cell in row_div.find_all("div")
+                    if cell.get_text().strip()
+                ]
+                if cells:
+                    potential_rows.append(cells)
+
+            if potential_headers and potential_rows:
+                return potential_headers, potential_rows
+    return None
+
+
+def parse_text_lines(soup: BeautifulSoup) -> Optional[ParseResult]:
+    """方式4: 最后尝试提取所有文本内容并按行分割"""
+    text_content = soup.get_text()
+    if text_content.strip():
+        lines = [line.strip() for line in text_content.split("\n") if line.strip()]
+        if len(lines) >= 2:
+            # 简单的文本解析，假设第一行是表头
+            headers = [lines[0]] if lines else []
+            rows = [[line] for line in lines[1:]] if len(lines) > 1 else []
+            return headers, rows
+    return None
+
+
+# 解析方式，按优先级排列
+PARSE_STRATEGIES: List[Tuple[str, Callable[[BeautifulSoup], Optional[ParseResult]]]] = [
+    ("table_tag", parse_table_tag),
+    ("div_table", parse_div_table),
+    ("heuristic_divs", parse_heuristic_divs),
+    ("text_lines", parse_text_lines),
+]
+
+
+def parse_with_strategy(html: str) -> Tuple[Optional[str], List[str], List[List[str]]]:
+    """解析HTML表格，返回 (解析方式名称, 表头, 数据行)，全部失败时名称为None"""
+    soup = BeautifulSoup(html, "html.parser")
+    for name, strategy in PARSE_STRATEGIES:
+        result = strategy(soup)
+        if result is not None:
+            return name, result[0], result[1]
+    return None, [], []
+
+
+def html_table_to_data(html: str) -> ParseResult:
+    """将HTML表格转换为结构化数据"""
+    _, headers, rows = parse_with_strategy(html)
+    return headers, rows
+
+
+# 查询结果表格所在的容器
+RESULT_CONTAINER = "#app > div.list > div.tab_warp"
+
+# 页面明确表示没有数据时显示的文本
+EMPTY_MARKERS = ("暂无数据", "没有数据", "无数据", "No Data")
+
+# 在页面内直接提取表格的脚本（page.evaluate），与上面四种解析方式逻辑一致，
+# 一次往返只返回 {strategy, headers, rows, empty}，不传输HTML。
+# 结果容器中解析不到完整表格时，再按方式1在整个页面中查找table标签。
+# 参数: {selector: 结果容器选择器, markers: EMPTY_MARKERS}
+# 修改时需同步 parse_table_tag 等Python实现，并运行 tests/test_parser_corpus.py（test_extract_js_fixture 需要Chromium）
+EXTRACT_TABLE_JS = """({ selector, markers }) => {
+    const text = (el) => el.textContent.trim();
+    const cellTexts = (el, sel) => Array.from(el.querySelectorAll(sel), text);
+    const nonEmpty = (values) => values.filter((value) => value);
+    const matchesClass = (el) =>
+        Array.from(el.classList).some((name) => /table|list|data/i.test(name));
+
+    const tableTag = (root) => {
+        const table = root.querySelector("table");
+        if (!table) return null;
+        const thead = table.querySelector("thead");
+        const headerRow = thead || table.querySelector("tr");
+        const headers = headerRow ? cellTexts(headerRow, "th, td") : [];
+        const body = table.querySelector("tbody");
+        const rows = [];
+        for (const tr of (body || table).querySelectorAll("tr")) {
+            if (tr.closest("thead") || (!thead && headers.length && tr === headerRow)) continue;
+            const cells = cellTexts(tr, "td, th");
+            if (cells.length) rows.push(cells);
+        }
+        return headers.length || rows.length ? { headers, rows } : null;
+    };
+
+    const divTable = (root) => {
+        const container = root.querySelector("div.table");
+        if (!container) return null;
+        const headerRow = container.querySelector("div.table_header");
+        const headers = headerRow ? nonEmpty(cellTexts(headerRow, "div")) : [];
+        const body = container.querySelector("div.table_body");
+        const rows = [];
+        if (body) {
+            for (const item of body.querySelectorAll("div.table_body_item")) {
+                const cells = nonEmpty(cellTexts(item, "div"));
+                if (cells.length) rows.push(cells);
+            }
+        }
+        return headers.length || rows.length ? { headers, rows } : null;
+    };
+
+    const heuristicDivs = (root) => {
+        for (const container of root.querySelectorAll("div")) {
+            if (!matchesClass(container)) continue;
+            const children = Array.from(container.children).filter(
+                (child) => child.tagName === "DIV"
+            );
+            if (children.length < 2) continue;
+            const headers = nonEmpty(cellTexts(children[0], "div"));
+            const rows = children
+                .slice(1)
+                .map((child) => nonEmpty(cellTexts(child, "div")))
+                .filter((cells) => cells.length);
+            if (headers.length && rows.length) return { headers, rows };
+        }
+        return null;
+    };
+
+    const textLines = (root) => {
+        const lines = root.textContent
+            .split("\\n")
+            .map((line) => line.trim())
+            .filter((line) => line);
+        if (lines.length < 2) return null;
+        return { headers: [lines[0]], rows: lines.slice(1).map((line) => [line]) };
+    };
+
+    const strategies = [
+        ["table_tag", tableTag],
+        ["div_table", divTable],
+        ["heuristic_divs", heuristicDivs],
+        ["text_lines", textLines],
+    ];
+
+    const container = document.querySelector(selector);
+    let result = { strategy: null, headers: [], rows: [] };
+    if (container) {
+        for (const [name, strategy] of strategies) {
+            const parsed = strategy(container);
+            if (parsed) {
+                result = { strategy: name, ...parsed };
+                break;
+            }
+        }
+    }
+    if (!result.headers.length || !result.rows.length) {
+        const parsed = tableTag(document);
+        if (parsed && parsed.headers.length && parsed.rows.length) {
+            result = { strategy: "page_table_tag", ...parsed };
+        }
+    }
+
+    const pageText = (container || document.body).textContent;
+    result.empty = markers.some((marker) => pageText.includes(marker));
+    return result;
+}"""
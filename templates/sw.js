@@ -0,0 +1,63 @@
+// Service Worker：缓存应用外壳（首页与带内容哈希的静态资源）
+// 由 /sw.js 路由渲染，资源版本变化时使用新的缓存并清理旧缓存
+
+const CACHE_PREFIX = 'dataquery-';
+const CACHE_NAME = CACHE_PREFIX + '{{ asset_version }}';
+const PRECACHE_URLS = {{ precache_urls | tojson }};
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(CACHE_NAME)
+            .then(cache => cache.addAll(PRECACHE_URLS))
+            .then(() => self.skipWaiting())
+    );
+});
+
+self.addEventListener('activate', event => {
+    event.waitUntil(
+        caches.keys()
+            .then(keys => Promise.all(
+                keys
+                    .filter(key => key.startsWith(CACHE_PREFIX) && key !== CACHE_NAME)
+                    .map(key => caches.delete(key))
+            ))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+
+    // 只处理同源GET请求，API请求始终走网络
+    if (request.method !== 'GET' || url.origin !== self.location.origin || url.pathname.startsWith('/api/')) {
+        return;
+    }
+
+    // 带内容哈希的静态资源不可变：缓存优先
+    if (url.pathname.startsWith('/static/') && url.searchParams.has('v')) {
+        event.respondWith(
+            caches.match(request).then(cached => cached || fetch(request).then(response => {
+                if (response.ok) {
+                    const copy = response.clone();
+                    caches.open(CACHE_NAME).then(cache => cache.put(request, copy));
+                }
+                return response;
+            }))
+        );
+        return;
+    }
+
+    // 页面导航：网络优先，离线或失败时使用缓存的首页
+    if (request.mode === 'navigate') {
+        event.respondWith(
+            fetch(request).then(response => {
+                if (response.ok && url.pathname === '/') {
+                    const copy = response.clone();
+                    caches.open(CACHE_NAME).then(cache => cache.put('/', copy));
+                }
+                return response;
+            }).catch(() => caches.match('/'))
+        );
+    }
+});
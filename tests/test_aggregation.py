@@ -0,0 +1,51 @@
+"""汇总口径回归测试
+
+页面表格中的“合计”等非日期行不计入总计与行数：/api/query 的汇总（compute_summary）
+与 /api/analytics 的汇总（分析存储只保存日期行）必须一致。
+"""
+
+from datetime import date
+
+import pytest
+
+from aggregation import compute_summary
+from models import DailyTable
+
+COEFFICIENTS = {"new_user": 4.5, "deposit": 1.2}
+ROWS = [
+    ["2024-03-01", "3", "2", "5", "120.50", "6.03"],
+    ["2024/03/02", "1", "4", "2", "80.25", "4.01"],
+    ["合计", "4", "6", "7", "200.75", "10.04"],
+]
+
+
+def test_summary_excludes_label_rows():
+    summary = compute_summary(DailyTable.from_rows(ROWS), COEFFICIENTS)
+
+    assert summary["totals"] == {
+        "移动拉新数": 4,
+        "移动转存数": 6,
+        "会员订单数": 7,
+        "会员订单金额": 200.75,
+        "会员佣金（元）": 10.04,
+    }
+    assert summary["row_count"] == 2
+    assert summary["income"] == {"new_user": 18.0, "deposit": 7.2, "total": 25.2}
+
+
+def test_summary_matches_analytics(tmp_path):
+    pytest.importorskip("pyarrow")
+    from analytics_store import AnalyticsStore
+
+    table = DailyTable.from_rows(ROWS)
+    store = AnalyticsStore(str(tmp_path))
+    store.record("649", "UK_SUMMARY", table)
+
+    _, analytics = store.aggregate(
+        "649", date(2024, 3, 1), date(2024, 3, 31), coefficients=COEFFICIENTS
+    )
+    summary = compute_summary(table, COEFFICIENTS)
+
+    assert analytics["totals"] == summary["totals"]
+    assert analytics["row_count"] == summary["row_count"]
+    assert analytics["income"] == summary["income"]
@@ -0,0 +1,146 @@
+"""本地分析存储：重叠抓取按抓取时间去重、写盘失败时保留缓冲、合并分区期间的查询（未安装pyarrow时跳过）"""
+
+import threading
+import time
+from datetime import date, datetime
+
+import pytest
+
+import analytics_store
+from analytics_store import AnalyticsStore, daily_table_to_arrow, latest_rows
+from models import DailyTable
+
+pytestmark = pytest.mark.skipif(not analytics_store.available, reason="未安装pyarrow")
+
+APP_ID = "649"
+JANUARY = (date(2024, 1, 1), date(2024, 1, 31))
+
+
+def daily(*values, start=1):
+    """每天一行的结果表，values 为各天的移动拉新数，末尾附带合计行"""
+    rows = [
+        [f"2024-01-{start + i:02d}", str(value), "1", "0", "10.00", "0.50"]
+        for i, value in enumerate(values)
+    ]
+    return DailyTable.from_rows(rows + [["合计", str(sum(values))]])
+
+
+def new_users(table):
+    return dict(zip(table["day"].to_pylist(), table["new_users"].to_pylist()))
+
+
+def part_files(store):
+    return sorted(store._partition(APP_ID, "2024-01").glob("part-*.parquet"))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return AnalyticsStore(str(tmp_path), compact_files=100)
+
+
+def record(store, uk_code, table):
+    store.record(APP_ID, uk_code, table)
+    # 抓取时间精确到毫秒，相邻两次登记之间留出间隔
+    time.sleep(0.005)
+
+
+def test_latest_rows_keeps_newest_scrape():
+    older = daily_table_to_arrow("UK1", daily(1, 2, 3), datetime(2024, 2, 1, 8))
+    newer = daily_table_to_arrow("UK1", daily(20, 30, start=2), datetime(2024, 2, 1, 9))
+    other = daily_table_to_arrow("UK2", daily(7), datetime(2024, 2, 1, 7))
+
+    table = latest_rows(analytics_store.pa.concat_tables([newer, other, older]))
+
+    assert table["uk_code"].to_pylist() == ["UK1", "UK1", "UK1", "UK2"]
+    assert table["new_users"].to_pylist() == [1, 20, 30, 7]
+
+
+def test_overlapping_scrapes_dedup_across_buffer_and_files(store):
+    record(store, "UK1", daily(1, 2, 3))
+    assert store.flush() == 3
+    record(store, "UK1", daily(20, 30, start=2))
+
+    # 新的抓取仍在缓冲中，旧的已写盘
+    assert new_users(store.read(APP_ID, *JANUARY)) == {
+        date(2024, 1, 1): 1,
+        date(2024, 1, 2): 20,
+        date(2024, 1, 3): 30,
+    }
+
+    store.flush()
+    store.compact_files = 2
+    store._compact(store._partition(APP_ID, "2024-01"))
+
+    assert len(part_files(store)) == 1
+    assert store.read(APP_ID, *JANUARY).num_rows == 3
+    assert new_users(store.read(APP_ID, *JANUARY))[date(2024, 1, 2)] == 20
+
+
+def test_failed_write_keeps_rows_buffered(store, monkeypatch):
+    record(store, "UK1", daily(1, 2, 3))
+
+    def fail(directory, table):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(store, "_write_file", fail)
+    assert store.flush() == 0
+    assert store.stats()["pending_rows"] == 3
+    assert store.stats()["errors"] == 1
+    assert part_files(store) == []
+    # 未写盘的行仍然可以查询
+    assert store.read(APP_ID, *JANUARY).num_rows == 3
+
+    monkeypatch.undo()
+    assert store.flush() == 3
+    assert store.stats()["pending_rows"] == 0
+    assert len(part_files(store)) == 1
+    assert store.read(APP_ID, *JANUARY).num_rows == 3
+
+
+def test_read_during_compaction(store, monkeypatch):
+    """查询列出文件后、读取前，合并分区不能删除这些文件"""
+    for value in (1, 2, 3):
+        record(store, "UK1", daily(value, value))
+        store.flush()
+    old_files = part_files(store)
+    assert len(old_files) == 3
+
+    merged = threading.Event()
+    write_file = store._write_file
+
+    def write_and_signal(directory, table):
+        write_file(directory, table)
+        merged.set()
+
+    monkeypatch.setattr(store, "_write_file", write_and_signal)
+
+    dataset = analytics_store.ds.dataset
+    reader_saw = []
+
+    def slow_dataset(source, **kwargs):
+        # 查询线程：等合并写完新文件，此时旧文件本应可以删除
+        if threading.current_thread().name == "reader":
+            compactor.start()
+            assert merged.wait(5)
+            time.sleep(0.05)
+            reader_saw.append(all(path.exists() for path in old_files))
+        return dataset(source, **kwargs)
+
+    monkeypatch.setattr(analytics_store.ds, "dataset", slow_dataset)
+
+    store.compact_files = 2
+    directory = store._partition(APP_ID, "2024-01")
+    compactor = threading.Thread(target=store._compact, args=(directory,))
+    results = []
+    reader = threading.Thread(
+        target=lambda: results.append(store.read(APP_ID, *JANUARY)), name="reader"
+    )
+    reader.start()
+    reader.join(10)
+    compactor.join(10)
+
+    assert reader_saw == [True]
+    assert new_users(results[0]) == {date(2024, 1, 1): 3, date(2024, 1, 2): 3}
+    assert store.compactions == 1
+    assert len(part_files(store)) == 1
+    assert part_files(store)[0] not in old_files
@@ -0,0 +1,93 @@
+"""单元格解析：NaN/Infinity 与超出范围的值按无法解析处理，不能让整次抓取失败；日期允许不补零与中文格式"""
+
+from datetime import date
+
+import pytest
+
+from models import DailyTable, parse_cents, parse_date, parse_decimal, parse_int
+from response_format import parse_number
+
+NON_FINITE = ["NaN", "nan", "-NaN", "sNaN", "inf", "Infinity", "-Infinity", "1e999"]
+
+
+@pytest.mark.parametrize("text", NON_FINITE)
+@pytest.mark.parametrize("as_int", [False, True])
+def test_parse_number_non_finite(text, as_int):
+    assert parse_number(text, as_int=as_int) is None
+
+
+@pytest.mark.parametrize("value", [float("nan"), float("inf"), -float("inf")])
+@pytest.mark.parametrize("as_int", [False, True])
+def test_parse_number_non_finite_float(value, as_int):
+    assert parse_number(value, as_int=as_int) is None
+
+
+@pytest.mark.parametrize(
+    "value, as_int, expected",
+    [
+        ("1,234", True, 1234),
+        ("12.9", True, 12),
+        (" 2291.93 ", False, 2291.93),
+        (7, True, 7),
+        (7.5, False, 7.5),
+        ("", False, None),
+        ("-", False, None),
+        (None, True, None),
+    ],
+)
+def test_parse_number(value, as_int, expected):
+    assert parse_number(value, as_int=as_int) == expected
+
+
+@pytest.mark.parametrize("text", NON_FINITE + ["1e9999999", "1e15", "-1e15"])
+def test_parse_decimal_out_of_range(text):
+    assert parse_decimal(text) is None
+    assert parse_int(text) == 0
+    assert parse_cents(text) == 0
+
+
+def test_parse_cents_rounds_half_up():
+    assert parse_cents("12,345.605") == 1234561
+    assert parse_int("1,234") == 1234
+
+
+def test_row_with_non_finite_cells():
+    table = DailyTable.from_rows([["2024-01-01", "NaN", "Infinity", "3", "nan", "1e999999"]])
+
+    assert table.to_rows() == [["2024-01-01", "0", "0", "3", "0.00", "0.00"]]
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "2024-01-05",
+        "2024/01/05",
+        "2024-1-5",
+        "2024/1/5",
+        " 2024-1-05 ",
+        "2024年1月5日",
+        "2024年01月05日",
+    ],
+)
+def test_parse_date_formats(text):
+    assert parse_date(text) == date(2024, 1, 5)
+
+
+@pytest.mark.parametrize(
+    "text", ["合计", "", "2024-13-01", "2024-2-30", "24-1-5", "2024-01", "2024-01-05 12:00"]
+)
+def test_parse_date_invalid(text):
+    assert parse_date(text) is None
+
+
+def test_unpadded_dates_are_daily_rows():
+    table = DailyTable.from_rows(
+        [
+            ["2024-1-5", "1", "2", "3", "4.00", "0.50"],
+            ["2024年1月6日", "1", "2", "3", "4.00", "0.50"],
+            ["合计", "2"],
+        ]
+    )
+
+    assert table.daily_count() == 2
+    assert [row[0] for row in table.to_rows()] == ["2024-01-05", "2024-01-06", "合计"]
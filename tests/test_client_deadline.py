@@ -0,0 +1,98 @@
+"""客户端断开检测：真实服务器上由客户端关闭连接，处理中的请求必须能检测到"""
+
+import socket
+import threading
+import time
+
+import pytest
+
+from client_deadline import client_disconnected
+
+WAIT_SECONDS = 5
+
+
+def make_app(started: threading.Event, detected: threading.Event):
+    """请求处理期间轮询 client_disconnected，直到检测到断开或超时"""
+
+    def wsgi_app(environ, start_response):
+        started.set()
+        deadline = time.monotonic() + WAIT_SECONDS
+        while time.monotonic() < deadline:
+            if client_disconnected(environ):
+                detected.set()
+                break
+            time.sleep(0.02)
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [b"done"]
+
+    return wsgi_app
+
+
+def disconnect_during_request(port: int, started: threading.Event) -> None:
+    client = socket.create_connection(("127.0.0.1", port))
+    try:
+        client.sendall(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+        assert started.wait(WAIT_SECONDS), "请求未开始处理"
+    finally:
+        client.close()
+
+
+@pytest.mark.parametrize("lookahead", [0, 1], ids=["default", "lookahead"])
+def test_waitress_disconnect(lookahead):
+    """waitress 默认 channel_request_lookahead=0 时也必须检测到断开"""
+    waitress_server = pytest.importorskip("waitress.server")
+    started, detected = threading.Event(), threading.Event()
+    server = waitress_server.create_server(
+        make_app(started, detected),
+        host="127.0.0.1",
+        port=0,
+        threads=1,
+        channel_request_lookahead=lookahead,
+        clear_untrusted_proxy_headers=True,
+    )
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    try:
+        disconnect_during_request(server.effective_port, started)
+        assert detected.wait(WAIT_SECONDS)
+    finally:
+        server.close()
+
+
+def test_werkzeug_disconnect():
+    serving = pytest.importorskip("werkzeug.serving")
+    started, detected = threading.Event(), threading.Event()
+    server = serving.make_server("127.0.0.1", 0, make_app(started, detected), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        disconnect_during_request(server.server_port, started)
+        assert detected.wait(WAIT_SECONDS)
+    finally:
+        server.shutdown()
+
+
+def test_connected_client_not_reported():
+    """连接正常时不视为断开（请求完成后客户端收到响应）"""
+    waitress_server = pytest.importorskip("waitress.server")
+    detected = threading.Event()
+
+    def wsgi_app(environ, start_response):
+        time.sleep(0.3)
+        if client_disconnected(environ):
+            detected.set()
+        start_response("200 OK", [("Content-Type", "text/plain")])
+        return [b"done"]
+
+    server = waitress_server.create_server(
+        wsgi_app, host="127.0.0.1", port=0, threads=1, clear_untrusted_proxy_headers=True
+    )
+    threading.Thread(target=server.run, daemon=True).start()
+    try:
+        client = socket.create_connection(("127.0.0.1", server.effective_port), timeout=WAIT_SECONDS)
+        with client:
+            client.sendall(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            assert client.recv(1024).startswith(b"HTTP/1.1 200")
+        assert not detected.is_set()
+    finally:
+        server.close()
@@ -0,0 +1,139 @@
+"""内存准入控制：以可控的RSS读数强制排队、超时拒绝，并校验名额在各条路径上都被释放"""
+
+import asyncio
+
+import pytest
+
+import memory_governor
+from memory_governor import MB, MemoryGovernor
+
+
+@pytest.fixture
+def rss(monkeypatch):
+    """替换进程树RSS读取，测试中直接设置 rss["total"]（字节）"""
+    reading = {"total": 0}
+    monkeypatch.setattr(
+        memory_governor,
+        "process_tree_rss",
+        lambda pid: {"python": reading["total"], "browser": 0, "processes": 0},
+    )
+    return reading
+
+
+@pytest.fixture
+def governor(rss):
+    return MemoryGovernor(soft_limit_mb=100, hard_limit_mb=200, sample_interval=0.01)
+
+
+def test_admits_under_soft_limit(governor, rss):
+    rss["total"] = 10 * MB
+
+    async def run():
+        async with governor.admission(1) as first, governor.admission(1) as second:
+            assert first and second
+            assert governor.stats()["active_contexts"] == 2
+
+    asyncio.run(run())
+    assert governor.stats()["active_contexts"] == 0
+    assert governor.queued == 0
+
+
+def test_first_context_admitted_over_soft_limit(governor, rss):
+    """没有进行中的上下文时总是放行"""
+    rss["total"] = 150 * MB
+
+    async def run():
+        async with governor.admission(0.05) as admitted:
+            return admitted
+
+    assert asyncio.run(run()) is True
+    assert governor.rejected == 0
+
+
+def test_queues_until_memory_recovers(governor, rss):
+    rss["total"] = 150 * MB
+
+    async def run():
+        async with governor.admission(1) as holder:
+            assert holder
+            waiter = asyncio.create_task(governor.admit(5))
+            await asyncio.sleep(0.05)
+            assert not waiter.done()
+            rss["total"] = 50 * MB
+            assert await waiter is True
+            governor.release()
+
+    asyncio.run(run())
+    assert governor.queued == 1
+    assert governor.rejected == 0
+    assert governor.stats()["active_contexts"] == 0
+
+
+def test_times_out_into_rejection(governor, rss):
+    rss["total"] = 150 * MB
+    scraped = []
+
+    async def scrape():
+        async with governor.admission(0.05) as admitted:
+            if not admitted:
+                return "blocked"
+            scraped.append(True)
+            return "ok"
+
+    async def run():
+        async with governor.admission(1):
+            return await scrape()
+
+    assert asyncio.run(run()) == "blocked"
+    assert not scraped
+    assert governor.queued == 1
+    assert governor.rejected == 1
+    # 被拒绝的请求不释放别人的名额
+    assert governor.stats()["active_contexts"] == 0
+
+
+def test_released_on_exception(governor, rss):
+    async def run():
+        async with governor.admission(1):
+            raise RuntimeError("scrape failed")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    assert governor.stats()["active_contexts"] == 0
+
+
+def test_released_on_cancellation(governor, rss):
+    async def run():
+        entered = asyncio.Event()
+
+        async def scrape():
+            async with governor.admission(1):
+                entered.set()
+                await asyncio.sleep(10)
+
+        task = asyncio.create_task(scrape())
+        await entered.wait()
+        assert governor.stats()["active_contexts"] == 1
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(run())
+    assert governor.stats()["active_contexts"] == 0
+
+
+def test_cancelled_while_queued(governor, rss):
+    """排队期间被取消时不占用名额"""
+    rss["total"] = 150 * MB
+
+    async def run():
+        async with governor.admission(1):
+            waiter = asyncio.create_task(governor.admit(5))
+            await asyncio.sleep(0.05)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+            assert governor.stats()["active_contexts"] == 1
+
+    asyncio.run(run())
+    assert governor.stats()["active_contexts"] == 0
@@ -0,0 +1,44 @@
+"""抓取结果分类：没有日期行的“数据”不能被当作成功结果缓存"""
+
+import pytest
+
+from models import STANDARD_HEADERS, DailyTable
+from outcomes import OUTCOME_EMPTY, OUTCOME_OK, OUTCOME_PARSE_FAILED, classify_extraction
+
+DAILY_ROWS = [
+    ["2024-01-01", "6", "1923", "3", "2291.93", "42.26"],
+    ["合计", "6", "1923", "3", "2291.93", "42.26"],
+]
+
+
+@pytest.mark.parametrize(
+    "headers, rows, empty, expected",
+    [
+        (STANDARD_HEADERS, DAILY_ROWS, False, OUTCOME_OK),
+        ([], DAILY_ROWS[:1], False, OUTCOME_OK),
+        (STANDARD_HEADERS, [], False, OUTCOME_EMPTY),
+        ([], [], True, OUTCOME_EMPTY),
+        (["暂无数据"], [["暂无数据"]], True, OUTCOME_EMPTY),
+        # 文本/启发式解析方式从错误页、加载提示、登录提示解析出的“表头+数据行”
+        (["系统繁忙"], [["请稍后再试"], ["返回首页"]], False, OUTCOME_PARSE_FAILED),
+        (["加载中…"], [["加载中…"]], False, OUTCOME_PARSE_FAILED),
+        (["请先登录"], [], False, OUTCOME_PARSE_FAILED),
+        # 标准表头下只有“合计”等非日期行：日期格式可能已变化，不能缓存为成功
+        (STANDARD_HEADERS, DAILY_ROWS[1:], False, OUTCOME_PARSE_FAILED),
+        ([], [], False, OUTCOME_PARSE_FAILED),
+    ],
+    ids=[
+        "daily",
+        "daily_no_header",
+        "header_only",
+        "empty_marker",
+        "empty_marker_row",
+        "error_page",
+        "loading",
+        "login_notice",
+        "total_only",
+        "nothing",
+    ],
+)
+def test_classify_extraction(headers, rows, empty, expected):
+    assert classify_extraction(headers, DailyTable.from_rows(rows), empty) == expected
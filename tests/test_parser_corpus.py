@@ -0,0 +1,152 @@
+"""解析器回归语料测试（不需要 pytest-benchmark 与浏览器）
+
+- 每个 benchmarks/fixtures/parser/ 样本的解析结果与记录的期望一致
+- 畸形样本的表头与数据行在此直接写明，--update 重新生成期望时也不会悄悄改变
+- 表格标签的表头行规则（thead / 第一行 / 显式tbody）与页面内脚本 EXTRACT_TABLE_JS 一致
+- 有Chromium时，把每个样本放入结果容器（page.set_content）执行 EXTRACT_TABLE_JS，
+  输出必须与同一期望一致；Playwright或浏览器不可用时跳过
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from table_parser import EMPTY_MARKERS, EXTRACT_TABLE_JS, RESULT_CONTAINER, parse_with_strategy
+
+FIXTURE_DIR = Path(__file__).resolve().parent.parent / "benchmarks" / "fixtures" / "parser"
+FIXTURES = sorted(FIXTURE_DIR.glob("*.html"))
+
+HEADERS = ["日期", "移动拉新数", "移动转存数", "会员订单数", "会员订单金额", "会员佣金（元）"]
+FIRST_ROW = ["2024-01-01", "6", "1923", "3", "2291.93", "42.26"]
+TENTH_ROW = ["2024-01-10", "15", "352", "23", "1593.70", "131.60"]
+
+# 与目标页面一致的结果容器；不写闭合标签，截断的样本由浏览器在文档末尾自动闭合
+PAGE_SHELL = '<div id="app"><div class="list"><div class="tab_warp">'
+
+# 样本名 -> (解析方式, 表头, 行数, 第一行, 最后一行)
+MALFORMED = {
+    "malformed_blank": (None, [], 0, None, None),
+    "malformed_empty_table": (None, [], 0, None, None),
+    # 已知问题：空单元格被丢弃，该行少一列
+    "malformed_empty_cells": (
+        "div_table",
+        HEADERS,
+        10,
+        ["2024-01-01", "6", "1923", "2291.93", "42.26"],
+        ["2024-01-10", "15", "352", "1593.70", "131.60"],
+    ),
+    "malformed_extra_cells": ("div_table", HEADERS, 10, FIRST_ROW + ["备注"], TENTH_ROW + ["备注"]),
+    "malformed_no_header": ("div_table", [], 10, FIRST_ROW, TENTH_ROW),
+    "malformed_total_row": (
+        "div_table",
+        HEADERS,
+        11,
+        FIRST_ROW,
+        ["合计", "1,234", "5,678", "90", "12,345.60", "1,234.56"],
+    ),
+    # 截断在标签中间：未完成的标签被丢弃，最后一行少一列
+    "malformed_truncated": (
+        "div_table",
+        HEADERS,
+        15,
+        FIRST_ROW,
+        ["2024-01-15", "156", "722", "17", "1871.26"],
+    ),
+    "table_tag_no_thead": ("table_tag", HEADERS, 10, FIRST_ROW, TENTH_ROW),
+    "table_tag_tbody_no_thead": ("table_tag", HEADERS, 10, FIRST_ROW, TENTH_ROW),
+}
+
+
+def load_fixture(path: Path):
+    html = path.read_text(encoding="utf-8")
+    expected = json.loads(path.with_suffix(".json").read_text(encoding="utf-8"))
+    return html, expected
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.stem)
+def test_corpus_fixture(path):
+    html, expected = load_fixture(path)
+    assert parse_with_strategy(html) == (
+        expected["strategy"],
+        expected["headers"],
+        expected["rows"],
+    )
+
+
+@pytest.mark.parametrize("name", sorted(MALFORMED))
+def test_malformed_fixture(name):
+    strategy, headers, count, first, last = MALFORMED[name]
+    html = (FIXTURE_DIR / f"{name}.html").read_text(encoding="utf-8")
+
+    parsed_strategy, parsed_headers, rows = parse_with_strategy(html)
+
+    assert parsed_strategy == strategy
+    assert parsed_headers == headers
+    assert len(rows) == count
+    if count:
+        assert rows[0] == first
+        assert rows[-1] == last
+
+
+def test_unclosed_cells_nest():
+    """未闭合的单元格嵌套在一起：前两行被合并成长文本，其余行正常"""
+    html = (FIXTURE_DIR / "malformed_unclosed.html").read_text(encoding="utf-8")
+
+    strategy, headers, rows = parse_with_strategy(html)
+
+    assert (strategy, headers) == ("div_table", HEADERS)
+    assert [len(row) for row in rows] == [34, 27, 6, 6, 6]
+    assert rows[0][0].startswith("2024-01-01\n")
+    assert rows[-1] == ["2024-01-05", "47", "483", "0", "2310.74", "266.30"]
+
+
+@pytest.mark.parametrize(
+    "html",
+    [
+        "<table><thead><tr><th>日期</th><th>移动拉新数</th></tr></thead>"
+        "<tbody><tr><td>2024-01-01</td><td>6</td></tr></tbody></table>",
+        "<table><tr><th>日期</th><th>移动拉新数</th></tr><tr><td>2024-01-01</td><td>6</td></tr></table>",
+        "<table><tbody><tr><th>日期</th><th>移动拉新数</th></tr>"
+        "<tr><td>2024-01-01</td><td>6</td></tr></tbody></table>",
+        # 有thead但没有tbody（浏览器会补上tbody，html.parser不会）
+        "<table><thead><tr><th>日期</th><th>移动拉新数</th></tr></thead>"
+        "<tr><td>2024-01-01</td><td>6</td></tr></table>",
+    ],
+    ids=["thead", "first_row", "tbody_first_row", "thead_no_tbody"],
+)
+def test_table_header_row_not_data(html):
+    assert parse_with_strategy(html) == ("table_tag", ["日期", "移动拉新数"], [["2024-01-01", "6"]])
+
+
+@pytest.fixture(scope="module")
+def chromium_page():
+    """无头Chromium页面，Playwright或浏览器不可用时跳过"""
+    sync_api = pytest.importorskip("playwright.sync_api")
+    playwright = sync_api.sync_playwright().start()
+    try:
+        browser = playwright.chromium.launch()
+    except Exception as e:
+        playwright.stop()
+        pytest.skip(f"Chromium不可用: {e}")
+    try:
+        yield browser.new_page()
+    finally:
+        browser.close()
+        playwright.stop()
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.stem)
+def test_extract_js_fixture(chromium_page, path):
+    """页面内提取（生产环境使用的实现）：输出与解析方式必须与记录的期望一致"""
+    html, expected = load_fixture(path)
+    chromium_page.set_content(PAGE_SHELL + html)
+
+    extracted = chromium_page.evaluate(
+        EXTRACT_TABLE_JS,
+        {"selector": RESULT_CONTAINER, "markers": list(EMPTY_MARKERS)},
+    )
+
+    assert extracted["strategy"] == expected["strategy"]
+    assert extracted["headers"] == expected["headers"]
+    assert extracted["rows"] == expected["rows"]
@@ -0,0 +1,141 @@
+"""按需性能剖析：直接使用 Profiler（不导入app，不启动后台线程）
+
+模拟一次命中缓存的查询：请求线程上的 profile_request 读取查询缓存并计算汇总，
+工作线程上的 profile_task 与之并发。校验会话在请求完成后自动结束并写出 .prof 与文本统计；
+另一 cProfile 已启用时（Python 3.12+ 同一时刻只能启用一个）请求也必须正常完成。
+"""
+
+import cProfile
+import threading
+
+import pytest
+
+from aggregation import compute_summary
+from models import DailyTable
+from profiler import Profiler
+from query_cache import QueryCache
+
+COEFFICIENTS = {"new_user": 4.5, "deposit": 1.2}
+
+
+@pytest.fixture
+def cache():
+    cache = QueryCache()
+    table = DailyTable.from_rows(
+        [[f"2024-01-{day:02d}", "3", "2", "5", "120.50", "6.03"] for day in range(1, 8)]
+    )
+    key = QueryCache.make_key("649", "UK_PROFILE", "2024-01-01", "2024-01-07")
+    cache.set(key, {"rows": table}, compute_summary(table, COEFFICIENTS))
+    return cache, key
+
+
+def cached_query(profiler: Profiler, cache, key):
+    """与 /api/query 命中缓存时相同：profile_request 包裹整个请求"""
+    with profiler.profile_request():
+        entry, fresh = cache.lookup(key, 0)
+        assert entry is not None and fresh
+        return compute_summary(entry.result["rows"], COEFFICIENTS)
+
+
+def test_cprofile_cached_query(tmp_path, cache):
+    profiler = Profiler(str(tmp_path))
+    profiler.start(mode="cprofile", requests=1)
+
+    summary = cached_query(profiler, *cache)
+
+    assert summary["row_count"] == 7
+    status = profiler.status()
+    assert status["active"] is False
+    result = status["last_result"]
+    assert result["requests"] == 1
+    assert result["threads_profiled"] == 1
+    assert result["threads_skipped"] == 0
+    stats = (tmp_path / f"{result['name']}.txt").read_text(encoding="utf-8")
+    assert "compute_summary" in stats
+    assert (tmp_path / f"{result['name']}.prof").is_file()
+
+
+def test_cprofile_request_and_worker_threads(tmp_path, cache):
+    """请求线程等待工作线程（run_async_task）完成：3.12+ 只有一个线程能启用 cProfile，另一个被跳过"""
+    profiler = Profiler(str(tmp_path))
+    profiler.start(mode="cprofile", requests=1)
+    entry, _ = cache[0].lookup(cache[1], 0)
+
+    def worker():
+        with profiler.profile_task():
+            compute_summary(entry.result["rows"], COEFFICIENTS)
+
+    with profiler.profile_request():
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+
+    result = profiler.status()["last_result"]
+    assert result["requests"] == 1
+    assert result["threads_profiled"] + result["threads_skipped"] == 2
+    assert result["threads_profiled"] >= 1
+    assert result["files"]
+
+
+def test_cprofile_with_another_profiler_active(tmp_path, cache):
+    profiler = Profiler(str(tmp_path))
+    outer = cProfile.Profile()
+    outer.enable()
+    try:
+        profiler.start(mode="cprofile", requests=1)
+        summary = cached_query(profiler, *cache)
+    finally:
+        outer.disable()
+
+    assert summary["row_count"] == 7
+    result = profiler.status()["last_result"]
+    assert result["requests"] == 1
+    # Python 3.12+ 跳过该线程，更早的版本两个 cProfile 可以同时启用
+    assert result["threads_profiled"] + result["threads_skipped"] == 1
+
+
+@pytest.mark.parametrize(
+    "kwargs",
+    [
+        {"seconds": 0},
+        {"seconds": -1},
+        {"seconds": float("nan")},
+        {"seconds": float("inf")},
+        {"seconds": 301},
+        {"requests": 1, "seconds": 0},
+        {"requests": 1, "interval": 0},
+        {"requests": 1, "interval": float("nan")},
+        {"requests": 0},
+        {},
+    ],
+    ids=[
+        "zero",
+        "negative",
+        "nan",
+        "inf",
+        "over_max",
+        "requests_zero_seconds",
+        "zero_interval",
+        "nan_interval",
+        "zero_requests",
+        "unbounded",
+    ],
+)
+def test_start_rejects_invalid_limits(tmp_path, kwargs):
+    profiler = Profiler(str(tmp_path), max_seconds=300)
+
+    with pytest.raises(ValueError):
+        profiler.start(**kwargs)
+
+    assert profiler.status()["active"] is False
+
+
+def test_start_accepts_max_seconds(tmp_path):
+    profiler = Profiler(str(tmp_path), max_seconds=300)
+
+    status = profiler.start(seconds=300)
+    try:
+        assert status["active"] is True
+        assert status["seconds"] == 300
+    finally:
+        profiler.stop()
@@ -0,0 +1,38 @@
+"""流式导出：字符串行中的非有限数值（NaN/Infinity）保留原文，不能中断导出"""
+
+import csv
+import io
+
+import pytest
+
+import table_export
+from models import DailyTable
+from table_export import csv_chunks, iter_rows, xlsx_chunks
+
+ROWS = [["2024-01-01", "nan", "1,234", "3", "inf", "6.03"]]
+
+
+def test_iter_rows_keeps_non_finite_text():
+    assert list(iter_rows("UK1", ROWS, "")) == [
+        ["UK1", "2024-01-01", "nan", 1234, 3, "inf", 6.03, ""]
+    ]
+
+
+def test_csv_export():
+    table = DailyTable.from_rows([["2024-01-02", "1", "2", "3", "4.5", "0.06"]])
+    data = b"".join(csv_chunks([("UK1", ROWS, ""), ("UK2", table, ""), ("UK3", None, "未缓存")]))
+
+    lines = list(csv.reader(io.StringIO(data.decode("utf-8-sig"))))
+
+    assert lines[1] == ["UK1", "2024-01-01", "nan", "1234", "3", "inf", "6.03", ""]
+    assert lines[2] == ["UK2", "2024-01-02", "1", "2", "3", "4.50", "0.06", ""]
+    assert lines[3][0] == "UK3" and lines[3][-1] == "未缓存"
+
+
+def test_xlsx_export_with_non_finite_cells():
+    if table_export.xlsxwriter is None:
+        pytest.skip("需要 xlsxwriter")
+
+    data = b"".join(xlsx_chunks([("UK1", ROWS, "")]))
+
+    assert data[:2] == b"PK"
@@ -0,0 +1,140 @@
+"""超时预算模块
+
+每个查询有一个总截止时间(Deadline)，抓取过程的各阶段从剩余预算中分配超时，
+并为后续阶段预留其预期耗时，避免外层超时先触发而丢弃内层已完成的工作。
+各阶段的超时根据最近观测到的成功耗时的p99自适应调整（限制在下限与上限之间），
+样本不足时使用默认值。
+"""
+
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Sequence, Tuple
+
+# 阶段名 -> (默认超时, 下限, 上限)，单位秒
+PhaseLimits = Dict[str, Tuple[float, float, float]]
+
+
+class DeadlineExceeded(TimeoutError):
+    """查询的总超时预算已耗尽"""
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """已排序序列的分位数（最近秩法）"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class TimeoutPolicy:
+    """线程安全的阶段耗时统计与自适应超时计算"""
+
+    def __init__(
+        self,
+        limits: PhaseLimits,
+        order: Sequence[str],
+        window: int = 200,
+        multiplier: float = 1.5,
+        min_samples: int = 20,
+    ):
+        self.limits = dict(limits)
+        self.order = list(order)  # 用于为后续阶段预留预算的阶段顺序
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {
+            phase: deque(maxlen=window) for phase in self.limits
+        }
+        self._lock = threading.Lock()
+
+    def observe(self, phase: str, seconds: float) -> None:
+        """记录阶段的成功耗时"""
+        samples = self._samples.get(phase)
+        if samples is None:
+            return
+        with self._lock:
+            samples.append(seconds)
+
+    def _sorted_samples(self, phase: str) -> Sequence[float]:
+        with self._lock:
+            return sorted(self._samples.get(phase, ()))
+
+    def timeout_for(self, phase: str) -> float:
+        """阶段超时: p99 * 系数，限制在 [下限, 上限]；样本不足时使用默认值"""
+        default, floor, ceiling = self.limits[phase]
+        samples = self._sorted_samples(phase)
+        if len(samples) < self.min_samples:
+            return default
+        return min(ceiling, max(floor, percentile(samples, 0.99) * self.multiplier))
+
+    def expected(self, phase: str) -> float:
+        """阶段的预期耗时（中位数），样本不足时取下限"""
+        _, floor, _ = self.limits[phase]
+        samples = self._sorted_samples(phase)
+        if len(samples) < self.min_samples:
+            return floor
+        return percentile(samples, 0.5)
+
+    def reserve_after(self, phase: str) -> float:
+        """需要为该阶段之后的阶段预留的预算"""
+        if phase not in self.order:
+            return 0.0
+        later = self.order[self.order.index(phase) + 1 :]
+        return sum(self.expected(name) for name in later)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        result = {}
+        for phase in self.limits:
+            samples = self._sorted_samples(phase)
+            result[phase] = {
+                "samples": len(samples),
+                "p50": round(percentile(samples, 0.5), 3),
+                "p99": round(percentile(samples, 0.99), 3),
+                "timeout": round(self.timeout_for(phase), 3),
+            }
+        return result
+
+
+class Deadline:
+    """单个查询的超时预算"""
+
+    __slots__ = ("policy", "total", "started_at", "expires_at")
+
+    def __init__(self, policy: TimeoutPolicy, total: float):
+        self.policy = policy
+        self.total = total
+        self.started_at = time.monotonic()
+        self.expires_at = self.started_at + total
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def timeout(self, phase: str) -> float:
+        """阶段超时（秒）: 自适应超时与剩余预算（扣除后续阶段预留）中的较小者"""
+        remaining = self.remaining()
+        if remaining <= 0:
+            raise DeadlineExceeded(f"超时预算已耗尽({self.total:.0f}秒)，阶段: {phase}")
+        _, floor, _ = self.policy.limits[phase]
+        budget = remaining - self.policy.reserve_after(phase)
+        timeout = min(self.policy.timeout_for(phase), budget)
+        # 预留后不足下限时，仍给该阶段至少下限（不超过剩余预算）的时间
+        return max(timeout, min(floor, remaining))
+
+    def timeout_ms(self, phase: str) -> float:
+        """Playwright 使用的毫秒超时"""
+        return self.timeout(phase) * 1000
+
+    def sleep_time(self, seconds: float) -> float:
+        """不超过剩余预算的等待时间"""
+        return min(seconds, self.remaining())
+
+    @contextmanager
+    def track(self, phase: str) -> Iterator[None]:
+        """记录阶段耗时（仅成功完成时计入统计）"""
+        started = time.monotonic()
+        yield
+        self.policy.observe(phase, time.monotonic() - started)